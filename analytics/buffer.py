@@ -0,0 +1,83 @@
+import os
+import time
+from datetime import datetime, timezone
+
+from django.db import transaction
+from wagtail.models import Page
+
+from core.singleflight import KeyLock
+from core.spool import BackgroundFlusher, Spool
+
+from .models import PageView
+
+spool = Spool("events", "ANALYTICS_SPOOL_DIR", "analytics")
+
+
+def get_spool_dir():
+    return spool.get_dir()
+
+
+def append(page_id, path, referrer, viewed_at=None):
+    """
+    Append one page view to the on-disk spool shared by every worker
+    """
+    spool.append([viewed_at or time.time(), page_id, path, referrer])
+
+
+# -------------------------------
+# Flushing
+# -------------------------------
+def insert_events(events, batch_size):
+    page_ids = {page_id for __, page_id, __, __ in events if page_id is not None}
+    # Views are only attributed to pages anyone may see; the beacon accepts
+    # any id, and the read APIs would otherwise list private titles
+    existing = set(
+        Page.objects.live().public().filter(pk__in=page_ids).values_list("pk", flat=True)
+    )
+    PageView.objects.bulk_create(
+        (
+            PageView(
+                page_id=page_id if page_id in existing else None,
+                path=page_path,
+                referrer=referrer,
+                viewed_at=datetime.fromtimestamp(viewed_at, tz=timezone.utc),
+            )
+            for viewed_at, page_id, page_path, referrer in events
+        ),
+        batch_size=batch_size,
+    )
+    return len(events)
+
+
+def flush_spool(batch_size=1000):
+    """
+    Batch-insert every spooled page view. Return the number inserted.
+    Batches that fail to insert are quarantined (core.spool).
+    """
+    total = 0
+    for path in spool.claim():
+        with transaction.atomic():
+            total += spool.consume(path, lambda events: insert_events(events, batch_size), batch_size * 10)
+        os.remove(path)
+    return total
+
+
+def flush(batch_size=1000, wait=0):
+    """
+    Flush the spool and roll the new page views up, in one worker at a
+    time. Return (inserted, rolled up), or None if another worker is busy.
+    """
+    from .rollups import rollup
+
+    lock = KeyLock("analytics:flush")
+    if not lock.acquire(timeout=wait):
+        return None
+    try:
+        return flush_spool(batch_size), rollup()
+    finally:
+        lock.release()
+
+
+flusher = BackgroundFlusher(
+    "analytics-flusher", flush, "ANALYTICS_FLUSH_INTERVAL", "ANALYTICS_AUTO_FLUSH"
+)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from analytics.buffer import flush
+
+
+class Command(BaseCommand):
+    help = "Insert spooled page views and roll them up into hourly totals"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--wait",
+            type=float,
+            default=30,
+            help="Seconds to wait for a flush already running in a worker",
+        )
+
+    def handle(self, *args, batch_size, wait, **options):
+        result = flush(batch_size=batch_size, wait=wait)
+        if result is None:
+            self.stderr.write("Another flush is still running")
+            return
+        inserted, rolled_up = result
+        self.stdout.write(f"Inserted {inserted} page views, rolled up {rolled_up}")
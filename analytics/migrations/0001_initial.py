@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("wagtailcore", "0095_groupsitepermission"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollupState",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("last_event_id", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="PageView",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("path", models.CharField(max_length=255)),
+                ("referrer", models.CharField(blank=True, max_length=255)),
+                ("viewed_at", models.DateTimeField(db_index=True)),
+                ("page", models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="+", to="wagtailcore.page")),
+            ],
+        ),
+        migrations.CreateModel(
+            name="HourlyPageViews",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("hour", models.DateTimeField()),
+                ("views", models.PositiveIntegerField(default=0)),
+                ("page", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="hourly_views", to="wagtailcore.page")),
+            ],
+            options={
+                "verbose_name_plural": "hourly page views",
+                "indexes": [models.Index(fields=["hour", "page"], name="analytics_hour_page")],
+                "constraints": [models.UniqueConstraint(fields=("page", "hour"), name="analytics_page_hour")],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import models
+
+
+class PageView(models.Model):
+    """
+    A raw page view beacon, inserted in batches from the spool and kept
+    for ANALYTICS_RAW_RETENTION_DAYS after it has been rolled up
+    """
+    page = models.ForeignKey(
+        "wagtailcore.Page", null=True, on_delete=models.SET_NULL, related_name="+"
+    )
+    path = models.CharField(max_length=255)
+    referrer = models.CharField(max_length=255, blank=True)
+    viewed_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.path} at {self.viewed_at}"
+
+
+class HourlyPageViews(models.Model):
+    """
+    Page views per page and hour, maintained by analytics.rollups
+    """
+    page = models.ForeignKey(
+        "wagtailcore.Page", on_delete=models.CASCADE, related_name="hourly_views"
+    )
+    hour = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["page", "hour"], name="analytics_page_hour"),
+        ]
+        indexes = [models.Index(fields=["hour", "page"], name="analytics_hour_page")]
+        verbose_name_plural = "hourly page views"
+
+    def __str__(self):
+        return f"{self.page_id} at {self.hour}: {self.views}"
+
+
+class RollupState(models.Model):
+    """
+    The last PageView id included in HourlyPageViews
+    """
+    SINGLETON_ID = 1
+
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return str(self.last_event_id)
@@ -0,0 +1,59 @@
+import datetime
+from datetime import timedelta
+
+import django_filters
+from django.db.models import Q, Sum
+from django.utils import timezone
+from wagtail.admin.filters import WagtailFilterSet
+from wagtail.admin.ui.tables import Column, TitleColumn
+from wagtail.admin.views.reports import ReportView
+from wagtail.models import Page
+
+PERIODS = {"1": "Last 24 hours", "7": "Last 7 days", "30": "Last 30 days"}
+
+
+class PageViewsReportFilterSet(WagtailFilterSet):
+    # Picks the period the views are summed over, see get_queryset
+    days = django_filters.ChoiceFilter(
+        label="Period", choices=list(PERIODS.items()), method="filter_period"
+    )
+
+    class Meta:
+        model = Page
+        fields = []
+
+    def filter_period(self, queryset, name, value):
+        return queryset
+
+
+class PageViewsReportView(ReportView):
+    """
+    Most viewed pages, read from the hourly rollups
+    """
+    page_title = "Page views"
+    header_icon = "view"
+    index_url_name = "analytics_page_views_report"
+    index_results_url_name = "analytics_page_views_report_results"
+    default_ordering = "-views"
+    filterset_class = PageViewsReportFilterSet
+    list_export = ["title", "url_path", "views"]
+    export_headings = {"url_path": "Path", "views": "Views"}
+    columns = [
+        TitleColumn("title", label="Page", url_name="wagtailadmin_pages:edit"),
+        Column("url_path", label="Path"),
+        Column("views", label="Views", sort_key="views"),
+    ]
+
+    @property
+    def days(self):
+        days = self.request.GET.get("days", "7")
+        return int(days) if days in PERIODS else 7
+
+    def get_filename(self):
+        return "page-views-report-{}".format(datetime.date.today().strftime("%Y-%m-%d"))
+
+    def get_queryset(self):
+        since = timezone.now() - timedelta(days=self.days)
+        return Page.objects.annotate(
+            views=Sum("hourly_views__views", filter=Q(hourly_views__hour__gte=since))
+        ).filter(views__gt=0)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import HourlyPageViews, PageView, RollupState
+
+
+def get_state():
+    state, __ = RollupState.objects.get_or_create(pk=RollupState.SINGLETON_ID)
+    return state
+
+
+def rollup():
+    """
+    Add the page views inserted since the last rollup to HourlyPageViews
+    and prune raw views past ANALYTICS_RAW_RETENTION_DAYS. Return the
+    number of page views rolled up.
+    """
+    with transaction.atomic():
+        state = get_state()
+        new_views = PageView.objects.filter(pk__gt=state.last_event_id, page__isnull=False)
+        last_event_id = PageView.objects.aggregate(last=Max("pk"))["last"]
+        if last_event_id is None or last_event_id <= state.last_event_id:
+            return 0
+
+        counts = (
+            new_views.filter(pk__lte=last_event_id)
+            .annotate(hour=TruncHour("viewed_at"))
+            .values("page_id", "hour")
+            .annotate(views=Count("pk"))
+            .order_by()
+        )
+        counts = {(row["page_id"], row["hour"]): row["views"] for row in counts}
+        merge(counts)
+
+        state.last_event_id = last_event_id
+        state.save(update_fields=["last_event_id", "updated_at"])
+
+    retention = getattr(settings, "ANALYTICS_RAW_RETENTION_DAYS", 30)
+    PageView.objects.filter(
+        pk__lte=last_event_id, viewed_at__lt=timezone.now() - timedelta(days=retention)
+    ).delete()
+    return sum(counts.values())
+
+
+def merge(counts):
+    """
+    Add {(page_id, hour): views} to the existing hourly rows
+    """
+    if not counts:
+        return
+    hours = {hour for __, hour in counts}
+    page_ids = {page_id for page_id, __ in counts}
+    existing = {
+        (row.page_id, row.hour): row
+        for row in HourlyPageViews.objects.filter(page_id__in=page_ids, hour__in=hours)
+    }
+
+    updated = []
+    created = []
+    for key, views in counts.items():
+        row = existing.get(key)
+        if row is None:
+            created.append(HourlyPageViews(page_id=key[0], hour=key[1], views=views))
+        else:
+            row.views += views
+            updated.append(row)
+    HourlyPageViews.objects.bulk_update(updated, ["views"], batch_size=500)
+    HourlyPageViews.objects.bulk_create(created, batch_size=500)
@@ -0,0 +1,131 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from wagtail.models import Page, PageViewRestriction
+
+from home.models import Homepage
+
+from .buffer import append, flush, flush_spool, get_spool_dir
+from .models import HourlyPageViews, PageView
+
+
+class AnalyticsTestCase(TestCase):
+    """Test cases for page view ingestion and rollups"""
+
+    def setUp(self):
+        settings_override = override_settings(
+            ANALYTICS_SPOOL_DIR=tempfile.mkdtemp(),
+            ANALYTICS_AUTO_FLUSH=False,
+            ADMISSION_CLASSES={},
+            SINGLE_FLIGHT_LOCK_DIR=tempfile.mkdtemp(),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        root_page = Page.objects.get(pk=1)
+        self.page = root_page.add_child(instance=Homepage(title="Careers", slug="careers"))
+
+    def send(self, data):
+        return self.client.post(
+            reverse("analytics_beacon"), json.dumps(data), content_type="text/plain"
+        )
+
+    def test_beacon_spooled_then_flushed(self):
+        for __ in range(3):
+            response = self.send({"page": self.page.pk, "path": "/careers/", "referrer": ""})
+            self.assertEqual(response.status_code, 204)
+        self.assertEqual(PageView.objects.count(), 0)
+
+        self.assertEqual(flush(), (3, 3))
+        self.assertEqual(PageView.objects.filter(page=self.page).count(), 3)
+        self.assertEqual(HourlyPageViews.objects.get(page=self.page).views, 3)
+        self.assertEqual(os.listdir(get_spool_dir()), [])
+
+    def test_rollups_accumulate(self):
+        hour = datetime(2026, 1, 5, 9, tzinfo=timezone.utc)
+        for minutes in (5, 50, 65):
+            append(self.page.pk, "/careers/", "", (hour + timedelta(minutes=minutes)).timestamp())
+        flush()
+        append(self.page.pk, "/careers/", "", (hour + timedelta(minutes=30)).timestamp())
+        self.assertEqual(flush(), (1, 1))
+        views = dict(HourlyPageViews.objects.values_list("hour", "views"))
+        self.assertEqual(views, {hour: 3, hour + timedelta(hours=1): 1})
+
+    def test_invalid_and_unknown_pages(self):
+        self.assertEqual(self.send(["not", "an", "object"]).status_code, 400)
+        self.assertEqual(self.send({"page": "x"}).status_code, 400)
+        self.assertEqual(self.send({"page": 999999, "path": "/gone/"}).status_code, 204)
+        self.assertEqual(flush(), (1, 0))
+        self.assertIsNone(PageView.objects.get().page_id)
+
+    def test_bad_page_ids_rejected_or_quarantined(self):
+        for page in (10**30, 0, -1, 1.5, True, "x", [1]):
+            self.assertEqual(self.send({"page": page, "path": "/"}).status_code, 400)
+
+        # A batch that can't be inserted is set aside instead of blocking
+        # every later flush
+        append(10**30, "/careers/", "")
+        with self.assertLogs("core.spool", "ERROR"):
+            self.assertEqual(flush(), (0, 0))
+        self.assertEqual(os.listdir(get_spool_dir()), ["events.failed"])
+        append(self.page.pk, "/careers/", "")
+        self.assertEqual(flush(), (1, 1))
+        with open(os.path.join(get_spool_dir(), "events.failed")) as f:
+            self.assertIn(str(10**30), f.read())
+
+    def test_concurrent_appends_survive_flushes(self):
+        def worker():
+            for __ in range(200):
+                append(self.page.pk, "/careers/", "")
+
+        threads = [threading.Thread(target=worker) for __ in range(8)]
+        for thread in threads:
+            thread.start()
+        inserted = 0
+        while any(thread.is_alive() for thread in threads):
+            inserted += flush_spool()
+        for thread in threads:
+            thread.join()
+        inserted += flush_spool()
+        self.assertEqual(inserted, 1600)
+
+    def test_read_api(self):
+        for __ in range(4):
+            append(self.page.pk, "/careers/", "")
+        flush()
+        data = self.client.get(reverse("analytics_page_views", args=[self.page.pk])).json()
+        self.assertEqual(data["total"], 4)
+        top = self.client.get(reverse("analytics_top_pages")).json()["results"]
+        self.assertEqual(top, [{"page": self.page.pk, "title": "Careers", "views": 4}])
+
+    def test_private_pages_hidden(self):
+        private = self.page.add_child(instance=Homepage(title="Layoff plan", slug="plan"))
+        append(private.pk, "/careers/plan/", "")
+        append(self.page.pk, "/careers/", "")
+        PageViewRestriction.objects.create(page=self.page, restriction_type="login")
+        self.assertEqual(flush(), (2, 0))
+        self.assertFalse(PageView.objects.filter(page__isnull=False).exists())
+
+        # Views recorded before a page went private stay out of the APIs
+        PageViewRestriction.objects.all().delete()
+        append(self.page.pk, "/careers/", "")
+        flush()
+        PageViewRestriction.objects.create(page=self.page, restriction_type="login")
+        response = self.client.get(reverse("analytics_page_views", args=[self.page.pk]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get(reverse("analytics_top_pages")).json()["results"], [])
+
+    def test_admin_report(self):
+        append(self.page.pk, "/careers/", "")
+        flush()
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        response = self.client.get(reverse("analytics_page_views_report"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Careers")
+
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from core.routing import stateless
+from .views import BeaconView, PageViewsAPIView, TopPagesAPIView
+
+urlpatterns = [
+    path('beacon/', stateless(BeaconView.as_view()), name='analytics_beacon'),
+    path('pages/<int:page_id>/', stateless(PageViewsAPIView.as_view()), name='analytics_page_views'),
+    path('top/', stateless(TopPagesAPIView.as_view()), name='analytics_top_pages'),
+]
@@ -0,0 +1,105 @@
+import json
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from wagtail.models import Page
+
+from .buffer import append, flusher
+from .models import HourlyPageViews
+
+MAX_BEACON_SIZE = 2048
+# Largest primary key a page can have (BigAutoField)
+MAX_PAGE_ID = 2**63 - 1
+
+
+def public_pages():
+    """Pages whose views the read APIs may show"""
+    return Page.objects.live().public()
+
+
+def get_int(request, name, default, maximum):
+    try:
+        value = int(request.GET.get(name, default))
+    except ValueError:
+        value = default
+    return max(1, min(value, maximum))
+
+
+def get_page_id(value):
+    """A beacon's page id, or None; ValueError unless it is a valid pk"""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(value)
+    page_id = int(value)
+    if not 0 < page_id <= MAX_PAGE_ID:
+        raise ValueError(value)
+    return page_id
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class BeaconView(View):
+    """
+    Record a page view sent with navigator.sendBeacon. The view is only
+    appended to the spool here; analytics.buffer inserts them in batches.
+    """
+
+    def post(self, request):
+        if len(request.body) > MAX_BEACON_SIZE:
+            return JsonResponse({'success': False, 'message': 'Beacon too large'}, status=413)
+        try:
+            data = json.loads(request.body)
+            page_id = get_page_id(data.get('page'))
+            path = str(data.get('path', ''))[:255]
+            referrer = str(data.get('referrer', ''))[:255]
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return JsonResponse({'success': False, 'message': 'Invalid beacon'}, status=400)
+
+        append(page_id, path, referrer)
+        flusher.ensure_running()
+        return HttpResponse(status=204)
+
+
+class PageViewsAPIView(View):
+    """Hourly views of one page over the last ``hours`` hours"""
+
+    def get(self, request, page_id):
+        if not public_pages().filter(pk=page_id).exists():
+            return JsonResponse({'success': False, 'message': 'Not found'}, status=404)
+        hours = get_int(request, 'hours', 24, 24 * 90)
+        since = timezone.now() - timedelta(hours=hours)
+        rows = HourlyPageViews.objects.filter(page_id=page_id, hour__gte=since).order_by('hour')
+        series = [
+            {'hour': hour.isoformat(), 'views': views}
+            for hour, views in rows.values_list('hour', 'views')
+        ]
+        return JsonResponse({
+            'page': page_id,
+            'total': sum(point['views'] for point in series),
+            'hours': series,
+        })
+
+
+class TopPagesAPIView(View):
+    """The most viewed pages over the last ``hours`` hours"""
+
+    def get(self, request):
+        hours = get_int(request, 'hours', 24, 24 * 90)
+        limit = get_int(request, 'limit', 10, 100)
+        since = timezone.now() - timedelta(hours=hours)
+        rows = (
+            HourlyPageViews.objects.filter(hour__gte=since, page__in=public_pages())
+            .values('page_id', 'page__title')
+            .annotate(views=Sum('views'))
+            .order_by('-views', 'page_id')[:limit]
+        )
+        results = [
+            {'page': row['page_id'], 'title': row['page__title'], 'views': row['views']}
+            for row in rows
+        ]
+        return JsonResponse({'results': results})
@@ -0,0 +1,32 @@
+from django.urls import path, reverse
+from wagtail import hooks
+from wagtail.admin.menu import MenuItem
+
+from .reports import PageViewsReportView
+
+
+@hooks.register("register_admin_urls")
+def register_analytics_urls():
+    return [
+        path(
+            "reports/page-views/",
+            PageViewsReportView.as_view(),
+            name="analytics_page_views_report",
+        ),
+        path(
+            "reports/page-views/results/",
+            PageViewsReportView.as_view(results_only=True),
+            name="analytics_page_views_report_results",
+        ),
+    ]
+
+
+@hooks.register("register_reports_menu_item")
+def register_page_views_menu_item():
+    return MenuItem(
+        "Page views",
+        reverse("analytics_page_views_report"),
+        name="page-views",
+        icon_name="view",
+        order=1000,
+    )
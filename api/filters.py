@@ -0,0 +1,20 @@
+import django_filters
+
+from home.models import Testimonial
+
+
+class TestimonialFilter(django_filters.FilterSet):
+    """
+    Filters for the testimonials API
+    """
+    page = django_filters.NumberFilter(field_name='landing_page_id')
+    page_slug = django_filters.CharFilter(field_name='landing_page__slug')
+    rating = django_filters.NumberFilter()
+    min_rating = django_filters.NumberFilter(field_name='rating', lookup_expr='gte')
+    max_rating = django_filters.NumberFilter(field_name='rating', lookup_expr='lte')
+    role = django_filters.CharFilter(lookup_expr='iexact')
+    ordering = django_filters.OrderingFilter(fields=('rating', 'id'))
+
+    class Meta:
+        model = Testimonial
+        fields = []
@@ -0,0 +1,103 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.fields.tuple_lookups import Tuple, TupleGreaterThan, TupleLessThan
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPaginator:
+    """
+    Seek-method pagination. Instead of OFFSET, each page starts strictly
+    after the ordering values of the previous page's last row, so the
+    database walks an index from that point no matter how deep the page is.
+
+    The queryset's ordering is used as the key; the primary key is appended
+    as a tie-breaker (in the direction of the last ordering field) so the key
+    is always unique.
+    """
+
+    def __init__(self, queryset, page_size):
+        self.page_size = page_size
+        ordering = list(queryset.query.order_by) or ['pk']
+        fields = [name.lstrip('-') for name in ordering]
+        if not {'pk', 'id'} & set(fields):
+            ordering.append('-pk' if ordering[-1].startswith('-') else 'pk')
+        self.ordering = ordering
+        self.fields = [
+            'id' if name.lstrip('-') == 'pk' else name.lstrip('-') for name in ordering
+        ]
+        self.queryset = queryset.order_by(*ordering)
+
+    def encode_cursor(self, values):
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded))
+        except (ValueError, TypeError):
+            raise InvalidCursor('Invalid cursor')
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise InvalidCursor('Invalid cursor')
+        return values
+
+    def seek_filters(self, values):
+        """
+        Conditions selecting the rows after ``values``, in page order.
+
+        When every key runs in the same direction and the backend supports
+        row values this is one comparison, e.g. (rating, id) < (r, i), which
+        is a single index range seek. Otherwise the comparison is split into
+        one condition per key prefix, e.g. for (-rating, -id):
+        [rating = r AND id < i, rating < r]
+        Each of those is an equality prefix plus a range on the next index
+        column, so every query still seeks instead of scanning.
+        """
+        features = connections[self.queryset.db].features
+        directions = {name.startswith('-') for name in self.ordering}
+        if len(directions) == 1 and features.supports_tuple_lookups:
+            lookup = TupleLessThan if directions.pop() else TupleGreaterThan
+            return [lookup(Tuple(*(F(field) for field in self.fields)), values)]
+
+        conditions = []
+        for position in reversed(range(len(self.fields))):
+            lookup = 'lt' if self.ordering[position].startswith('-') else 'gt'
+            condition = Q(**{f'{self.fields[position]}__{lookup}': values[position]})
+            for previous in range(position):
+                condition &= Q(**{self.fields[previous]: values[previous]})
+            conditions.append(condition)
+        return conditions
+
+    def page(self, cursor=None, values_fields=()):
+        # Fetch one extra row to know whether there is a next page
+        limit = self.page_size + 1
+        queryset = self.queryset.values(*values_fields, *self.fields)
+
+        if not cursor:
+            rows = list(queryset[:limit])
+        else:
+            values = self.decode_cursor(cursor)
+            rows = []
+            try:
+                for condition in self.seek_filters(values):
+                    rows.extend(queryset.filter(condition)[:limit - len(rows)])
+                    if len(rows) >= limit:
+                        break
+            except (ValueError, TypeError, ValidationError):
+                raise InvalidCursor('Invalid cursor')
+
+        has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        next_cursor = None
+        if has_next:
+            next_cursor = self.encode_cursor([rows[-1][field] for field in self.fields])
+        results = [{name: row[name] for name in values_fields} for row in rows]
+        return results, next_cursor
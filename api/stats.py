@@ -0,0 +1,105 @@
+import asyncio
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from core.replicas import use_primary
+
+STATS_DATA = [
+    {"value": 150, "label": "Clients"},
+    {"value": 98, "label": "Satisfaction"},
+    {"value": 24, "label": "Countries"},
+    {"value": 2500, "label": "Employees"}
+]
+
+
+def compute_stats():
+    """
+    The numbers shown in the stats section
+    """
+    return STATS_DATA
+
+
+def get_interval():
+    return getattr(settings, 'STATS_STREAM_INTERVAL', 5)
+
+
+def encode_stats(stats):
+    """
+    Return (event id, JSON payload). The id is derived from the content so
+    it means the same thing on every worker a client reconnects to.
+    """
+    payload = json.dumps(stats, separators=(',', ':'))
+    return hashlib.sha1(payload.encode()).hexdigest()[:16], payload
+
+
+class StatsBroadcaster:
+    """
+    One stats producer per process. While anyone is subscribed the stats
+    are recomputed every STATS_STREAM_INTERVAL seconds and each change is
+    handed to every open stream, so many clients share one computation.
+    """
+
+    def __init__(self):
+        self.event_id = None
+        self.payload = None
+        self.subscribers = 0
+        self.loop = None
+        self.task = None
+        self.changed = None
+
+    async def run(self):
+        while self.subscribers:
+            event_id, payload = encode_stats(await sync_to_async(compute_stats)())
+            if event_id != self.event_id:
+                async with self.changed:
+                    self.event_id, self.payload = event_id, payload
+                    self.changed.notify_all()
+            await asyncio.sleep(get_interval())
+
+    def ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self.loop:
+            # State bound to a previous event loop can't be awaited here
+            self.loop = loop
+            self.task = None
+            self.changed = asyncio.Condition()
+        if self.task is None or self.task.done():
+            # The task keeps the context it was created in; never let it
+            # inherit the replica chosen for the request that started it
+            with use_primary():
+                self.task = loop.create_task(self.run())
+
+    async def subscribe(self, last_event_id=None):
+        """
+        Yield (event id, payload) for the current stats and each change,
+        or (None, None) every STATS_STREAM_HEARTBEAT seconds of silence
+        """
+        heartbeat = getattr(settings, 'STATS_STREAM_HEARTBEAT', 15)
+        self.subscribers += 1
+        try:
+            self.ensure_running()
+            while True:
+                async with self.changed:
+                    if self.event_id in (None, last_event_id):
+                        try:
+                            await asyncio.wait_for(self.changed.wait(), heartbeat)
+                        except asyncio.TimeoutError:
+                            pass
+                    event_id, payload = self.event_id, self.payload
+                if event_id in (None, last_event_id):
+                    yield None, None
+                else:
+                    last_event_id = event_id
+                    yield event_id, payload
+        finally:
+            self.subscribers -= 1
+
+
+stats_broadcaster = StatsBroadcaster()
+
+
+def format_event(event_id, payload):
+    return f'id: {event_id}\nevent: stats\ndata: {payload}\n\n'
@@ -1,3 +1,141 @@
-from django.test import TestCase
+import asyncio
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from wagtail.models import Page, PageViewRestriction
+
+from core import pagecache
+from home.models import Homepage, Testimonial
+
+from .stats import StatsBroadcaster, compute_stats
+
+
+# Rate limiting is covered in core.tests; keep these from sharing its buckets
+@override_settings(ADMISSION_CLASSES={})
+class TestimonialsAPITestCase(TestCase):
+    """Test cases for the keyset-paginated testimonials API"""
+
+    def setUp(self):
+        pagecache.invalidate()
+        root_page = Page.objects.get(pk=1)
+        self.page = root_page.add_child(instance=Homepage(title="Reviews", slug="reviews"))
+        Testimonial.objects.bulk_create(
+            Testimonial(
+                landing_page=self.page,
+                name=f"Person {i}",
+                role="Manager" if i % 2 else "Engineer",
+                content="Great",
+                rating=i % 5 + 1,
+            )
+            for i in range(25)
+        )
+        self.url = reverse('api_testimonials')
+
+    def collect(self, params):
+        """Follow next links and return every id seen"""
+        ids = []
+        response = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids.extend(row['id'] for row in data['results'])
+            if not data['next']:
+                return ids
+            response = self.client.get(data['next'])
+
+    def test_pages_cover_every_row_in_order(self):
+        ids = self.collect({'page_size': 4})
+        expected = list(
+            Testimonial.objects.order_by('-rating', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_ordering_by_id(self):
+        ids = self.collect({'page_size': 7, 'ordering': 'id'})
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(ids), 25)
+
+    def test_mixed_direction_ordering(self):
+        ids = self.collect({'page_size': 6, 'ordering': 'rating,-id'})
+        expected = list(
+            Testimonial.objects.order_by('rating', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_filters(self):
+        ids = self.collect({'role': 'manager', 'min_rating': 4, 'page': self.page.pk})
+        expected = set(
+            Testimonial.objects.filter(role='Manager', rating__gte=4).values_list('id', flat=True)
+        )
+        self.assertEqual(set(ids), expected)
+
+    def test_invalid_filter(self):
+        for __ in range(2):
+            response = self.client.get(self.url, {'min_rating': 'high'})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('min_rating', response.json()['errors'])
+
+    def test_payload_cached_until_content_changes(self):
+        first = self.client.get(self.url, {'page_size': 100}).json()['results']
+        # update() sends no signals, so nothing invalidates the cached payload
+        Testimonial.objects.update(name='Renamed')
+        self.assertEqual(self.client.get(self.url, {'page_size': 100}).json()['results'], first)
+        pagecache.invalidate()
+        results = self.client.get(self.url, {'page_size': 100}).json()['results']
+        self.assertEqual({result['name'] for result in results}, {'Renamed'})
+
+    def test_only_live_public_pages(self):
+        root_page = Page.objects.get(pk=1)
+        draft = root_page.add_child(instance=Homepage(title="Draft", slug="draft", live=False))
+        private = root_page.add_child(instance=Homepage(title="Private", slug="private"))
+        PageViewRestriction.objects.create(page=private, restriction_type='login')
+        hidden = [
+            Testimonial.objects.create(landing_page=page, name='Hidden', content='Secret')
+            for page in (draft, private)
+        ]
+        ids = self.collect({'page_size': 100})
+        self.assertEqual(len(ids), 25)
+        self.assertFalse({testimonial.pk for testimonial in hidden} & set(ids))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(ADMISSION_CLASSES={}, STATS_STREAM_INTERVAL=0.01)
+class StatsStreamTestCase(SimpleTestCase):
+    """Test cases for the stats event stream"""
+
+    def test_wsgi_sends_one_shot(self):
+        response = self.client.get(reverse('api_stats_stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = response.content.decode()
+        self.assertNotIn('retry:', content)
+        self.assertTrue(content.startswith('id: '))
+        self.assertIn('event: stats', content)
+        self.assertTrue(content.endswith('event: done\ndata: \n\n'))
+
+    async def test_asgi_stream_pushes_stats(self):
+        response = await self.async_client.get(reverse('api_stats_stream'))
+        self.assertTrue(response.streaming)
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        event = (await anext(chunks)).decode()
+        self.assertIn('event: stats', event)
+        self.assertIn('"label":"Clients"', event)
+        await chunks.aclose()
+
+    async def test_subscribers_share_one_computation(self):
+        broadcaster = StatsBroadcaster()
+        patch_compute = mock.patch('api.stats.compute_stats', wraps=compute_stats)
+        with patch_compute as compute, override_settings(STATS_STREAM_INTERVAL=5):
+            streams = [broadcaster.subscribe() for __ in range(50)]
+            events = await asyncio.gather(*(anext(stream) for stream in streams))
+            for stream in streams:
+                await stream.aclose()
+            broadcaster.task.cancel()
+        self.assertEqual(len({event_id for event_id, __ in events}), 1)
+        self.assertEqual(compute.call_count, 1)
+        self.assertEqual(broadcaster.subscribers, 0)
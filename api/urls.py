@@ -1,9 +1,22 @@
 from django.urls import path
-from .views import FeaturesAPIView, BenefitsAPIView, StatsAPIView, ThemeAPIView
+
+from core.routing import stateless
+from .views import (
+    FeaturesAPIView,
+    BenefitsAPIView,
+    StatsAPIView,
+    StatsStreamView,
+    ThemeAPIView,
+    HomepageSnapshotAPIView,
+    TestimonialsAPIView,
+)
 
 urlpatterns = [
-    path('features/', FeaturesAPIView.as_view(), name='api_features'),
-    path('benefits/', BenefitsAPIView.as_view(), name='api_benefits'),
-    path('stats/', StatsAPIView.as_view(), name='api_stats'),
+    path('features/', stateless(FeaturesAPIView.as_view()), name='api_features'),
+    path('benefits/', stateless(BenefitsAPIView.as_view()), name='api_benefits'),
+    path('stats/', stateless(StatsAPIView.as_view()), name='api_stats'),
+    path('stats/stream/', stateless(StatsStreamView.as_view()), name='api_stats_stream'),
+    path('testimonials/', stateless(TestimonialsAPIView.as_view()), name='api_testimonials'),
     path('theme/', ThemeAPIView.as_view(), name='api_theme'),
+    path('pages/<int:page_id>/snapshot/', stateless(HomepageSnapshotAPIView.as_view()), name='api_homepage_snapshot'),
 ]
\ No newline at end of file
@@ -1,9 +1,22 @@
-from django.http import JsonResponse
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views import View
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 import json
 
+from home.models import Homepage, Testimonial
+from home.snapshots import get_snapshot
+from core.pagecache import page_cache_stamp
+from core.singleflight import get_or_compute
+
+from .filters import TestimonialFilter
+from .pagination import InvalidCursor, KeysetPaginator
+from .stats import compute_stats, encode_stats, format_event, get_interval, stats_broadcaster
+
 # Sample data for features and benefits
 FEATURES_DATA = [
     {
@@ -61,13 +74,98 @@ class BenefitsAPIView(View):
 
 class StatsAPIView(View):
     def get(self, request):
-        stats_data = [
-            {"value": 150, "label": "Clients"},
-            {"value": 98, "label": "Satisfaction"},
-            {"value": 24, "label": "Countries"},
-            {"value": 2500, "label": "Employees"}
-        ]
-        return JsonResponse(stats_data, safe=False)
+        return JsonResponse(compute_stats(), safe=False)
+
+class StatsStreamView(View):
+    """
+    Server-Sent Events stream of the stats section. Under ASGI the stream
+    stays open and pushes each change from the shared per-process producer.
+    A WSGI worker can't be tied up by an open stream, so there the current
+    stats are sent once followed by a ``done`` event, on which the client
+    closes the EventSource instead of reconnecting.
+    """
+
+    async def get(self, request):
+        if hasattr(request, 'scope'):
+            response = StreamingHttpResponse(
+                self.stream(request.headers.get('Last-Event-ID'))
+            )
+        else:
+            stats = await sync_to_async(compute_stats)()
+            response = HttpResponse(format_event(*encode_stats(stats)) + 'event: done\ndata: \n\n')
+        response['Content-Type'] = 'text/event-stream'
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, last_event_id):
+        yield f'retry: {int(get_interval() * 1000)}\n\n'
+        async for event_id, payload in stats_broadcaster.subscribe(last_event_id):
+            if event_id is None:
+                yield ': ping\n\n'
+            else:
+                yield format_event(event_id, payload)
+
+class HomepageSnapshotAPIView(View):
+    def get(self, request, page_id):
+        snapshot = get_snapshot(page_id)
+        if snapshot is None:
+            # Live pages published before snapshots existed build theirs now
+            page = Homepage.objects.live().filter(pk=page_id).first()
+            snapshot = page.get_snapshot() if page else None
+        if snapshot is None:
+            return JsonResponse({'success': False, 'message': 'Not found'}, status=404)
+        return JsonResponse(snapshot)
+
+class TestimonialsAPIView(View):
+    default_page_size = 20
+    max_page_size = 100
+    fields = ('id', 'landing_page_id', 'name', 'role', 'content', 'rating')
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.GET.get('page_size', self.default_page_size))
+        except ValueError:
+            page_size = self.default_page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get(self, request):
+        # Payloads are cached per query string until published content
+        # changes, and only one request rebuilds an expired one
+        digest = hashlib.sha256(request.get_full_path().encode()).hexdigest()
+        key = f'api:testimonials:{page_cache_stamp.get()}:{digest}'
+        status, payload = get_or_compute(
+            key,
+            lambda: self.build_payload(request),
+            getattr(settings, 'API_CACHE_TIMEOUT', 60),
+        )
+        return JsonResponse(payload, status=status)
+
+    def build_payload(self, request):
+        params = request.GET.copy()
+        params.setdefault('ordering', '-rating')
+        # Only testimonials shown on pages anyone may see; the subquery
+        # leaves the (rating, id) indexes free for the keyset seek
+        testimonials = Testimonial.objects.filter(
+            landing_page__in=Homepage.objects.live().public().values('pk')
+        )
+        filterset = TestimonialFilter(params, queryset=testimonials)
+        if not filterset.is_valid():
+            # Plain lists: ErrorList carries a form renderer that can't be cached
+            errors = {field: list(messages) for field, messages in filterset.errors.items()}
+            return 400, {'success': False, 'errors': errors}
+
+        paginator = KeysetPaginator(filterset.qs, self.get_page_size(request))
+        try:
+            results, next_cursor = paginator.page(request.GET.get('cursor'), self.fields)
+        except InvalidCursor as e:
+            return 400, {'success': False, 'message': str(e)}
+
+        next_url = None
+        if next_cursor:
+            params['cursor'] = next_cursor
+            next_url = f"{request.path}?{params.urlencode()}"
+        return 200, {'results': results, 'next': next_url}
 
 class ThemeAPIView(View):
     @method_decorator(csrf_exempt)
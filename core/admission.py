@@ -0,0 +1,195 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.conf import settings
+
+from .singleflight import fcntl
+
+REQUIRED_OPTIONS = ("paths", "rate", "burst", "global_rate", "global_burst", "concurrency")
+
+
+def get_lock_dir():
+    return os.path.join(
+        getattr(
+            settings, "SINGLE_FLIGHT_LOCK_DIR", os.path.join(settings.BASE_DIR, "cache", "locks")
+        ),
+        "admission",
+    )
+
+
+def get_classes():
+    return getattr(settings, "ADMISSION_CLASSES", {})
+
+
+def check_client_ip():
+    """Problems with the client address settings, as messages"""
+    header = getattr(settings, "ADMISSION_CLIENT_IP_HEADER", None)
+    hops = getattr(settings, "ADMISSION_TRUSTED_PROXIES", 1)
+    if header and not (isinstance(hops, int) and hops > 0):
+        return [f"ADMISSION_TRUSTED_PROXIES needs a count above 0 with a header set, not {hops!r}"]
+    return []
+
+
+def check_classes(classes):
+    """Problems with an ADMISSION_CLASSES setting, as messages"""
+    problems = []
+    for name, options in classes.items():
+        missing = [option for option in REQUIRED_OPTIONS if option not in options]
+        if missing:
+            problems.append(f"{name!r} is missing {', '.join(missing)}")
+            continue
+        for option in ("rate", "global_rate", "burst", "global_burst", "concurrency"):
+            if not options[option] > 0:
+                problems.append(f"{name!r} needs {option} above 0, not {options[option]!r}")
+    return problems
+
+
+def classify(path):
+    """
+    Return (name, options) for the endpoint class of a path, or None
+    """
+    for name, options in get_classes().items():
+        if any(path.startswith(prefix) for prefix in options["paths"]):
+            return name, options
+    return None
+
+
+def client_id(request):
+    """
+    The address a client's buckets are keyed on. Each proxy in front
+    appends the address it got the request from to
+    ADMISSION_CLIENT_IP_HEADER, so the client is ADMISSION_TRUSTED_PROXIES
+    entries from the right; anything further left came from the client and
+    could be made up to get a fresh bucket.
+    """
+    header = getattr(settings, "ADMISSION_CLIENT_IP_HEADER", None)
+    if header and request.META.get(header):
+        addresses = [address.strip() for address in request.META[header].split(",")]
+        addresses = [address for address in addresses if address]
+        if addresses:
+            hops = getattr(settings, "ADMISSION_TRUSTED_PROXIES", 1)
+            return addresses[-min(hops, len(addresses))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+class BucketTable:
+    """
+    Token bucket state for every worker on the host, in a fixed-size
+    memory-mapped file. Each slot holds (key hash, tokens, updated at);
+    keys are placed by open addressing and the least recently updated slot
+    in a probe run is reused when they are all taken, which at worst
+    refills a bucket early.
+
+    The file is opened lazily per process (gunicorn forks after --preload)
+    and updates are serialised with flock() plus a thread lock.
+    """
+
+    SLOT = struct.Struct("<Qdd")
+
+    def __init__(self, path=None, slots=4096, probes=8):
+        self.path = path
+        self.slots = slots
+        self.probes = probes
+        self.pid = None
+        self.fd = None
+        self.map = None
+        self.lock = threading.Lock()
+
+    def get_path(self):
+        return self.path or os.path.join(get_lock_dir(), "buckets.bin")
+
+    def open(self):
+        path = self.get_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_CREAT | os.O_RDWR)
+        size = self.slots * self.SLOT.size
+        if os.fstat(fd).st_size < size:
+            os.ftruncate(fd, size)
+        self.map = mmap.mmap(fd, size)
+        self.fd = fd
+        self.pid = os.getpid()
+
+    def take(self, key, rate, burst):
+        """
+        Take a token from a bucket. Return (allowed, retry_after in seconds)
+        """
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+        key_hash = key_hash or 1
+        first = key_hash % self.slots
+
+        with self.lock:
+            if self.pid != os.getpid():
+                self.open()
+            if fcntl is not None:
+                fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                victim = None
+                tokens = burst
+                for probe in range(self.probes):
+                    offset = (first + probe) % self.slots * self.SLOT.size
+                    slot_hash, slot_tokens, updated_at = self.SLOT.unpack_from(self.map, offset)
+                    if slot_hash == key_hash:
+                        tokens = min(burst, slot_tokens + (now - updated_at) * rate)
+                        break
+                    if victim is None or updated_at < victim[1]:
+                        victim = (offset, updated_at)
+                else:
+                    offset = victim[0]
+
+                allowed = tokens >= 1
+                if allowed:
+                    tokens -= 1
+                self.SLOT.pack_into(self.map, offset, key_hash, tokens, now)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+        if allowed:
+            return True, 0
+        # check_classes() rejects a rate of 0; never divide by it anyway
+        return False, math.ceil((1 - tokens) / rate) if rate > 0 else 60
+
+
+bucket_table = BucketTable()
+
+
+class ConcurrencySlots:
+    """
+    At most ``size`` holders across all worker processes on the host. Each
+    slot is a flock()ed file, which the kernel releases if a worker dies
+    mid-request, so a crash can never leak a slot.
+    """
+
+    def __init__(self, name, size, lock_dir=None):
+        self.name = name
+        self.size = size
+        self.lock_dir = lock_dir or get_lock_dir()
+
+    def acquire(self):
+        """
+        Return an open slot file descriptor, or None when every slot is taken
+        """
+        if fcntl is None:
+            return -1
+        os.makedirs(self.lock_dir, exist_ok=True)
+        for index in range(self.size):
+            fd = os.open(
+                os.path.join(self.lock_dir, f"{self.name}-{index}.lock"), os.O_CREAT | os.O_RDWR
+            )
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def release(self, fd):
+        if fd is not None and fd >= 0:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
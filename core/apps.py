@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "core"
+    verbose_name = "Core"
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        from .signals import register_signal_handlers
+
+        register_signal_handlers()
@@ -0,0 +1,15 @@
+from django.core.handlers.asgi import ASGIHandler as BaseASGIHandler
+
+from .preload import EARLY_HINT_EXTENSION, EARLY_HINT_SCOPE_KEY
+
+
+class ASGIHandler(BaseASGIHandler):
+    """
+    Django's ASGI handler, also handing the server's send callable to
+    PreloadMiddleware when the server can send 103 Early Hints.
+    """
+
+    async def handle(self, scope, receive, send):
+        if EARLY_HINT_EXTENSION in scope.get("extensions", {}):
+            scope[EARLY_HINT_SCOPE_KEY] = send
+        return await super().handle(scope, receive, send)
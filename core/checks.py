@@ -0,0 +1,16 @@
+from django.core.checks import Error, register
+
+from .admission import check_classes, check_client_ip, get_classes
+
+
+@register()
+def check_admission_classes(app_configs, **kwargs):
+    return [
+        Error(f"ADMISSION_CLASSES: {problem}", id="core.E001")
+        for problem in check_classes(get_classes())
+    ]
+
+
+@register()
+def check_admission_client_ip(app_configs, **kwargs):
+    return [Error(problem, id="core.E002") for problem in check_client_ip()]
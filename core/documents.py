@@ -0,0 +1,153 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from wagtail.documents.views.serve import serve as serve_document
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def get_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+# -------------------------------
+# SENDFILE_BACKEND
+# -------------------------------
+def sendfile(request, filename, **kwargs):
+    """
+    Hand a document to the front proxy when SENDFILE_HEADER is set, so the
+    worker is free at once: "X-Accel-Redirect" (nginx, an internal location
+    serving SENDFILE_ROOT at SENDFILE_URL) or "X-Sendfile" (Apache, lighttpd).
+
+    The hand-off response is empty, so it carries the file's content type
+    but not the file's Content-Length (serve() drops the one wagtail adds).
+
+    Otherwise stream it with an ETag and Last-Modified, answering
+    conditional requests; serve() adds Range support. Under gunicorn the
+    file goes out with os.sendfile() through wsgi.file_wrapper.
+    """
+    header = getattr(settings, "SENDFILE_HEADER", None)
+    content_type = (
+        kwargs.get("mimetype") or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    )
+    if header == "X-Accel-Redirect":
+        root = getattr(settings, "SENDFILE_ROOT", settings.MEDIA_ROOT)
+        relative_path = os.path.relpath(filename, root).replace(os.sep, "/")
+        response = HttpResponse(content_type=content_type)
+        response[header] = settings.SENDFILE_URL.rstrip("/") + "/" + quote(relative_path)
+        return response
+    if header == "X-Sendfile":
+        response = HttpResponse(content_type=content_type)
+        response[header] = filename
+        return response
+
+    stat = os.stat(filename)
+    etag = get_etag(stat)
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = FileResponse(open(filename, "rb"), content_type=kwargs.get("mimetype"))
+        response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    return response
+
+
+# -------------------------------
+# Range requests
+# -------------------------------
+class RangeFile:
+    """
+    The next ``length`` bytes of an open file. fileno() lets a WSGI
+    server's file_wrapper still os.sendfile() them.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+        self.close = file.close
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b""
+        self.remaining -= len(data)
+        return data
+
+
+def parse_range(header, size):
+    """
+    (first, last) byte of a single "bytes=" range, None if the header should
+    be ignored (malformed, or several ranges) or False if it can't be
+    satisfied
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        suffix = int(last)
+        if suffix == 0:
+            return False
+        return max(size - suffix, 0), size - 1
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        return False
+    return first, min(int(last), size - 1) if last else size - 1
+
+
+def serve(request, document_id, document_filename):
+    """
+    wagtail's document view, answering Range requests with 206 Partial
+    Content so interrupted downloads resume
+    """
+    response = serve_document(request, document_id, document_filename)
+    header = getattr(settings, "SENDFILE_HEADER", None)
+    if header and response.has_header(header):
+        # The proxy sends the file; a length here would not match the empty body
+        del response["Content-Length"]
+        return response
+    if (
+        request.method != "GET"
+        or "Range" not in request.headers
+        or response.status_code != 200
+        or getattr(response, "file_to_stream", None) is None
+    ):
+        return response
+
+    # A partial copy of an older version must be replaced in full
+    if_range = request.headers.get("If-Range")
+    if if_range is not None and if_range not in (response.get("ETag"), response.get("Last-Modified")):
+        return response
+
+    size = int(response["Content-Length"])
+    byte_range = parse_range(request.headers["Range"], size)
+    if byte_range is None:
+        return response
+    if byte_range is False:
+        response.close()
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    first, last = byte_range
+    content_type = response["Content-Type"]
+    response.file_to_stream.seek(first)
+    response.streaming_content = RangeFile(response.file_to_stream, last - first + 1)
+    response.status_code = 206
+    response["Content-Type"] = content_type
+    response["Content-Range"] = f"bytes {first}-{last}/{size}"
+    response["Content-Length"] = last - first + 1
+    return response
@@ -0,0 +1,52 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+
+class Command(BaseCommand):
+    help = "Time requests to the given paths through the full WSGI stack"
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument(
+            "--compare-full-stack",
+            action="store_true",
+            help="Also run every path with StatelessRouteMiddleware removed",
+        )
+
+    def bench(self, path, count, host):
+        client = Client(HTTP_HOST=host)
+        client.get(path)  # warm up
+        timings = []
+        for __ in range(count):
+            started = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - started) * 1_000_000)
+        timings.sort()
+        return response.status_code, timings
+
+    def report(self, label, path, status, timings):
+        self.stdout.write(
+            f"{label:<12} {path:<32} {status}  "
+            f"mean {statistics.fmean(timings):8.1f} us  "
+            f"p50 {timings[len(timings) // 2]:8.1f} us  "
+            f"p95 {timings[int(len(timings) * 0.95)]:8.1f} us"
+        )
+
+    def handle(self, *args, paths, **options):
+        full_stack = [
+            name for name in settings.MIDDLEWARE
+            if name != "core.middleware.StatelessRouteMiddleware"
+        ]
+        for path in paths:
+            status, timings = self.bench(path, options["requests"], options["host"])
+            self.report("configured", path, status, timings)
+            if options["compare_full_stack"]:
+                with override_settings(MIDDLEWARE=full_stack):
+                    status, timings = self.bench(path, options["requests"], options["host"])
+                self.report("full stack", path, status, timings)
@@ -0,0 +1,125 @@
+import os
+import random
+import resource
+import shutil
+import tempfile
+import time
+
+from django.core.files.storage import FileSystemStorage
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from core.storage import ContentAddressedStorage
+
+BOUNDARY = "BenchUploadBoundary"
+DEFAULT_HANDLERS = [
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+
+class MultipartStream:
+    """
+    A multipart/form-data body with one file of ``size`` bytes, generated
+    as it is read
+    """
+
+    def __init__(self, size, seed):
+        self.head = (
+            f"--{BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="upload.bin"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+        self.tail = f"\r\n--{BOUNDARY}--\r\n".encode()
+        self.block = random.Random(seed).randbytes(1024 * 1024)
+        self.length = len(self.head) + size + len(self.tail)
+        self.size = size
+        self.position = 0
+
+    def read(self, size=-1):
+        body_end = len(self.head) + self.size
+        if size < 0:
+            size = self.length - self.position
+        chunks = []
+        while size > 0 and self.position < self.length:
+            if self.position < len(self.head):
+                chunk = self.head[self.position:self.position + size]
+            elif self.position < body_end:
+                offset = (self.position - len(self.head)) % len(self.block)
+                chunk = self.block[offset:offset + min(size, body_end - self.position)]
+            else:
+                offset = self.position - body_end
+                chunk = self.tail[offset:offset + size]
+            chunks.append(chunk)
+            self.position += len(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+
+def disk_usage(path):
+    # Allocated blocks, so hard links to one inode count once
+    seen = set()
+    total = 0
+    for dirpath, __, filenames in os.walk(path):
+        for filename in filenames:
+            stat = os.stat(os.path.join(dirpath, filename))
+            if stat.st_ino not in seen:
+                seen.add(stat.st_ino)
+                total += stat.st_blocks * 512
+    return total
+
+
+class Command(BaseCommand):
+    help = "Upload the same large file twice through the multipart parser and storage"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=2048, help="Upload size in MB")
+        parser.add_argument(
+            "--compare-default",
+            action="store_true",
+            help="First run Django's default upload handlers and FileSystemStorage",
+        )
+
+    def upload(self, storage, size, seed):
+        stream = MultipartStream(size, seed)
+        request = WSGIRequest({
+            "REQUEST_METHOD": "POST",
+            "PATH_INFO": "/",
+            "CONTENT_TYPE": f"multipart/form-data; boundary={BOUNDARY}",
+            "CONTENT_LENGTH": str(stream.length),
+            "wsgi.input": stream,
+        })
+        started = time.perf_counter()
+        uploaded_file = request.FILES["file"]
+        storage.save(f"documents/{uploaded_file.name}", uploaded_file)
+        elapsed = time.perf_counter() - started
+        uploaded_file.close()
+        return elapsed
+
+    def bench(self, label, storage, size):
+        for attempt, seed in (("first", 1), ("duplicate", 1), ("different", 2)):
+            elapsed = self.upload(storage, size, seed)
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            self.stdout.write(
+                f"{label:<10} {attempt:<10} {size / elapsed / 1_000_000:8.1f} MB/s  "
+                f"peak RSS {max_rss:6.1f} MB  "
+                f"disk {disk_usage(storage.location) / 1_000_000:8.1f} MB"
+            )
+
+    def handle(self, *args, **options):
+        size = options["size"] * 1_000_000
+        # Temporary files next to the storage, as in production
+        media_root = tempfile.mkdtemp()
+        temp_dir = os.path.join(media_root, ".uploads")
+        os.makedirs(temp_dir)
+        try:
+            with override_settings(FILE_UPLOAD_TEMP_DIR=temp_dir):
+                if options["compare_default"]:
+                    with override_settings(FILE_UPLOAD_HANDLERS=DEFAULT_HANDLERS):
+                        storage = FileSystemStorage(os.path.join(media_root, "default"))
+                        self.bench("default", storage, size)
+                storage = ContentAddressedStorage(os.path.join(media_root, "configured"))
+                self.bench("configured", storage, size)
+        finally:
+            shutil.rmtree(media_root)
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import sitemaps
+
+
+class Command(BaseCommand):
+    help = "Write the sitemap index and shards of every site to SITEMAP_ROOT"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--shard",
+            type=int,
+            action="append",
+            dest="shards",
+            help="Only rewrite this shard (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        if options["shards"]:
+            changed = sitemaps.regenerate(options["shards"])
+            self.stdout.write(f"Rewrote {len(options['shards'])} shards, {len(changed)} sites changed.")
+        else:
+            shard_count = sitemaps.build_all()
+            self.stdout.write(f"Wrote {shard_count} shards to {settings.SITEMAP_ROOT}.")
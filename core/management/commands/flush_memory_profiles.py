@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.memory import flush
+
+
+class Command(BaseCommand):
+    help = "Sum spooled per-request memory profiles into hourly totals per endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--wait",
+            type=float,
+            default=30,
+            help="Seconds to wait for a flush already running in a worker",
+        )
+
+    def handle(self, *args, wait, **options):
+        flushed = flush(wait=wait)
+        if flushed is None:
+            self.stderr.write("Another flush is still running")
+            return
+        self.stdout.write(f"Flushed {flushed} request profiles")
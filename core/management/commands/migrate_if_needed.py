@@ -0,0 +1,38 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from core.startup import get_schema_stamp, migration_fingerprint, set_schema_stamp
+
+
+class Command(BaseCommand):
+    help = (
+        "Run migrate only when the migration files changed since the last "
+        "successful run against this database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--noinput", "--no-input", action="store_false", dest="interactive"
+        )
+        parser.add_argument(
+            "--force", action="store_true", help="Migrate even if the stamp matches"
+        )
+
+    def handle(self, *args, **options):
+        database = options["database"]
+        fingerprint = migration_fingerprint()
+
+        if not options["force"] and get_schema_stamp(database) == fingerprint:
+            self.stdout.write("Schema is current, skipping migrate.")
+            return
+
+        call_command(
+            "migrate",
+            database=database,
+            interactive=options["interactive"],
+            verbosity=options["verbosity"],
+        )
+        set_schema_stamp(fingerprint, database)
+        self.stdout.write(self.style.SUCCESS(f"Schema stamp updated ({fingerprint[:12]})."))
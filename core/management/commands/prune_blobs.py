@@ -0,0 +1,22 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from core.storage import ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = "Delete stored file contents no document, image or rendition uses any more"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help="Skip blobs linked in the last MIN_AGE seconds",
+        )
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            raise CommandError("The default storage is not a ContentAddressedStorage")
+        deleted, freed = default_storage.prune_blobs(options["min_age"])
+        self.stdout.write(f"Deleted {deleted} blobs, freed {freed / 1_000_000:.1f} MB.")
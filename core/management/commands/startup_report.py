@@ -0,0 +1,70 @@
+import json
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.startup import group_by_app, parse_importtime
+
+# Runs in a fresh interpreter so nothing is imported yet
+PROBE = """
+import json, os, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from hr_pulse.wsgi import application
+wsgi_done = time.perf_counter()
+from django.test import Client
+response = Client().get(sys.argv[1])
+request_done = time.perf_counter()
+print(json.dumps({
+    "setup": setup_done - started,
+    "wsgi": wsgi_done - setup_done,
+    "first_request": request_done - wsgi_done,
+    "status": response.status_code,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the project in a fresh interpreter and report import time per "
+        "installed app plus the time to the first served request"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/", help="URL for the first request")
+        parser.add_argument("--top", type=int, default=20)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE, options["path"]],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+        )
+        wall = time.perf_counter() - started
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        phases = json.loads(result.stdout.strip().splitlines()[-1])
+        groups = group_by_app(parse_importtime(result.stderr.splitlines()), settings.INSTALLED_APPS)
+        total_import = sum(groups.values())
+
+        self.stdout.write("Import time by app / package (self time):")
+        for name, self_us in sorted(groups.items(), key=lambda item: -item[1])[:options["top"]]:
+            self.stdout.write(f"  {name:<32} {self_us / 1000:8.1f} ms")
+        self.stdout.write(f"  {'total':<32} {total_import / 1000:8.1f} ms")
+
+        self.stdout.write("Phases:")
+        for label, seconds in [
+            ("django.setup()", phases["setup"]),
+            ("import hr_pulse.wsgi", phases["wsgi"]),
+            (f"first request ({phases['status']})", phases["first_request"]),
+            ("process wall time", wall),
+        ]:
+            self.stdout.write(f"  {label:<32} {seconds * 1000:8.1f} ms")
@@ -0,0 +1,264 @@
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import transaction
+from wagtail.models import Page
+
+from .singleflight import KeyLock
+from .spool import BackgroundFlusher, Spool
+
+spool = Spool("memory", "MEMORY_PROFILE_SPOOL_DIR", "memory")
+
+try:
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = 4096
+
+
+def get_rss():
+    """Resident set size of this process in bytes, or None if unknown"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+# -------------------------------
+# Per-request profiling
+# -------------------------------
+# Allocations are traced by tracemalloc for the whole process, so with
+# threaded workers a request's peak includes what concurrent requests
+# allocated at the same time. Run sync workers while profiling.
+IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def start_tracing():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(getattr(settings, "MEMORY_PROFILE_FRAMES", 1))
+
+
+def take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(IGNORED_TRACES)
+
+
+def diff_sites(before, after, limit):
+    """
+    The ``limit`` source lines that gained the most allocated memory
+    between two snapshots, as [["file:line", bytes, blocks]]
+    """
+    sites = []
+    for stat in after.compare_to(before, "lineno"):
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        sites.append([f"{frame.filename}:{frame.lineno}", stat.size_diff, stat.count_diff])
+        if len(sites) == limit:
+            break
+    return sites
+
+
+def get_endpoint(request, response):
+    """
+    What a request is reported under: its URL name, with the page type for
+    wagtail pages ("wagtail_serve:home.Homepage")
+    """
+    if response.get("X-Page-Cache") in ("hit", "stale"):
+        return "page cache"
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    endpoint = match.view_name or match._func_path
+    page = (getattr(response, "context_data", None) or {}).get("page")
+    if isinstance(page, Page):
+        endpoint = f"{endpoint}:{page._meta.label}"
+    return endpoint[:200]
+
+
+class RequestProfile:
+    """
+    Peak traced allocation and RSS growth of one request, plus a snapshot
+    diff of the allocation sites when ``snapshot`` is set
+    """
+
+    def __init__(self, snapshot=False):
+        self.rss = get_rss()
+        self.before = take_snapshot() if snapshot else None
+        tracemalloc.reset_peak()
+        self.traced = tracemalloc.get_traced_memory()[0]
+
+    def finish(self, endpoint):
+        __, peak = tracemalloc.get_traced_memory()
+        rss = get_rss()
+        sites = None
+        if self.before is not None:
+            sites = diff_sites(
+                self.before, take_snapshot(), getattr(settings, "MEMORY_PROFILE_TOP_SITES", 10)
+            )
+            self.before = None
+        record = [
+            time.time(),
+            endpoint,
+            max(0, peak - self.traced),
+            max(0, rss - self.rss) if rss is not None and self.rss is not None else 0,
+            rss or 0,
+            sites,
+        ]
+        spool.append(record)
+        return record
+
+
+class SnapshotSampler:
+    """
+    Picks the requests that get a snapshot diff: the first for each path
+    in this process, then one in every MEMORY_PROFILE_SNAPSHOT_EVERY.
+    Snapshots copy every live trace, so they are far too slow for all.
+    """
+    MAX_KEYS = 10_000
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def sample(self, key):
+        every = getattr(settings, "MEMORY_PROFILE_SNAPSHOT_EVERY", 100)
+        if not every:
+            return False
+        with self.lock:
+            if key not in self.counts and len(self.counts) >= self.MAX_KEYS:
+                self.counts.clear()
+            count = self.counts[key]
+            self.counts[key] = count + 1
+        return count % every == 0
+
+
+sampler = SnapshotSampler()
+
+
+# -------------------------------
+# Flushing
+# -------------------------------
+def summarize(records):
+    """{(endpoint, hour): totals} for spooled request records"""
+    totals = {}
+    for recorded_at, endpoint, peak, rss_growth, rss, sites in records:
+        hour = datetime.fromtimestamp(recorded_at, tz=timezone.utc).replace(minute=0, second=0, microsecond=0)
+        row = totals.setdefault((endpoint, hour), {
+            "requests": 0, "peak_total": 0, "peak_max": 0, "rss_growth": 0,
+            "rss_max": 0, "snapshots": 0, "top_sites": {},
+        })
+        row["requests"] += 1
+        row["peak_total"] += peak
+        row["peak_max"] = max(row["peak_max"], peak)
+        row["rss_growth"] += rss_growth
+        row["rss_max"] = max(row["rss_max"], rss)
+        if sites is not None:
+            row["snapshots"] += 1
+            merge_sites(row["top_sites"], sites)
+    return totals
+
+
+def merge_sites(top_sites, sites):
+    """Add [(location, bytes, blocks)] to {location: [bytes, blocks]}"""
+    for location, size, count in sites:
+        total = top_sites.setdefault(location, [0, 0])
+        total[0] += size
+        total[1] += count
+
+
+def trim_sites(top_sites):
+    limit = getattr(settings, "MEMORY_PROFILE_TOP_SITES", 10) * 2
+    largest = sorted(top_sites.items(), key=lambda item: -item[1][0])[:limit]
+    return dict(largest)
+
+
+def merge(totals):
+    """Add {(endpoint, hour): totals} to the existing EndpointMemory rows"""
+    from .models import EndpointMemory
+
+    if not totals:
+        return
+    existing = {
+        (row.endpoint, row.hour): row
+        for row in EndpointMemory.objects.filter(
+            endpoint__in={endpoint for endpoint, __ in totals},
+            hour__in={hour for __, hour in totals},
+        )
+    }
+    created = []
+    updated = []
+    for key, values in totals.items():
+        row = existing.get(key)
+        if row is None:
+            values["top_sites"] = trim_sites(values["top_sites"])
+            created.append(EndpointMemory(endpoint=key[0], hour=key[1], **values))
+            continue
+        row.requests += values["requests"]
+        row.peak_total += values["peak_total"]
+        row.peak_max = max(row.peak_max, values["peak_max"])
+        row.rss_growth += values["rss_growth"]
+        row.rss_max = max(row.rss_max, values["rss_max"])
+        row.snapshots += values["snapshots"]
+        merge_sites(row.top_sites, [(location, *value) for location, value in values["top_sites"].items()])
+        row.top_sites = trim_sites(row.top_sites)
+        updated.append(row)
+    EndpointMemory.objects.bulk_create(created)
+    EndpointMemory.objects.bulk_update(
+        updated,
+        ["requests", "peak_total", "peak_max", "rss_growth", "rss_max", "snapshots", "top_sites"],
+    )
+
+
+def flush_spool():
+    """Sum every spooled request into EndpointMemory. Return the count."""
+    total = 0
+    for path in spool.claim():
+        with transaction.atomic():
+            for records in Spool.batches(spool.read(path), 10_000):
+                merge(summarize(records))
+                total += len(records)
+        os.remove(path)
+    return total
+
+
+def flush(wait=0):
+    """
+    Flush the spool in one worker at a time. Return the number of requests
+    flushed, or None if another worker is busy.
+    """
+    lock = KeyLock("memory:flush")
+    if not lock.acquire(timeout=wait):
+        return None
+    try:
+        return flush_spool()
+    finally:
+        lock.release()
+
+
+flusher = BackgroundFlusher(
+    "memory-profile-flusher", flush, "MEMORY_PROFILE_FLUSH_INTERVAL", "MEMORY_PROFILE_AUTO_FLUSH"
+)
+
+
+# -------------------------------
+# Watchdog
+# -------------------------------
+def over_limit():
+    """
+    This process's RSS if it is above MEMORY_WATCHDOG_MAX_RSS, else None.
+    gunicorn.conf.py checks it after every request and retires the worker.
+    """
+    limit = getattr(settings, "MEMORY_WATCHDOG_MAX_RSS", None)
+    if not limit:
+        return None
+    rss = get_rss()
+    return rss if rss is not None and rss > limit else None
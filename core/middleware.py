@@ -0,0 +1,296 @@
+from urllib.parse import urlparse
+
+from django import http
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import Resolver404, resolve
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.encoding import uri_to_iri
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.models import Site
+
+from . import admission, memory, pagecache, preload, replicas
+from .redirects import redirect_table
+from .routing import build_stateless_chain, get_stateless_prefixes
+from .singleflight import KeyLock
+from .sites import site_resolver
+
+
+class MemoryProfileMiddleware:
+    """
+    Record the peak traced allocation and RSS growth of every request
+    under its endpoint (see core/memory.py), with a diff of allocation
+    sites for a sample. Only installed with MEMORY_PROFILING on, since
+    tracemalloc slows down every allocation.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "MEMORY_PROFILING", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        memory.start_tracing()
+
+    def __call__(self, request):
+        # The endpoint isn't known before the view runs, so the sampler
+        # counts by path
+        profile = memory.RequestProfile(snapshot=memory.sampler.sample(request.path_info))
+        response = self.get_response(request)
+        profile.finish(memory.get_endpoint(request, response))
+        memory.flusher.ensure_running()
+        return response
+
+
+class AdmissionControlMiddleware:
+    """
+    Shed load for the search and API endpoint classes before a worker is
+    tied up in the view: 429 when a client has used up its token bucket,
+    503 when the endpoint's global bucket or concurrency limit is exhausted.
+    Both carry Retry-After.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def reject(self, status, retry_after):
+        response = http.HttpResponse(
+            "Too many requests" if status == 429 else "Service busy",
+            status=status,
+            content_type="text/plain",
+        )
+        response["Retry-After"] = str(max(1, retry_after))
+        return response
+
+    def __call__(self, request):
+        endpoint = admission.classify(request.path_info)
+        if endpoint is None:
+            return self.get_response(request)
+
+        name, options = endpoint
+        client = admission.client_id(request)
+        allowed, retry_after = admission.bucket_table.take(
+            f"{name}:client:{client}", options["rate"], options["burst"]
+        )
+        if not allowed:
+            return self.reject(429, retry_after)
+
+        allowed, retry_after = admission.bucket_table.take(
+            f"{name}:global", options["global_rate"], options["global_burst"]
+        )
+        if not allowed:
+            return self.reject(503, retry_after)
+
+        slots = admission.ConcurrencySlots(name, options["concurrency"])
+        slot = slots.acquire()
+        if slot is None:
+            return self.reject(503, 1)
+        try:
+            return self.get_response(request)
+        finally:
+            slots.release(slot)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Send the reads of safe requests to a read replica. Unsafe requests, and
+    requests from a client that just wrote (the pin cookie), an admin path
+    or shortly after a publish use the primary.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with replicas.use_database(replicas.choose_database(request)):
+            response = self.get_response(request)
+
+        if request.method not in replicas.SAFE_METHODS and replicas.get_replicas():
+            response.set_cookie(
+                replicas.PIN_COOKIE,
+                "1",
+                max_age=replicas.get_pin_seconds(),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class StatelessRouteMiddleware:
+    """
+    Dispatch requests for views marked with core.routing.stateless through
+    the short STATELESS_MIDDLEWARE chain, bypassing the rest of MIDDLEWARE.
+    Everything else (admin, pages, forms) continues down the full stack.
+
+    Only paths starting with a stateless route's literal prefix, collected
+    from the URLconf at startup, are resolved here.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.stateless_chain = build_stateless_chain()
+        self.stateless_prefixes = tuple(sorted(get_stateless_prefixes()))
+
+    def __call__(self, request):
+        if not request.path_info.startswith(self.stateless_prefixes):
+            return self.get_response(request)
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return self.get_response(request)
+
+        if not getattr(match.func, "stateless", False):
+            return self.get_response(request)
+
+        request.resolver_match = match
+        return self.stateless_chain(request)
+
+
+class SiteResolverMiddleware:
+    """
+    Resolve the wagtail Site from the in-memory resolver and store it where
+    Site.find_for_request looks first, so page routing, the wagtail_site
+    template tag and the redirect middleware all reuse it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._wagtail_site = site_resolver.find_for_request(request)
+        return self.get_response(request)
+
+
+class PreloadMiddleware:
+    """
+    Announce the assets a page needs before the browser has parsed it. The
+    preloads registered while rendering (see core/preload.py) become a
+    ``Link: rel=preload`` header and are remembered per URL; the next
+    request for that URL gets them as 103 Early Hints before the view runs,
+    where the server can send those.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in ("GET", "HEAD"):
+            return self.get_response(request)
+
+        learned = preload.get_manifest(request)
+        if learned:
+            preload.send_early_hints(request, learned)
+
+        response = self.get_response(request)
+        links = preload.get_links(request)
+        if not links:
+            return response
+
+        response["Link"] = ", ".join(filter(None, [response.get("Link"), *links]))
+        if (
+            response.status_code == 200
+            and response.get("Content-Type", "").startswith("text/html")
+            and links != learned
+        ):
+            preload.set_manifest(request, links)
+        return response
+
+
+class CompiledRedirectMiddleware(MiddlewareMixin):
+    """
+    Drop-in replacement for wagtail's RedirectMiddleware that answers 404s
+    from the in-memory redirect table instead of querying the database.
+    """
+
+    def find_redirect(self, site_id, path):
+        if "\0" in path:
+            return None
+        return redirect_table.find(site_id, path) or redirect_table.find(
+            site_id, uri_to_iri(path)
+        )
+
+    def process_response(self, request, response):
+        # No need to check for a redirect for non-404 responses.
+        if response.status_code != 404:
+            return response
+
+        redirect_table.ensure_current()
+        site = Site.find_for_request(request)
+        site_id = site.pk if site else None
+
+        path = Redirect.normalise_path(request.get_full_path())
+        redirect = self.find_redirect(site_id, path)
+        if redirect is None:
+            path_without_query = urlparse(path).path
+            if path == path_without_query:
+                return response
+            redirect = self.find_redirect(site_id, path_without_query)
+            if redirect is None:
+                return response
+
+        link, is_permanent = redirect
+        if is_permanent:
+            return http.HttpResponsePermanentRedirect(link)
+        return http.HttpResponseRedirect(link)
+
+
+class PageCacheMiddleware:
+    """
+    Full-page cache for anonymous visitors. Pages are stored with
+    placeholders where {% hole %} blocks were (userbar, CSRF token, theme
+    classes) and those are filled in per request, so a hit never runs the
+    view or renders a template.
+
+    Regeneration is single-flight: when an entry is missing or expired only
+    one request renders it, while the others get the stale page or wait
+    briefly for the fresh one.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def serve(self, request, entry, status):
+        content, headers, charset = entry
+        response = http.HttpResponse(pagecache.fill_holes(content, request), charset=charset)
+        for name, value in headers.items():
+            response[name] = value
+        response["X-Page-Cache"] = status
+        return response
+
+    def __call__(self, request):
+        if not pagecache.is_cacheable_request(request):
+            return self.get_response(request)
+
+        key = pagecache.cache_key(request)
+        cached = pagecache.load(key)
+        if cached is not None and cached[1]:
+            return self.serve(request, cached[0], "hit")
+
+        lock = KeyLock(key)
+        if not lock.acquire(timeout=0):
+            if cached is not None:
+                return self.serve(request, cached[0], "stale")
+            if not lock.acquire(timeout=getattr(settings, "PAGE_CACHE_LOCK_WAIT", 2.0)):
+                # Still rendering elsewhere; render this one without storing
+                return self.render(request, key=None)
+            cached = pagecache.load(key)
+            if cached is not None:
+                lock.release()
+                return self.serve(request, cached[0], "hit")
+
+        try:
+            return self.render(request, key)
+        finally:
+            lock.release()
+
+    def render(self, request, key):
+        request.page_cache_capture = True
+        response = self.get_response(request)
+        if response.streaming:
+            return response
+
+        if key is not None and pagecache.is_cacheable_response(request, response):
+            pagecache.store(key, response)
+            response["X-Page-Cache"] = "miss"
+        if b"<!--hole:" in response.content:
+            content = response.content.decode(response.charset)
+            response.content = pagecache.fill_holes(content, request)
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EndpointMemory",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("endpoint", models.CharField(max_length=200)),
+                ("hour", models.DateTimeField()),
+                ("requests", models.PositiveIntegerField(default=0)),
+                ("peak_total", models.BigIntegerField(default=0)),
+                ("peak_max", models.BigIntegerField(default=0)),
+                ("rss_growth", models.BigIntegerField(default=0)),
+                ("rss_max", models.BigIntegerField(default=0)),
+                ("snapshots", models.PositiveIntegerField(default=0)),
+                ("top_sites", models.JSONField(default=dict)),
+            ],
+            options={
+                "verbose_name_plural": "endpoint memory",
+                "indexes": [models.Index(fields=["hour", "endpoint"], name="core_hour_endpoint")],
+                "constraints": [models.UniqueConstraint(fields=("endpoint", "hour"), name="core_endpoint_hour")],
+            },
+        ),
+    ]
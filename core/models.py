@@ -0,0 +1,42 @@
+from django.db import models
+
+
+class SchemaStamp(models.Model):
+    """
+    Fingerprint of the migration files the database was last migrated with
+    """
+    SINGLETON_ID = 1
+
+    fingerprint = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.fingerprint
+
+
+class EndpointMemory(models.Model):
+    """
+    Memory used by the requests of one endpoint (URL name, or page type for
+    wagtail pages) within an hour, summed from core.memory's spool
+    """
+    endpoint = models.CharField(max_length=200)
+    hour = models.DateTimeField()
+    requests = models.PositiveIntegerField(default=0)
+    peak_total = models.BigIntegerField(default=0)
+    peak_max = models.BigIntegerField(default=0)
+    rss_growth = models.BigIntegerField(default=0)
+    rss_max = models.BigIntegerField(default=0)
+    snapshots = models.PositiveIntegerField(default=0)
+    # {"file:line": [bytes, blocks]} still allocated after the sampled
+    # requests, summed over the hour's snapshots
+    top_sites = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["endpoint", "hour"], name="core_endpoint_hour"),
+        ]
+        indexes = [models.Index(fields=["hour", "endpoint"], name="core_hour_endpoint")]
+        verbose_name_plural = "endpoint memory"
+
+    def __str__(self):
+        return f"{self.endpoint} at {self.hour}: {self.requests} requests"
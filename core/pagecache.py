@@ -0,0 +1,129 @@
+import hashlib
+import re
+
+from django.conf import settings
+from django.middleware.csrf import get_token
+from django.utils.html import format_html
+
+from . import replicas
+from .singleflight import get_entry, set_entry
+from .versioning import VersionStamp
+
+# Placeholders left in a captured page where a per-visitor fragment goes
+HOLE_PATTERN = re.compile(r"<!--hole:([\w-]+)-->")
+
+DEFAULT_EXCLUDED_PATHS = ["/admin/", "/django-admin/", "/documents/", "/search/"]
+
+page_cache_stamp = VersionStamp("pagecache")
+
+
+# -------------------------------
+# Hole fillers
+# -------------------------------
+def fill_csrf_token(request):
+    return format_html(
+        '<input type="hidden" name="csrfmiddlewaretoken" value="{}">', get_token(request)
+    )
+
+
+def fill_userbar(request):
+    # Cached pages are only served to anonymous visitors, who have no userbar
+    return ""
+
+
+def fill_theme_classes(request):
+    from theme_plugin.templatetags.theme_tags import theme_classes
+
+    return theme_classes()
+
+
+HOLE_FILLERS = {
+    "csrf_token": fill_csrf_token,
+    "userbar": fill_userbar,
+    "theme_classes": fill_theme_classes,
+}
+
+
+def register_hole(name, filler):
+    """
+    Register ``filler(request) -> str`` for ``{% hole name %}`` blocks
+    """
+    HOLE_FILLERS[name] = filler
+
+
+def fill_holes(content, request):
+    """
+    Fill each registered hole. Unknown placeholders (rich text containing
+    the marker, or an entry cached before a hole was renamed) are left as
+    they are.
+    """
+    def fill(match):
+        filler = HOLE_FILLERS.get(match.group(1))
+        return match.group(0) if filler is None else filler(request)
+
+    return HOLE_PATTERN.sub(fill, content)
+
+
+# -------------------------------
+# Cache entries
+# -------------------------------
+def invalidate():
+    """
+    Drop every cached page (published content changed)
+    """
+    page_cache_stamp.bump()
+    # Re-render from the primary until the replicas have the change
+    replicas.pin_primary()
+
+
+def cache_key(request):
+    site = getattr(request, "_wagtail_site", None)
+    raw = f"{site.pk if site else ''}|{request.get_host()}|{request.get_full_path()}"
+    digest = hashlib.sha256(raw.encode()).hexdigest()
+    return f"pagecache:{page_cache_stamp.get()}:{digest}"
+
+
+def is_cacheable_request(request):
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if getattr(request, "is_preview", False):
+        return False
+    excluded = getattr(settings, "PAGE_CACHE_EXCLUDED_PATHS", DEFAULT_EXCLUDED_PATHS)
+    if any(request.path.startswith(prefix) for prefix in excluded):
+        return False
+    return not request.user.is_authenticated
+
+
+def is_cacheable_response(request, response):
+    if response.status_code != 200 or response.streaming:
+        return False
+    if not response.get("Content-Type", "").startswith("text/html"):
+        return False
+    if response.cookies or "private" in response.get("Cache-Control", ""):
+        return False
+    session = getattr(request, "session", None)
+    if session is not None and session.modified:
+        return False
+    # A CSRF token rendered outside a {% hole %} would be baked into the page
+    return not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+
+
+def store(key, response):
+    headers = {
+        name: value
+        for name, value in response.items()
+        if name.lower() not in ("set-cookie", "content-length", "vary")
+    }
+    set_entry(
+        key,
+        (response.content.decode(response.charset), headers, response.charset),
+        getattr(settings, "PAGE_CACHE_TIMEOUT", 300),
+        getattr(settings, "PAGE_CACHE_STALE_TIMEOUT", 60),
+    )
+
+
+def load(key):
+    """
+    Return (entry, is_fresh) or None
+    """
+    return get_entry(key)
@@ -0,0 +1,66 @@
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+
+# ASGI extension for 103 Early Hints, advertised by servers such as Hypercorn
+EARLY_HINT_EXTENSION = "http.response.early_hint"
+# Where core.asgi.ASGIHandler leaves the server's send callable in the scope
+EARLY_HINT_SCOPE_KEY = "hr_pulse.early_hint"
+
+
+def add(request, url, as_, **attrs):
+    """
+    Register ``url`` as a preload of type ``as_`` ("style", "script",
+    "image", "font"...). Extra attributes become link parameters, e.g.
+    fetchpriority="high". Registering a URL twice keeps the first.
+    """
+    if request is None or not url:
+        return
+    links = request.__dict__.setdefault("preload_links", {})
+    if url not in links and len(links) < settings.PRELOAD_MAX_LINKS:
+        links[url] = format_link(url, as_, attrs)
+
+
+def get_links(request):
+    return list(getattr(request, "preload_links", {}).values())
+
+
+def format_link(url, as_, attrs):
+    params = [f"<{url}>", "rel=preload", f"as={as_}"]
+    if as_ == "font":
+        # Fonts are always fetched in CORS mode; a preload must match it
+        attrs.setdefault("crossorigin", True)
+    for name, value in attrs.items():
+        params.append(name if value is True else f'{name}="{value}"')
+    return "; ".join(params)
+
+
+def manifest_key(request):
+    # The static manifest's hash changes with every collectstatic that
+    # changed a file, so hints never point at the previous deploy's files
+    static_version = getattr(staticfiles_storage, "manifest_hash", "")
+    return f"preload:{static_version}:{request.get_host()}{request.path}"
+
+
+def get_manifest(request):
+    return cache.get(manifest_key(request))
+
+
+def set_manifest(request, links):
+    cache.set(manifest_key(request), links, settings.PRELOAD_MANIFEST_TIMEOUT)
+
+
+def send_early_hints(request, links):
+    """
+    Send a 103 Early Hints response carrying ``links``, if the server
+    supports it. Returns whether it was sent.
+    """
+    send = getattr(request, "scope", {}).get(EARLY_HINT_SCOPE_KEY)
+    if send is None or not links:
+        return False
+    async_to_sync(send)({
+        "type": EARLY_HINT_EXTENSION,
+        "links": [link.encode("latin-1") for link in links],
+    })
+    return True
@@ -0,0 +1,150 @@
+import re
+import threading
+
+from django.conf import settings
+from wagtail.contrib.redirects.models import Redirect
+
+from .replicas import use_primary
+from .versioning import VersionStamp
+
+
+def compile_patterns(patterns):
+    """
+    Compile ``REDIRECT_PATTERNS`` entries of the form
+    (regex, replacement[, is_permanent]). Plain prefixes can be written as
+    regexes, e.g. (r"^/old-blog/(?P<rest>.*)$", r"/blog/\g<rest>").
+    """
+    compiled = []
+    for entry in patterns:
+        regex, replacement = entry[0], entry[1]
+        is_permanent = entry[2] if len(entry) > 2 else True
+        compiled.append((re.compile(regex), replacement, is_permanent))
+    return compiled
+
+
+class RedirectTable:
+    """
+    In-memory copy of every wagtailredirects.Redirect row, keyed by site and
+    normalised old path, so a 404 can be checked without touching the
+    database.
+
+    Changes are published through a VersionStamp: the worker that saves or
+    deletes a redirect records the change, and the other workers replay it
+    the next time they handle a 404. If they fell too far behind they
+    reload the whole table instead.
+    """
+
+    def __init__(self):
+        self.stamp = VersionStamp("redirects")
+        self.version = None
+        # site_id (None = all sites) -> {old_path: (link, is_permanent)}
+        self.exact = {}
+        # redirect id -> (site_id, old_path), used to apply updates
+        self.keys = {}
+        self.patterns = compile_patterns(getattr(settings, "REDIRECT_PATTERNS", []))
+        self.lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.version is not None
+
+    # -------------------------------
+    # Building
+    # -------------------------------
+    @staticmethod
+    def describe(redirect):
+        """
+        The payload describing one saved redirect
+        """
+        return (
+            "save",
+            redirect.pk,
+            redirect.site_id,
+            redirect.old_path,
+            redirect.link,
+            redirect.is_permanent,
+        )
+
+    def load(self):
+        # Read the stamp first so changes made while loading are replayed
+        version = self.stamp.get(force=True)
+        exact = {}
+        keys = {}
+        # The table is kept until the stamp moves, so never load a lagging replica
+        with use_primary():
+            for redirect in Redirect.objects.select_related("redirect_page").iterator():
+                link = redirect.link
+                if link is None:
+                    continue
+                exact.setdefault(redirect.site_id, {})[redirect.old_path] = (
+                    link,
+                    redirect.is_permanent,
+                )
+                keys[redirect.pk] = (redirect.site_id, redirect.old_path)
+        with self.lock:
+            self.exact, self.keys, self.version = exact, keys, version
+
+    def apply(self, payload):
+        action = payload[0]
+        if action == "reload":
+            return False
+
+        with self.lock:
+            previous = self.keys.pop(payload[1], None)
+            if previous is not None:
+                site_id, old_path = previous
+                self.exact.get(site_id, {}).pop(old_path, None)
+            if action == "save":
+                __, pk, site_id, old_path, link, is_permanent = payload
+                if link is not None:
+                    self.exact.setdefault(site_id, {})[old_path] = (link, is_permanent)
+                    self.keys[pk] = (site_id, old_path)
+        return True
+
+    def ensure_current(self):
+        version = self.stamp.get()
+        if not self.loaded:
+            self.load()
+            return
+        if version == self.version:
+            return
+
+        payloads = None
+        if version > self.version:
+            payloads = self.stamp.get_payloads(self.version, version)
+        if payloads is not None and all(self.apply(payload) for payload in payloads):
+            self.version = version
+        else:
+            self.load()
+
+    def publish(self, payload):
+        """
+        Record a change for the other workers and apply it locally
+        """
+        version = self.stamp.bump()
+        self.stamp.set_payload(version, payload)
+        if self.loaded and version == self.version + 1 and self.apply(payload):
+            self.version = version
+
+    # -------------------------------
+    # Lookup
+    # -------------------------------
+    def find(self, site_id, path):
+        """
+        Return (link, is_permanent) for a normalised path, or None
+        """
+        # Prefer the site-specific redirect over the site-ambivalent one
+        for key in (site_id, None):
+            match = self.exact.get(key)
+            if match and path in match:
+                return match[path]
+
+        bare_path = path.split("?", 1)[0]
+        for regex, replacement, is_permanent in self.patterns:
+            match = regex.match(bare_path)
+            if match:
+                return match.expand(replacement), is_permanent
+        return None
+
+
+redirect_table = RedirectTable()
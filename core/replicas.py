@@ -0,0 +1,103 @@
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Set on responses to unsafe requests so the same client reads its own
+# writes from the primary until the replicas have caught up
+PIN_COOKIE = "db_primary"
+PRIMARY_UNTIL_KEY = "replicas:primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# The database alias reads go to in the current context. None, the default,
+# means the primary: only ReplicaRoutingMiddleware opts in to replicas, so
+# management commands and signal handlers always read their own writes.
+_read_alias = contextvars.ContextVar("read_alias", default=None)
+
+
+def get_replicas():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def get_pin_seconds():
+    return getattr(settings, "REPLICA_PIN_SECONDS", 10)
+
+
+@contextmanager
+def use_database(alias):
+    """
+    Send reads in this block to ``alias`` (None for the primary)
+    """
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def use_primary():
+    return use_database(None)
+
+
+def pin_primary():
+    """
+    Send every request to the primary for a while, e.g. after a publish so
+    pages re-rendered into the page cache don't come from a lagging replica
+    """
+    if get_replicas():
+        seconds = get_pin_seconds()
+        cache.set(PRIMARY_UNTIL_KEY, time.time() + seconds, seconds)
+
+
+def primary_pinned():
+    until = cache.get(PRIMARY_UNTIL_KEY)
+    return until is not None and until > time.time()
+
+
+def choose_database(request):
+    """
+    The alias reads for this request go to, or None for the primary
+    """
+    replicas = get_replicas()
+    if not replicas or request.method not in SAFE_METHODS:
+        return None
+    if PIN_COOKIE in request.COOKIES:
+        return None
+    primary_paths = getattr(settings, "REPLICA_PRIMARY_PATHS", ["/admin/", "/django-admin/"])
+    if any(request.path_info.startswith(prefix) for prefix in primary_paths):
+        return None
+    if primary_pinned():
+        return None
+    return random.choice(replicas)
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica chosen for the current request and all writes
+    to the primary. Reads inside a transaction on the primary stay there.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in get_replicas():
+            return False
+        return None
@@ -0,0 +1,119 @@
+import datetime
+from datetime import timedelta
+
+import django_filters
+from django.db.models import Max, Sum
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
+from django.utils.functional import cached_property
+from wagtail.admin.filters import WagtailFilterSet
+from wagtail.admin.ui.tables import Column
+from wagtail.admin.views.reports import ReportView
+
+from .memory import merge_sites
+from .models import EndpointMemory
+
+PERIODS = {"1": "Last hour", "24": "Last 24 hours", "168": "Last 7 days"}
+
+
+class MemoryReportFilterSet(WagtailFilterSet):
+    # Picks the period the requests are summed over, see get_queryset
+    hours = django_filters.ChoiceFilter(
+        label="Period", choices=list(PERIODS.items()), method="filter_period"
+    )
+
+    class Meta:
+        model = EndpointMemory
+        fields = []
+
+    def filter_period(self, queryset, name, value):
+        return queryset
+
+
+def size_column(name, label):
+    return Column(
+        name, label=label, sort_key=name, accessor=lambda row: filesizeformat(row[name] or 0)
+    )
+
+
+class MemoryReportView(ReportView):
+    """
+    Peak allocation and RSS growth per endpoint, with the source lines
+    that kept the most memory in sampled requests
+    """
+    page_title = "Memory"
+    header_icon = "warning"
+    index_url_name = "memory_report"
+    index_results_url_name = "memory_report_results"
+    default_ordering = "-peak_avg"
+    filterset_class = MemoryReportFilterSet
+    list_export = ["endpoint", "requests", "peak_avg", "peak_max", "rss_growth", "rss_max", "top_sites"]
+    export_headings = {
+        "endpoint": "Endpoint",
+        "requests": "Requests",
+        "peak_avg": "Average peak allocation",
+        "peak_max": "Largest peak allocation",
+        "rss_growth": "RSS growth",
+        "rss_max": "Largest RSS",
+        "top_sites": "Top allocation sites",
+    }
+
+    @property
+    def hours(self):
+        hours = self.request.GET.get("hours", "24")
+        return int(hours) if hours in PERIODS else 24
+
+    @cached_property
+    def top_sites(self):
+        """{endpoint: "file:line (+size)" lines} over the period"""
+        merged = {}
+        for endpoint, top_sites in self.get_rows().values_list("endpoint", "top_sites"):
+            merge_sites(
+                merged.setdefault(endpoint, {}),
+                [(location, *value) for location, value in top_sites.items()],
+            )
+        return {
+            endpoint: "\n".join(
+                f"{location} (+{filesizeformat(size)})"
+                for location, (size, __) in sorted(sites.items(), key=lambda item: -item[1][0])[:3]
+            )
+            for endpoint, sites in merged.items()
+        }
+
+    @cached_property
+    def columns(self):
+        return [
+            Column("endpoint", label="Endpoint", sort_key="endpoint"),
+            Column("requests", label="Requests", sort_key="requests"),
+            size_column("peak_avg", "Average peak allocation"),
+            size_column("peak_max", "Largest peak allocation"),
+            size_column("rss_growth", "RSS growth"),
+            size_column("rss_max", "Largest RSS"),
+            Column(
+                "top_sites",
+                label="Top allocation sites",
+                accessor=lambda row: self.top_sites.get(row["endpoint"], ""),
+            ),
+        ]
+
+    def to_row_dict(self, item):
+        return {
+            field: self.top_sites.get(item["endpoint"], "") if field == "top_sites" else item[field]
+            for field in self.list_export
+        }
+
+    def get_filename(self):
+        return "memory-report-{}".format(datetime.date.today().strftime("%Y-%m-%d"))
+
+    def get_rows(self):
+        return EndpointMemory.objects.filter(hour__gte=timezone.now() - timedelta(hours=self.hours))
+
+    def get_queryset(self):
+        # peak_avg first: the requests annotation hides the field after it
+        return self.get_rows().values("endpoint").annotate(
+            peak_avg=Sum("peak_total") / Sum("requests"),
+            requests=Sum("requests"),
+            peak_max=Max("peak_max"),
+            rss_growth=Sum("rss_growth"),
+            rss_max=Max("rss_max"),
+        ).order_by("endpoint")
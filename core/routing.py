@@ -0,0 +1,92 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.handlers.exception import convert_exception_to_response
+from django.urls import URLResolver, get_resolver
+from django.urls.resolvers import RegexPattern, RoutePattern
+from django.utils.module_loading import import_string
+
+REGEX_SPECIAL = set(".^$*+?{}[]\\|()")
+
+
+def stateless(view):
+    """
+    Mark a view as stateless: no session, user, CSRF, messages or redirect
+    handling. Requests that resolve to it skip the rest of MIDDLEWARE and
+    run through STATELESS_MIDDLEWARE instead, e.g.
+
+        path('stats/', stateless(StatsAPIView.as_view()), name='api_stats')
+    """
+    view.stateless = True
+    return view
+
+
+def get_literal_prefix(pattern):
+    """
+    The text every path matched by ``pattern`` starts with, and whether
+    that is the whole pattern
+    """
+    if isinstance(pattern, RoutePattern):
+        route = str(pattern)
+        prefix = route.split("<", 1)[0]
+        return prefix, prefix == route
+    if isinstance(pattern, RegexPattern) and str(pattern).startswith("^"):
+        regex = str(pattern)[1:]
+        prefix = []
+        for char in regex:
+            if char in REGEX_SPECIAL:
+                if char in "*?{":
+                    # The character before is optional
+                    prefix = prefix[:-1]
+                break
+            prefix.append(char)
+        return "".join(prefix), len(prefix) == len(regex)
+    return "", False
+
+
+def get_stateless_prefixes(resolver=None, prefix=""):
+    """
+    The literal path prefixes of the stateless routes in the URLconf. A
+    path that starts with none of them can't resolve to a stateless view.
+    """
+    if resolver is None:
+        resolver = get_resolver()
+        prefix = get_literal_prefix(resolver.pattern)[0]
+    prefixes = set()
+    for entry in resolver.url_patterns:
+        literal, complete = get_literal_prefix(entry.pattern)
+        if isinstance(entry, URLResolver):
+            if complete:
+                prefixes |= get_stateless_prefixes(entry, prefix + literal)
+            elif get_stateless_prefixes(entry):
+                prefixes.add(prefix + literal)
+        elif getattr(entry.callback, "stateless", False):
+            prefixes.add(prefix + literal)
+    return prefixes
+
+
+def call_view(request):
+    match = request.resolver_match
+    callback = match.func
+    if iscoroutinefunction(callback):
+        callback = async_to_sync(callback)
+
+    response = callback(request, *match.args, **match.kwargs)
+    if response is None:
+        raise ValueError(f"The view {match.view_name} didn't return an HttpResponse object.")
+    if hasattr(response, "render") and callable(response.render):
+        response = response.render()
+    return response
+
+
+def build_stateless_chain():
+    """
+    Build the handler for stateless routes: STATELESS_MIDDLEWARE wrapped
+    around a direct view call. Like MIDDLEWARE, the first entry is the
+    outermost. Only __call__ / process_request / process_response hooks of
+    those middleware run on this path.
+    """
+    handler = convert_exception_to_response(call_view)
+    for middleware_path in reversed(getattr(settings, "STATELESS_MIDDLEWARE", [])):
+        middleware = import_string(middleware_path)
+        handler = convert_exception_to_response(middleware(handler))
+    return handler
@@ -0,0 +1,29 @@
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+
+
+def worker_exists():
+    """Whether collectstatic wrote a service worker (production storage only)"""
+    name = getattr(staticfiles_storage, "worker_name", None)
+    return bool(name) and staticfiles_storage.exists(name)
+
+
+def get_worker_url():
+    return reverse("service_worker") if worker_exists() else ""
+
+
+@require_GET
+def serve(request):
+    """
+    The service worker written by ServiceWorkerStaticFilesStorage, served
+    from the site root so its scope covers every page and /api/. Browsers
+    check it for updates on each navigation; ETags make that a 304.
+    """
+    if not worker_exists():
+        raise Http404("No service worker; run collectstatic with ServiceWorkerStaticFilesStorage")
+    with staticfiles_storage.open(staticfiles_storage.worker_name) as f:
+        response = HttpResponse(f.read(), content_type="text/javascript")
+    response["Cache-Control"] = "no-cache"
+    return response
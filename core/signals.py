@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.models import Page, PageViewRestriction, Site
+from wagtail.signals import (
+    page_published,
+    page_slug_changed,
+    page_unpublished,
+    post_page_move,
+)
+
+from . import pagecache, sitemaps
+from .redirects import redirect_table
+from .sites import site_resolver
+
+
+# Changes are published (and Sites reloaded) once their transaction commits: other workers
+# could otherwise reload the old rows under the new version, or keep a
+# change that was rolled back.
+def publish_redirect_change(payload):
+    transaction.on_commit(lambda: redirect_table.publish(payload))
+
+
+def redirect_saved(sender, instance, **kwargs):
+    publish_redirect_change(redirect_table.describe(instance))
+
+
+def redirect_deleted(sender, instance, **kwargs):
+    publish_redirect_change(("delete", instance.pk))
+
+
+def page_urls_changed(sender, **kwargs):
+    # Redirects to pages store the page URL, which just changed
+    publish_redirect_change(("reload",))
+
+
+def sites_changed(sender, **kwargs):
+    transaction.on_commit(site_resolver.invalidate)
+    page_urls_changed(sender, **kwargs)
+
+
+def page_tree_changed(sender, **kwargs):
+    # Cached site root pages carry their tree position and URL path
+    transaction.on_commit(site_resolver.invalidate)
+    page_urls_changed(sender, **kwargs)
+
+
+def root_page_published(sender, instance, **kwargs):
+    if instance.pk in site_resolver.root_pages:
+        transaction.on_commit(site_resolver.invalidate)
+
+
+def published_content_changed(sender, **kwargs):
+    # Bumped now, a request could cache the old content under the new stamp
+    transaction.on_commit(pagecache.invalidate)
+
+
+def page_deleted(sender, instance, **kwargs):
+    transaction.on_commit(pagecache.invalidate)
+    sitemaps.mark_changed([instance.pk])
+
+
+def page_sitemap_changed(sender, instance, **kwargs):
+    sitemaps.mark_changed([instance.pk])
+
+
+def subtree_sitemap_changed(sender, instance, **kwargs):
+    # The URLs (or visibility) of every page below changed too
+    page = instance.page if isinstance(instance, PageViewRestriction) else instance
+    sitemaps.mark_changed(
+        Page.objects.descendant_of(page, inclusive=True).values_list("pk", flat=True).iterator()
+    )
+
+
+def sites_sitemap_changed(sender, **kwargs):
+    sitemaps.mark_changed()
+
+
+def register_signal_handlers():
+    post_save.connect(redirect_saved, sender=Redirect)
+    post_delete.connect(redirect_deleted, sender=Redirect)
+    page_slug_changed.connect(page_tree_changed)
+    post_page_move.connect(page_tree_changed)
+    page_published.connect(root_page_published)
+    page_published.connect(published_content_changed)
+    page_unpublished.connect(published_content_changed)
+    post_page_move.connect(published_content_changed)
+    # Deleting a specific page also deletes (and signals) its Page row
+    post_delete.connect(page_deleted, sender=Page)
+    post_save.connect(published_content_changed, sender=Site)
+    post_save.connect(sites_changed, sender=Site)
+    post_delete.connect(sites_changed, sender=Site)
+    page_published.connect(page_sitemap_changed)
+    page_unpublished.connect(page_sitemap_changed)
+    page_slug_changed.connect(subtree_sitemap_changed)
+    post_page_move.connect(subtree_sitemap_changed)
+    post_save.connect(subtree_sitemap_changed, sender=PageViewRestriction)
+    post_delete.connect(subtree_sitemap_changed, sender=PageViewRestriction)
+    post_save.connect(sites_sitemap_changed, sender=Site)
+    post_delete.connect(sites_sitemap_changed, sender=Site)
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# Keys are striped over a fixed number of lock files so the lock directory
+# stays bounded; two keys sharing a stripe only ever wait on each other.
+LOCK_STRIPES = 1024
+POLL_INTERVAL = 0.01
+
+_thread_locks = [threading.Lock() for __ in range(LOCK_STRIPES)]
+
+
+def _stripe(key):
+    return int(hashlib.sha1(key.encode()).hexdigest()[:8], 16) % LOCK_STRIPES
+
+
+class KeyLock:
+    """
+    Exclusive lock for one key, held across threads (threading.Lock) and
+    across worker processes on the host (flock on a lock file).
+    """
+
+    def __init__(self, key, lock_dir=None):
+        self.stripe = _stripe(key)
+        self.lock_dir = lock_dir or getattr(
+            settings, "SINGLE_FLIGHT_LOCK_DIR", os.path.join(settings.BASE_DIR, "cache", "locks")
+        )
+        self.fd = None
+
+    def acquire(self, timeout=0):
+        deadline = time.monotonic() + timeout
+        thread_lock = _thread_locks[self.stripe]
+        if not thread_lock.acquire(blocking=timeout > 0, timeout=timeout if timeout > 0 else -1):
+            return False
+        if fcntl is None:
+            return True
+
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self.fd = os.open(os.path.join(self.lock_dir, f"{self.stripe}.lock"), os.O_CREAT | os.O_RDWR)
+        while True:
+            try:
+                fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    os.close(self.fd)
+                    self.fd = None
+                    thread_lock.release()
+                    return False
+                time.sleep(POLL_INTERVAL)
+
+    def release(self):
+        if self.fd is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
+        _thread_locks[self.stripe].release()
+
+
+# -------------------------------
+# Cached values with stale-while-revalidate
+# -------------------------------
+def get_entry(key):
+    """
+    Return (value, is_fresh) for a cached entry, or None
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    value, fresh_until = entry
+    return value, time.time() < fresh_until
+
+
+def set_entry(key, value, ttl, stale_ttl):
+    cache.set(key, (value, time.time() + ttl), ttl + stale_ttl)
+
+
+def get_or_compute(key, compute, ttl, stale_ttl=60, wait=5.0):
+    """
+    Return the cached value for ``key``, calling ``compute()`` at most once
+    at a time per key across threads and worker processes.
+
+    When the value has expired, the first caller regenerates it while the
+    others get the stale value (if still within ``stale_ttl``) or wait up to
+    ``wait`` seconds for the fresh one. A caller that waited in vain
+    computes the value itself rather than fail.
+    """
+    entry = get_entry(key)
+    if entry is not None and entry[1]:
+        return entry[0]
+
+    lock = KeyLock(key)
+    if not lock.acquire(timeout=0):
+        if entry is not None:
+            return entry[0]
+        if not lock.acquire(timeout=wait):
+            value = compute()
+            set_entry(key, value, ttl, stale_ttl)
+            return value
+
+    try:
+        # Someone may have finished regenerating while we took the lock
+        entry = get_entry(key)
+        if entry is not None and entry[1]:
+            return entry[0]
+        value = compute()
+        set_entry(key, value, ttl, stale_ttl)
+        return value
+    finally:
+        lock.release()
@@ -0,0 +1,304 @@
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.http import Http404, HttpResponse
+from wagtail.models import Page, Site
+
+from .documents import sendfile
+from .singleflight import KeyLock
+from .sites import site_resolver
+
+INDEX_NAME = "sitemap.xml"
+SHARD_NAME = "sitemap-{}.xml"
+SHARD_RE = re.compile(r"^sitemap-(\d+)\.xml$")
+
+URLSET_OPEN = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_CLOSE = "</urlset>\n"
+INDEX_OPEN = '<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+INDEX_CLOSE = "</sitemapindex>\n"
+CONTENT_TYPE = "application/xml"
+
+# While a site has no index, crawlers are asked to come back later
+BUILD_RETRY_AFTER = 60
+BUILD_REQUESTED_KEY = "sitemap:build-requested"
+
+
+# -------------------------------
+# Shards
+# -------------------------------
+# A page always lives in shard ``pk // SITEMAP_SHARD_SIZE``, so a shard
+# never holds more than SITEMAP_SHARD_SIZE URLs (the protocol's limit is
+# 50,000) and publishing a page only touches the shard its pk falls in.
+def get_shard(page_id):
+    return page_id // settings.SITEMAP_SHARD_SIZE
+
+
+def get_site_dir(site_id):
+    return os.path.join(settings.SITEMAP_ROOT, str(site_id))
+
+
+def get_site_roots():
+    """
+    [(root_path, [(site_id, root_url), ...])], most specific path first.
+    Sites sharing a root page (aliases) each list its pages.
+    """
+    roots = {}
+    for root in Site.get_site_root_paths():
+        roots.setdefault(root.root_path, []).append((root.site_id, root.root_url))
+    return list(roots.items())
+
+
+def write_atomic(path, chunks):
+    """Write ``chunks`` to a temporary file and rename it over ``path``"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.writelines(chunks)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ShardWriter:
+    """
+    The shard files of one shard number, one per site, opened as the first
+    URL for each site arrives and renamed into place on close()
+    """
+
+    def __init__(self, shard):
+        self.shard = shard
+        self.files = {}
+
+    def write(self, site_id, loc, lastmod):
+        if site_id not in self.files:
+            directory = get_site_dir(site_id)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            self.files[site_id] = (os.fdopen(fd, "w", encoding="utf-8"), tmp_path)
+            self.files[site_id][0].write(URLSET_OPEN)
+        entry = f"<url><loc>{escape(loc)}</loc>"
+        if lastmod:
+            entry += f"<lastmod>{lastmod.date().isoformat()}</lastmod>"
+        self.files[site_id][0].write(entry + "</url>\n")
+
+    def close(self, site_ids):
+        """
+        Move the written files into place and remove this shard's file for
+        any of ``site_ids`` that got no URLs. Returns the sites changed.
+        """
+        for site_id, (f, tmp_path) in self.files.items():
+            f.write(URLSET_CLOSE)
+            f.close()
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, os.path.join(get_site_dir(site_id), SHARD_NAME.format(self.shard)))
+        changed = set(self.files)
+        for site_id in set(site_ids) - changed:
+            path = os.path.join(get_site_dir(site_id), SHARD_NAME.format(self.shard))
+            if os.path.exists(path):
+                os.remove(path)
+                changed.add(site_id)
+        self.files = {}
+        return changed
+
+    def discard(self):
+        for f, tmp_path in self.files.values():
+            f.close()
+            os.unlink(tmp_path)
+        self.files = {}
+
+
+def write_shard(shard, site_roots):
+    """
+    Rewrite one shard for every site, streaming its live, public pages
+    from the database. Returns the ids of the sites whose files changed.
+    """
+    size = settings.SITEMAP_SHARD_SIZE
+    pages = (
+        Page.objects.live()
+        .public()
+        .filter(pk__gte=shard * size, pk__lt=(shard + 1) * size)
+        .order_by("pk")
+        .values_list("url_path", "last_published_at")
+    )
+    writer = ShardWriter(shard)
+    try:
+        for url_path, last_published_at in pages.iterator(chunk_size=2000):
+            for root_path, sites in site_roots:
+                if url_path.startswith(root_path):
+                    path = url_path[len(root_path) - 1:]
+                    for site_id, root_url in sites:
+                        writer.write(site_id, root_url + path, last_published_at)
+                    break
+    except BaseException:
+        writer.discard()
+        raise
+    site_ids = [site_id for __, sites in site_roots for site_id, __ in sites]
+    return writer.close(site_ids)
+
+
+def write_index(site_id, root_url):
+    """Rewrite a site's index from the shard files present"""
+    directory = get_site_dir(site_id)
+    shards = sorted(
+        int(match.group(1))
+        for match in map(SHARD_RE.match, os.listdir(directory) if os.path.isdir(directory) else [])
+        if match
+    )
+
+    def entries():
+        yield INDEX_OPEN
+        for shard in shards:
+            name = SHARD_NAME.format(shard)
+            mtime = os.stat(os.path.join(directory, name)).st_mtime
+            lastmod = datetime.fromtimestamp(mtime, timezone.utc)
+            yield f"<sitemap><loc>{escape(root_url)}/{name}</loc><lastmod>{lastmod.date().isoformat()}</lastmod></sitemap>\n"
+        yield INDEX_CLOSE
+
+    write_atomic(os.path.join(directory, INDEX_NAME), entries())
+
+
+# -------------------------------
+# Regeneration
+# -------------------------------
+def regenerate(shards):
+    """
+    Rewrite the given shards and the indexes of the sites they changed.
+    Each shard is written under a lock, so concurrent regenerations of it
+    finish in order and the last one reflects the latest commit.
+    """
+    site_roots = get_site_roots()
+    changed = set()
+    for shard in sorted(set(shards)):
+        lock = KeyLock(f"sitemap:{shard}")
+        locked = lock.acquire(timeout=60)
+        try:
+            changed |= write_shard(shard, site_roots)
+        finally:
+            if locked:
+                lock.release()
+    for __, sites in site_roots:
+        for site_id, root_url in sites:
+            if site_id in changed:
+                write_index(site_id, root_url)
+    return changed
+
+
+def build_all():
+    """
+    Write every shard of every site and remove leftovers of deleted sites
+    and shards. Returns the number of shards.
+    """
+    site_roots = get_site_roots()
+    max_pk = Page.objects.aggregate(max_pk=Max("pk"))["max_pk"] or 0
+    shard_count = get_shard(max_pk) + 1
+    for shard in range(shard_count):
+        write_shard(shard, site_roots)
+
+    site_ids = {str(site_id) for __, sites in site_roots for site_id, __ in sites}
+    os.makedirs(settings.SITEMAP_ROOT, exist_ok=True)
+    for name in os.listdir(settings.SITEMAP_ROOT):
+        directory = os.path.join(settings.SITEMAP_ROOT, name)
+        if not os.path.isdir(directory):
+            continue
+        for filename in os.listdir(directory):
+            match = SHARD_RE.match(filename)
+            if name not in site_ids or (match and int(match.group(1)) >= shard_count):
+                os.remove(os.path.join(directory, filename))
+    for __, sites in site_roots:
+        for site_id, root_url in sites:
+            write_index(site_id, root_url)
+    return shard_count
+
+
+# -------------------------------
+# Change tracking
+# -------------------------------
+# Shards touched by recent changes. Every change registers a callback for
+# when its transaction commits, and the first one to run enqueues them all,
+# so deleting a subtree (a post_delete for each page) regenerates each shard
+# once. Shards of a rolled back change just go along with the next one.
+_pending = threading.local()
+
+
+def mark_changed(page_ids=None):
+    """
+    Regenerate the shards of ``page_ids`` after the current transaction
+    commits, or every shard when page_ids is None (sites changed)
+    """
+    if getattr(_pending, "shards", None) is None:
+        _pending.shards = set()
+        _pending.rebuild = False
+    if page_ids is None:
+        _pending.rebuild = True
+    else:
+        _pending.shards.update(get_shard(page_id) for page_id in page_ids)
+    transaction.on_commit(flush_changes)
+
+
+def flush_changes():
+    from .tasks import regenerate_sitemaps
+
+    shards, rebuild = getattr(_pending, "shards", None), getattr(_pending, "rebuild", False)
+    _pending.shards = None
+    _pending.rebuild = False
+    if rebuild:
+        regenerate_sitemaps.enqueue(None)
+    elif shards:
+        regenerate_sitemaps.enqueue(sorted(shards))
+
+
+def ensure_built(site_id):
+    """
+    Whether the site's index is written. When it is not (a fresh deployment
+    or a new site) the task worker is asked for a full build, at most once
+    every few minutes across all web workers.
+    """
+    from .tasks import regenerate_sitemaps
+
+    path = os.path.join(get_site_dir(site_id), INDEX_NAME)
+    if os.path.exists(path):
+        return True
+    if cache.add(BUILD_REQUESTED_KEY, True, timeout=BUILD_RETRY_AFTER * 5):
+        regenerate_sitemaps.enqueue(None)
+    return os.path.exists(path)
+
+
+# -------------------------------
+# Views
+# -------------------------------
+def serve_file(request, name):
+    site = site_resolver.find_for_request(request)
+    if site is None:
+        raise Http404("No site")
+    if not ensure_built(site.pk):
+        response = HttpResponse("Sitemap is being built", status=503, content_type="text/plain")
+        response["Retry-After"] = str(BUILD_RETRY_AFTER)
+        return response
+    path = os.path.join(get_site_dir(site.pk), name)
+    if not os.path.exists(path):
+        raise Http404("No sitemap")
+    return sendfile(request, path, mimetype=CONTENT_TYPE)
+
+
+def serve_index(request):
+    """
+    The site's sitemap index, written ahead of time and sent as a file;
+    crawlers never cause a page tree walk
+    """
+    return serve_file(request, INDEX_NAME)
+
+
+def serve_shard(request, shard):
+    return serve_file(request, SHARD_NAME.format(shard))
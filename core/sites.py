@@ -0,0 +1,111 @@
+import threading
+
+from django.http.request import split_domain_port
+from wagtail.models import Page, Site
+
+from .replicas import use_primary
+from .versioning import VersionStamp
+
+SITE_FIELDS = [field.attname for field in Site._meta.concrete_fields]
+ROOT_PAGE_FIELDS = [field.attname for field in Page._meta.concrete_fields]
+
+# Bound the memo of resolved hosts; the Host header is client controlled
+MAX_MEMOIZED_HOSTS = 1000
+
+
+class SiteResolver:
+    """
+    Resolve the wagtail Site for a request from memory.
+
+    All Site rows and their root pages are loaded once per process and
+    reloaded when the "sites" VersionStamp changes. A fresh Site and root
+    Page instance is built for every request so per-instance caches such as
+    ``Page.specific`` never leak between requests.
+    """
+
+    def __init__(self):
+        self.stamp = VersionStamp("sites")
+        self.version = None
+        self.sites = []
+        self.root_pages = {}
+        self.memo = {}
+        self.lock = threading.Lock()
+
+    def load(self):
+        version = self.stamp.get(force=True)
+        # Kept until the stamp moves, so never load from a lagging replica
+        with use_primary():
+            sites = list(Site.objects.values_list(*SITE_FIELDS))
+            root_page_ids = {row[SITE_FIELDS.index("root_page_id")] for row in sites}
+            root_pages = {
+                row[0]: row
+                for row in Page.objects.filter(pk__in=root_page_ids).values_list(
+                    "pk", *ROOT_PAGE_FIELDS
+                )
+            }
+        with self.lock:
+            self.sites = [dict(zip(SITE_FIELDS, row)) for row in sites]
+            self.root_pages = {pk: row[1:] for pk, row in root_pages.items()}
+            self.memo = {}
+            self.version = version
+
+    def ensure_current(self):
+        if self.version is None or self.stamp.get() != self.version:
+            self.load()
+
+    def invalidate(self):
+        self.stamp.bump()
+        self.version = None
+
+    def match(self, hostname, port):
+        """
+        Same precedence as wagtail's get_site_for_hostname: hostname and
+        port, then hostname on the default site, then a unique hostname
+        match, then the default site
+        """
+        default = None
+        hostname_matches = []
+        for site in self.sites:
+            if site["hostname"] == hostname:
+                if site["port"] == port:
+                    return site
+                hostname_matches.append(site)
+            if site["is_default_site"]:
+                default = site
+
+        if default is not None and default in hostname_matches:
+            return default
+        if len(hostname_matches) == 1:
+            return hostname_matches[0]
+        return default
+
+    def build(self, row):
+        site = Site.from_db("default", SITE_FIELDS, [row[name] for name in SITE_FIELDS])
+        root_page = self.root_pages.get(row["root_page_id"])
+        if root_page is not None:
+            site.root_page = Page.from_db("default", ROOT_PAGE_FIELDS, root_page)
+        return site
+
+    def find(self, hostname, port):
+        self.ensure_current()
+        key = (hostname, port)
+        try:
+            row = self.memo[key]
+        except KeyError:
+            row = self.match(hostname, port)
+            if len(self.memo) >= MAX_MEMOIZED_HOSTS:
+                self.memo = {}
+            self.memo[key] = row
+        return self.build(row) if row is not None else None
+
+    def find_for_request(self, request):
+        # Same host handling as Site._find_for_request (no ALLOWED_HOSTS check)
+        hostname = split_domain_port(request._get_raw_host())[0]
+        try:
+            port = int(request.get_port())
+        except ValueError:
+            port = None
+        return self.find(hostname, port)
+
+
+site_resolver = SiteResolver()
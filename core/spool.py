@@ -0,0 +1,175 @@
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import InterfaceError, OperationalError, close_old_connections, connections, transaction
+
+from .singleflight import fcntl
+
+CLAIMED_SUFFIX = ".flushing"
+FAILED_SUFFIX = ".failed"
+
+logger = logging.getLogger(__name__)
+
+
+class Spool:
+    """
+    Durable append-only queue of JSON records in a directory shared by
+    every worker on the host. Requests append(); a single consumer claim()s
+    everything appended so far and reads it back in batches.
+
+    Writers hold a shared flock() on the spool file while appending and
+    check it wasn't claimed (renamed) in the meantime; claim() takes the
+    exclusive lock, so it never reads a half-written spool.
+    """
+
+    def __init__(self, name, dir_setting, default_dir):
+        self.name = name
+        self.dir_setting = dir_setting
+        self.default_dir = default_dir
+
+    def get_dir(self):
+        return getattr(
+            settings, self.dir_setting, os.path.join(settings.BASE_DIR, "cache", self.default_dir)
+        )
+
+    def append(self, record):
+        line = json.dumps(record, cls=DjangoJSONEncoder, separators=(",", ":")) + "\n"
+        spool_dir = self.get_dir()
+        spool_path = os.path.join(spool_dir, f"{self.name}.log")
+        while True:
+            try:
+                fd = os.open(spool_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            except FileNotFoundError:
+                os.makedirs(spool_dir, exist_ok=True)
+                continue
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_SH)
+                    try:
+                        if os.fstat(fd).st_ino != os.stat(spool_path).st_ino:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                os.write(fd, line.encode())
+                return
+            finally:
+                os.close(fd)
+
+    def claim(self):
+        """
+        Move the current spool aside and return the paths of every claimed
+        spool, oldest first, including ones left behind by an interrupted
+        consumer
+        """
+        spool_dir = self.get_dir()
+        spool_path = os.path.join(spool_dir, f"{self.name}.log")
+        try:
+            claimed = f"{spool_path}.{time.time_ns()}{CLAIMED_SUFFIX}"
+            os.rename(spool_path, claimed)
+        except FileNotFoundError:
+            pass
+        else:
+            if fcntl is not None:
+                # Wait for writers that opened the spool before the rename
+                fd = os.open(claimed, os.O_RDONLY)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                finally:
+                    os.close(fd)
+        return sorted(glob.glob(os.path.join(spool_dir, f"{self.name}.log.*{CLAIMED_SUFFIX}")))
+
+    @staticmethod
+    def read(path):
+        with open(path) as spool:
+            for line in spool:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash mid-write
+                    continue
+
+    def consume(self, path, handle, size):
+        """
+        Pass the records of a claimed spool to ``handle`` in batches of
+        ``size``, each in a savepoint, and return the sum of what it returns.
+        A batch that raises for anything but a lost connection is moved to
+        the dead-letter file (see quarantine()) instead of failing the whole
+        spool, which would be claimed first and fail again on every flush.
+        """
+        total = 0
+        for records in self.batches(self.read(path), size):
+            try:
+                with transaction.atomic():
+                    total += handle(records)
+            except (InterfaceError, OperationalError):
+                raise
+            except Exception:
+                logger.exception("%d %s records failed, moved to %s", len(records), self.name, FAILED_SUFFIX)
+                self.quarantine(records)
+        return total
+
+    def quarantine(self, records):
+        """
+        Append records to ``<name>.failed`` in the spool directory, which is
+        never claimed, for someone to inspect
+        """
+        spool_dir = self.get_dir()
+        os.makedirs(spool_dir, exist_ok=True)
+        with open(os.path.join(spool_dir, f"{self.name}{FAILED_SUFFIX}"), "a") as f:
+            for record in records:
+                f.write(json.dumps(record, cls=DjangoJSONEncoder, separators=(",", ":")) + "\n")
+
+    @staticmethod
+    def batches(records, size):
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+class BackgroundFlusher:
+    """
+    Daemon thread calling ``flush()`` every ``interval_setting`` seconds,
+    started lazily in each worker process (gunicorn forks after --preload)
+    unless ``enabled_setting`` is False
+    """
+
+    def __init__(self, name, flush, interval_setting, enabled_setting, default_interval=10):
+        self.name = name
+        self.flush = flush
+        self.interval_setting = interval_setting
+        self.enabled_setting = enabled_setting
+        self.default_interval = default_interval
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def ensure_running(self):
+        if self.pid == os.getpid() or not getattr(settings, self.enabled_setting, True):
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                threading.Thread(target=self.run, name=self.name, daemon=True).start()
+
+    def run(self):
+        interval = getattr(settings, self.interval_setting, self.default_interval)
+        while True:
+            time.sleep(interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                # Keep the thread alive; the records stay in the spool
+                logger.exception("%s failed", self.name)
+            finally:
+                connections.close_all()
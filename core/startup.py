@@ -0,0 +1,95 @@
+import hashlib
+import os
+from importlib import import_module
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.db.migrations.loader import MigrationLoader
+
+
+def migration_fingerprint():
+    """
+    Hash the name and contents of every migration file of every installed
+    app. Reading the files is far cheaper than building the migration graph,
+    and any added, removed or edited migration changes the result.
+    """
+    digest = hashlib.sha256()
+    for app_config in sorted(apps.get_app_configs(), key=lambda config: config.label):
+        module_name, __ = MigrationLoader.migrations_module(app_config.label)
+        if module_name is None:
+            continue
+        try:
+            module = import_module(module_name)
+        except ModuleNotFoundError:
+            continue
+        if getattr(module, "__file__", None) is None:
+            continue
+
+        directory = os.path.dirname(module.__file__)
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".py"):
+                continue
+            digest.update(f"{app_config.label}/{name}\0".encode())
+            with open(os.path.join(directory, name), "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def get_schema_stamp(using=DEFAULT_DB_ALIAS):
+    from .models import SchemaStamp
+
+    try:
+        return (
+            SchemaStamp.objects.using(using)
+            .filter(pk=SchemaStamp.SINGLETON_ID)
+            .values_list("fingerprint", flat=True)
+            .first()
+        )
+    except DatabaseError:
+        # Fresh database, the table does not exist yet
+        return None
+
+
+def set_schema_stamp(fingerprint, using=DEFAULT_DB_ALIAS):
+    from .models import SchemaStamp
+
+    SchemaStamp.objects.using(using).update_or_create(
+        pk=SchemaStamp.SINGLETON_ID, defaults={"fingerprint": fingerprint}
+    )
+
+
+# -------------------------------
+# Import-time report
+# -------------------------------
+def parse_importtime(lines):
+    """
+    Parse ``python -X importtime`` output into {module: self time in us}
+    """
+    timings = {}
+    for line in lines:
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, __, module = line[len("import time:"):].split("|", 2)
+            timings[module.strip()] = timings.get(module.strip(), 0) + int(self_us)
+        except ValueError:
+            continue
+    return timings
+
+
+def group_by_app(timings, app_names):
+    """
+    Attribute each module's own import time to the installed app with the
+    longest matching module prefix, or to its top-level package otherwise
+    """
+    app_names = sorted(app_names, key=len, reverse=True)
+    groups = {}
+    for module, self_us in timings.items():
+        for app_name in app_names:
+            if module == app_name or module.startswith(app_name + "."):
+                group = app_name
+                break
+        else:
+            group = module.split(".", 1)[0]
+        groups[group] = groups.get(group, 0) + self_us
+    return groups
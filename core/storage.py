@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import time
+from fnmatch import fnmatch
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .uploads import HASH_ALGORITHM
+
+
+def hash_content(content):
+    hasher = hashlib.new(HASH_ALGORITHM)
+    for chunk in content.chunks():
+        hasher.update(chunk.encode() if isinstance(chunk, str) else chunk)
+    return hasher.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage keeping each distinct content once, under
+    ``blobs/`` named by its hash. Every saved name is a hard link to its
+    blob, so a duplicate upload costs a directory entry and no disk, while
+    names, URLs and deletes behave exactly as before.
+
+    Uploads already hashed by HashingUploadHandler are moved into place
+    without being read again. Blobs left with no name are removed by
+    prune_blobs().
+    """
+
+    blob_dir = "blobs"
+
+    def get_blob_name(self, digest):
+        return f"{self.blob_dir}/{digest[:2]}/{digest}"
+
+    def save_blob(self, content):
+        digest = getattr(content, "content_hash", None) or hash_content(content)
+        blob_name = self.get_blob_name(digest)
+        if not self.exists(blob_name):
+            saved_name = super()._save(blob_name, content)
+            if saved_name != blob_name:
+                # The same content was saved concurrently, keep that copy
+                os.remove(self.path(saved_name))
+        return blob_name
+
+    def _save(self, name, content):
+        blob_name = self.save_blob(content)
+        full_path = self.path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        while True:
+            try:
+                os.link(self.path(blob_name), full_path)
+            except FileExistsError:
+                name = self.get_available_name(name)
+                full_path = self.path(name)
+            except FileNotFoundError:
+                # Pruned between saving and linking it
+                blob_name = self.save_blob(content)
+            else:
+                break
+        return os.path.relpath(full_path, self.location).replace("\\", "/")
+
+    def prune_blobs(self, min_age=3600):
+        """
+        Delete blobs no name links to any more, skipping ones linked or
+        renamed in the last ``min_age`` seconds as they may be mid-save.
+        Returns (blobs deleted, bytes freed).
+        """
+        root = self.path(self.blob_dir)
+        cutoff = time.time() - min_age
+        deleted = freed = 0
+        for dirpath, __, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                if stat.st_nlink == 1 and stat.st_ctime < cutoff:
+                    os.remove(path)
+                    deleted += 1
+                    freed += stat.st_size
+        return deleted, freed
+
+
+class ServiceWorkerStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage that also writes the service worker at collectstatic
+    time. The worker precaches the hashed files matching
+    SERVICE_WORKER_PRECACHE and serves SERVICE_WORKER_API_ROUTES from its
+    cache while revalidating them.
+
+    The worker's version is a hash of its own source, so any deploy that
+    changes a precached file installs a new worker with fresh caches.
+    """
+
+    worker_name = "sw.js"
+    worker_template = "service_worker.js"
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if not kwargs.get("dry_run"):
+            self.save_worker()
+
+    def get_precache_urls(self):
+        patterns = settings.SERVICE_WORKER_PRECACHE
+        return sorted(
+            self.url(name, force=True)
+            for name in self.hashed_files
+            if any(fnmatch(name, pattern) for pattern in patterns)
+        )
+
+    def render_worker(self):
+        context = {
+            "precache": mark_safe(json.dumps(self.get_precache_urls(), indent=2)),
+            "api_routes": mark_safe(json.dumps(settings.SERVICE_WORKER_API_ROUTES, indent=2)),
+            "version": "",
+        }
+        context["version"] = hashlib.sha256(
+            render_to_string(self.worker_template, context).encode()
+        ).hexdigest()[:12]
+        return render_to_string(self.worker_template, context)
+
+    def save_worker(self):
+        if self.exists(self.worker_name):
+            self.delete(self.worker_name)
+        self._save(self.worker_name, ContentFile(self.render_worker().encode()))
@@ -0,0 +1,16 @@
+from django_tasks import task
+
+from . import sitemaps
+
+
+@task()
+def regenerate_sitemaps(shards=None):
+    """
+    Rewrite the sitemap shards pages changed in, or every shard when
+    ``shards`` is None. Returns the ids of the sites whose files changed
+    (None after a full rebuild).
+    """
+    if shards is None:
+        sitemaps.build_all()
+        return None
+    return sorted(sitemaps.regenerate(shards))
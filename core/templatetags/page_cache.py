@@ -0,0 +1,39 @@
+from django import template
+
+from core.pagecache import HOLE_FILLERS
+
+register = template.Library()
+
+
+class HoleNode(template.Node):
+    def __init__(self, name, nodelist):
+        self.name = name
+        self.nodelist = nodelist
+
+    def render(self, context):
+        request = context.get("request")
+        if getattr(request, "page_cache_capture", False):
+            return f"<!--hole:{self.name}-->"
+        return self.nodelist.render(context)
+
+
+@register.tag
+def hole(parser, token):
+    """
+    Mark a per-visitor fragment of a cacheable page:
+
+        {% hole "userbar" %}{% wagtailuserbar %}{% endhole %}
+
+    When the page cache captures a page the block becomes a placeholder,
+    which is filled by the filler registered under the same name in
+    core.pagecache. Otherwise the block renders normally.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2 or bits[1][0] not in "\"'" or bits[1][0] != bits[1][-1]:
+        raise template.TemplateSyntaxError("'hole' takes one quoted fragment name")
+    name = bits[1][1:-1]
+    if name not in HOLE_FILLERS:
+        raise template.TemplateSyntaxError(f"No page cache filler registered for {name!r}")
+    nodelist = parser.parse(("endhole",))
+    parser.delete_first_token()
+    return HoleNode(name, nodelist)
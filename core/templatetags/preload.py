@@ -0,0 +1,44 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from core import preload as preload_registry
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def stylesheet(context, path):
+    """
+    A stylesheet link for the static file at ``path``, also registered as
+    a preload:
+
+        {% stylesheet "css/hr_pulse.css" %}
+    """
+    url = static(path)
+    preload_registry.add(context.get("request"), url, "style")
+    return format_html('<link rel="stylesheet" type="text/css" href="{}">', url)
+
+
+@register.simple_tag(takes_context=True)
+def script(context, path):
+    """
+    A script tag for the static file at ``path``, also registered as a
+    preload
+    """
+    url = static(path)
+    preload_registry.add(context.get("request"), url, "script")
+    return format_html('<script type="text/javascript" src="{}"></script>', url)
+
+
+@register.simple_tag(takes_context=True)
+def preload(context, url, as_, **attrs):
+    """
+    Register any other URL the page needs early, e.g. a font or an image
+    rendition:
+
+        {% image page.hero fill-1600x900 as hero %}
+        {% preload hero.url "image" fetchpriority="high" %}
+    """
+    preload_registry.add(context.get("request"), url, as_, **attrs)
+    return ""
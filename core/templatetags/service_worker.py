@@ -0,0 +1,16 @@
+from django import template
+
+from core.serviceworker import get_worker_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def service_worker_url():
+    """
+    URL to register the service worker from, or "" when collectstatic
+    didn't write one:
+
+        {% service_worker_url as service_worker %}
+    """
+    return get_worker_url()
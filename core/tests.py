@@ -0,0 +1,933 @@
+import multiprocessing
+import os
+import runpy
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.urls.resolvers import RegexPattern, RoutePattern
+from wagtail.contrib.redirects.models import Redirect
+from wagtail.documents import get_document_model
+from wagtail.models import Page, Site
+from wagtail.models.sites import get_site_for_hostname
+
+from home.models import Homepage, Stat
+
+from . import memory, pagecache, preload, replicas, sitemaps
+from .middleware import PreloadMiddleware, ReplicaRoutingMiddleware
+from .models import EndpointMemory
+from .redirects import RedirectTable, redirect_table
+from .routing import get_literal_prefix, get_stateless_prefixes
+from .admission import ConcurrencySlots, check_classes, check_client_ip, client_id
+from .checks import check_admission_classes
+from .documents import parse_range
+from .storage import ContentAddressedStorage
+from .singleflight import KeyLock, get_or_compute, set_entry
+from .sites import site_resolver
+from .versioning import VersionStamp
+from .startup import get_schema_stamp, group_by_app, migration_fingerprint, parse_importtime
+
+
+class CompiledRedirectTestCase(TestCase):
+    """Test cases for the in-memory redirect table"""
+
+    def test_redirect_served_from_table(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Redirect.objects.create(old_path='/old-pricing', redirect_link='https://example.com/pricing')
+        response = self.client.get('/old-pricing/')
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response['Location'], 'https://example.com/pricing')
+
+    def test_temporary_redirect_and_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            redirect = Redirect.objects.create(
+                old_path='/old-team', redirect_link='https://example.com/team', is_permanent=False
+            )
+        self.assertEqual(self.client.get('/old-team/').status_code, 302)
+        with self.captureOnCommitCallbacks(execute=True):
+            redirect.delete()
+        self.assertEqual(self.client.get('/old-team/').status_code, 404)
+
+    def test_lookup_needs_no_query(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Redirect.objects.create(old_path='/no-query', redirect_link='https://example.com/')
+        redirect_table.ensure_current()
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(redirect_table.find(None, '/no-query'))
+            self.assertIsNone(redirect_table.find(None, '/missing'))
+
+    def test_other_worker_replays_changes(self):
+        other_worker = RedirectTable()
+        other_worker.stamp.check_interval = 0
+        other_worker.load()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            redirect = Redirect.objects.create(old_path='/replayed', redirect_link='https://example.com/a')
+        with self.assertNumQueries(0):
+            other_worker.ensure_current()
+        self.assertEqual(other_worker.find(None, '/replayed'), ('https://example.com/a', True))
+
+        redirect.old_path = '/replayed-moved'
+        with self.captureOnCommitCallbacks(execute=True):
+            redirect.save()
+        other_worker.ensure_current()
+        self.assertIsNone(other_worker.find(None, '/replayed'))
+        self.assertIsNotNone(other_worker.find(None, '/replayed-moved'))
+
+    def test_rolled_back_change_not_published(self):
+        redirect_table.ensure_current()
+        version = redirect_table.stamp.get(force=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Redirect.objects.create(old_path='/phantom', redirect_link='https://example.com/')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(redirect_table.stamp.get(force=True), version)
+        self.assertIsNone(redirect_table.find(None, '/phantom'))
+
+    def test_concurrent_bumps_get_distinct_versions(self):
+        stamp = VersionStamp(f'bump-{uuid.uuid4().hex}')
+        versions = []
+        threads = [
+            threading.Thread(target=lambda: versions.extend(stamp.bump() for __ in range(20)))
+            for __ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(versions), list(range(1, 81)))
+
+    @override_settings(REDIRECT_PATTERNS=[(r'^/old-blog/(?P<slug>[\w-]+)$', r'/blog/\g<slug>/', False)])
+    def test_pattern_redirects(self):
+        table = RedirectTable()
+        table.load()
+        self.assertEqual(table.find(None, '/old-blog/hello-world'), ('/blog/hello-world/', False))
+        self.assertIsNone(table.find(None, '/old-blog/'))
+
+
+class SiteResolverTestCase(TestCase):
+    """Test cases for the cached Site resolver"""
+
+    def setUp(self):
+        # Site changes also rebuild the sitemaps
+        settings_override = override_settings(SITEMAP_ROOT=tempfile.mkdtemp())
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        site_resolver.invalidate()
+        self.default_site = Site.objects.get(is_default_site=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_site = Site.objects.create(
+                hostname='careers.example.com', root_page=self.default_site.root_page
+            )
+
+    def test_matches_wagtail_resolution(self):
+        for hostname, port in [
+            ('careers.example.com', 80),
+            ('careers.example.com', 8000),
+            ('localhost', 80),
+            ('unknown.example.com', 443),
+        ]:
+            expected = get_site_for_hostname(hostname, port)
+            self.assertEqual(site_resolver.find(hostname, port).pk, expected.pk)
+
+    def test_resolution_needs_no_query(self):
+        site_resolver.find('localhost', 80)
+        with self.assertNumQueries(0):
+            site = site_resolver.find('careers.example.com', 80)
+        self.assertEqual(site.pk, self.other_site.pk)
+
+    def test_invalidated_on_site_save(self):
+        self.assertEqual(site_resolver.find('careers.example.com', 80).pk, self.other_site.pk)
+        self.other_site.hostname = 'jobs.example.com'
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.other_site.save()
+            # Not before the save commits
+            self.assertEqual(site_resolver.find('careers.example.com', 80).pk, self.other_site.pk)
+        self.assertTrue(callbacks)
+        self.assertEqual(site_resolver.find('careers.example.com', 80).pk, self.default_site.pk)
+        self.assertEqual(site_resolver.find('jobs.example.com', 80).pk, self.other_site.pk)
+
+    def test_homepage_queries_reduced(self):
+        self.client.get('/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        site_queries = [q for q in queries if 'wagtailcore_site' in q['sql']]
+        self.assertEqual(site_queries, [])
+
+
+class StartupTestCase(TestCase):
+    """Test cases for the startup fast path"""
+
+    def test_migrate_skipped_when_stamp_matches(self):
+        with mock.patch('core.management.commands.migrate_if_needed.call_command') as migrate:
+            call_command('migrate_if_needed', '--noinput', stdout=StringIO())
+            call_command('migrate_if_needed', '--noinput', stdout=StringIO())
+        self.assertEqual(migrate.call_count, 1)
+        self.assertEqual(get_schema_stamp(), migration_fingerprint())
+
+    def test_import_times_grouped_by_app(self):
+        lines = [
+            'import time: self [us] | cumulative | imported package',
+            'import time:       100 |        100 |   wagtail.images.models',
+            'import time:        50 |        150 | wagtail.images',
+            'import time:        30 |         30 |   wagtail.models',
+            'import time:        20 |         20 | json',
+        ]
+        groups = group_by_app(parse_importtime(lines), ['wagtail.images', 'wagtail'])
+        self.assertEqual(groups, {'wagtail.images': 150, 'wagtail': 30, 'json': 20})
+
+
+class StatelessRouteTestCase(TestCase):
+    """Test cases for the stateless route fast path"""
+
+    def test_stateless_route_skips_full_stack(self):
+        response = self.client.get(reverse('api_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Frame-Options', response)
+        self.assertEqual(response.resolver_match.url_name, 'api_stats')
+
+    def test_other_routes_keep_full_stack(self):
+        response = self.client.get(reverse('theme_plugin:theme_demo'))
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+
+    def test_only_stateless_prefixes_resolved(self):
+        prefixes = get_stateless_prefixes()
+        self.assertLessEqual({'/api/stats/', '/api/pages/', '/sw.js', '/sitemap.xml', '/sitemap-'}, prefixes)
+        self.assertNotIn('/admin/', prefixes)
+
+        with mock.patch('core.middleware.resolve', wraps=resolve) as resolve_path:
+            self.client.get(reverse('theme_plugin:theme_demo'))
+            resolve_path.assert_not_called()
+            self.client.get(reverse('api_stats'))
+            resolve_path.assert_called_once_with('/api/stats/')
+
+    def test_literal_prefix(self):
+        self.assertEqual(get_literal_prefix(RoutePattern('pages/<int:pk>/')), ('pages/', False))
+        self.assertEqual(get_literal_prefix(RoutePattern('sw.js')), ('sw.js', True))
+        self.assertEqual(get_literal_prefix(RegexPattern(r'^documents/(\d+)/$')), ('documents/', False))
+        self.assertEqual(get_literal_prefix(RegexPattern(r'^docs?/')), ('doc', False))
+        self.assertEqual(get_literal_prefix(RegexPattern(r'^/')), ('/', True))
+        self.assertEqual(get_literal_prefix(RegexPattern(r'api/')), ('', False))
+
+    def test_stateless_route_errors_are_handled(self):
+        response = self.client.get(reverse('api_homepage_snapshot', args=[999999]))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(STATELESS_MIDDLEWARE=['django.middleware.clickjacking.XFrameOptionsMiddleware'])
+    def test_stateless_middleware_setting(self):
+        response = self.client.get(reverse('api_stats'))
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+
+    def test_api_revalidation(self):
+        etag = self.client.get(reverse('api_features'))['ETag']
+        response = self.client.get(reverse('api_features'), headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        response = self.client.get(reverse('api_features'), headers={'If-None-Match': '"stale"'})
+        self.assertEqual(response.status_code, 200)
+
+
+class PageCacheTestCase(TestCase):
+    """Test cases for the anonymous full-page cache"""
+
+    def setUp(self):
+        pagecache.invalidate()
+
+    def test_anonymous_hits_skip_rendering(self):
+        self.assertEqual(self.client.get('/')['X-Page-Cache'], 'miss')
+        with self.assertTemplateNotUsed('base.html'):
+            response = self.client.get('/')
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(response.status_code, 200)
+
+    def test_csrf_hole_filled_per_request(self):
+        first = self.client_class().get('/')
+        second = self.client_class().get('/')
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertNotIn(b'<!--hole:', second.content)
+        self.assertIn(b'name="csrfmiddlewaretoken"', second.content)
+        self.assertIn('csrftoken', second.cookies)
+        self.assertNotEqual(first.cookies['csrftoken'].value, second.cookies['csrftoken'].value)
+
+    def test_authenticated_users_bypass_cache(self):
+        user = get_user_model().objects.create_user('editor', password='password')
+        self.client.force_login(user)
+        self.client.get('/')
+        self.assertNotIn('X-Page-Cache', self.client.get('/'))
+
+    def test_publish_invalidates(self):
+        self.client.get('/')
+        page = Page.objects.get(depth=2).specific
+        page.title = 'Welcome'
+        with self.captureOnCommitCallbacks(execute=True):
+            page.save_revision().publish()
+        self.assertEqual(self.client.get('/')['X-Page-Cache'], 'miss')
+
+    def test_invalidated_only_on_commit(self):
+        page = Page.objects.get(depth=2).add_child(title='Moving', slug='moving')
+        version = pagecache.page_cache_stamp.get(force=True)
+        with self.captureOnCommitCallbacks() as callbacks:
+            page.unpublish()
+            Stat.objects.create(landing_page=Homepage.objects.get(depth=2), value='1', label='Offices')
+            page.delete()
+        # Nothing is bumped while the change is uncommitted
+        self.assertEqual(pagecache.page_cache_stamp.get(force=True), version)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(pagecache.page_cache_stamp.get(force=True), version)
+
+    def test_unknown_holes_left_alone(self):
+        request = RequestFactory().get('/')
+        content = pagecache.fill_holes('<p><!--hole:renamed--></p><!--hole:userbar-->', request)
+        self.assertEqual(content, '<p><!--hole:renamed--></p>')
+
+    def test_page_delete_invalidates(self):
+        page = Page.objects.get(depth=2).add_child(title='Gone', slug='gone')
+        self.client.get('/gone/')
+        self.assertEqual(self.client.get('/gone/')['X-Page-Cache'], 'hit')
+        with self.captureOnCommitCallbacks(execute=True):
+            page.delete()
+        self.assertEqual(self.client.get('/gone/').status_code, 404)
+
+    def test_stale_page_served_while_regenerating(self):
+        self.client.get('/')
+        key = pagecache.cache_key(self.client.get('/').wsgi_request)
+        content, headers, charset = pagecache.load(key)[0]
+        set_entry(key, (content, headers, charset), 0, 60)
+        lock = KeyLock(key)
+        self.assertTrue(lock.acquire())
+        try:
+            response = self.client.get('/')
+        finally:
+            lock.release()
+        self.assertEqual(response['X-Page-Cache'], 'stale')
+        self.assertIn(b'name="csrfmiddlewaretoken"', response.content)
+
+
+def count_in_child(key, lock_dir, log_path):
+    """Run get_or_compute in a forked worker, logging each regeneration"""
+
+    def compute():
+        with open(log_path, 'a') as log:
+            log.write('x')
+        time.sleep(0.3)
+        return 'value'
+
+    with override_settings(SINGLE_FLIGHT_LOCK_DIR=lock_dir):
+        get_or_compute(key, compute, ttl=60)
+
+
+class SingleFlightTestCase(TestCase):
+    """Test cases for single-flight cache regeneration"""
+
+    def setUp(self):
+        self.key = f'test:singleflight:{uuid.uuid4().hex}'
+        self.lock_dir = tempfile.mkdtemp()
+        settings_override = override_settings(SINGLE_FLIGHT_LOCK_DIR=self.lock_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_stampede_regenerates_once(self):
+        calls = []
+        results = []
+        barrier = threading.Barrier(20)
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        def worker():
+            barrier.wait()
+            results.append(get_or_compute(self.key, compute, ttl=60))
+
+        threads = [threading.Thread(target=worker) for __ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 20)
+
+    def test_stampede_across_processes_regenerates_once(self):
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self.skipTest('needs fork')
+        log_path = os.path.join(self.lock_dir, 'computes.log')
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=count_in_child, args=(self.key, self.lock_dir, log_path))
+            for __ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        with open(log_path) as log:
+            self.assertEqual(log.read(), 'x')
+
+    def test_stale_value_served_while_locked(self):
+        set_entry(self.key, 'old', 0, 60)
+        lock = KeyLock(self.key)
+        self.assertTrue(lock.acquire())
+        try:
+            value = get_or_compute(self.key, lambda: self.fail('recomputed'), ttl=60)
+        finally:
+            lock.release()
+        self.assertEqual(value, 'old')
+        self.assertEqual(get_or_compute(self.key, lambda: 'new', ttl=60), 'new')
+
+
+class AdmissionControlTestCase(TestCase):
+    """Test cases for rate and concurrency limits on search and the API"""
+
+    def setUp(self):
+        # A fresh endpoint class per test so buckets never carry over
+        self.name = f'test-{uuid.uuid4().hex}'
+        self.lock_dir = tempfile.mkdtemp()
+        self.options = {
+            'paths': ['/api/'],
+            'rate': 1,
+            'burst': 2,
+            'global_rate': 100,
+            'global_burst': 100,
+            'concurrency': 2,
+        }
+        settings_override = override_settings(SINGLE_FLIGHT_LOCK_DIR=self.lock_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get(self, **extra):
+        with override_settings(ADMISSION_CLASSES={self.name: self.options}):
+            return self.client.get('/api/features/', **extra)
+
+    def test_client_bucket_returns_429(self):
+        self.assertEqual(self.get().status_code, 200)
+        self.assertEqual(self.get().status_code, 200)
+        response = self.get()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        # Another client still has its own bucket
+        self.assertEqual(self.get(REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    @override_settings(ADMISSION_CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR', ADMISSION_TRUSTED_PROXIES=1)
+    def test_client_behind_proxy(self):
+        self.assertEqual(self.get(HTTP_X_FORWARDED_FOR='10.0.0.5').status_code, 200)
+        self.assertEqual(self.get(HTTP_X_FORWARDED_FOR='10.0.0.5').status_code, 200)
+        # A made-up left-most address doesn't buy a fresh bucket
+        response = self.get(HTTP_X_FORWARDED_FOR='1.2.3.4, 10.0.0.5')
+        self.assertEqual(response.status_code, 429)
+        # Clients behind the same proxy have their own buckets
+        self.assertEqual(self.get(HTTP_X_FORWARDED_FOR='10.0.0.6').status_code, 200)
+
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='1.2.3.4, 10.0.0.5, 10.0.0.1')
+        with override_settings(ADMISSION_TRUSTED_PROXIES=2):
+            self.assertEqual(client_id(request), '10.0.0.5')
+            self.assertEqual(check_client_ip(), [])
+        with override_settings(ADMISSION_TRUSTED_PROXIES=0):
+            self.assertEqual(len(check_client_ip()), 1)
+
+    def test_global_bucket_returns_503(self):
+        self.options.update(rate=100, burst=100, global_rate=1, global_burst=1)
+        self.assertEqual(self.get().status_code, 200)
+        response = self.get(REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+    def test_concurrency_limit_returns_503(self):
+        slots = ConcurrencySlots(self.name, 2)
+        held = [slots.acquire(), slots.acquire()]
+        try:
+            self.assertEqual(self.get().status_code, 503)
+        finally:
+            for slot in held:
+                slots.release(slot)
+        self.assertEqual(self.get().status_code, 200)
+
+    def test_other_paths_not_limited(self):
+        self.options['burst'] = 0
+        with override_settings(ADMISSION_CLASSES={self.name: self.options}):
+            self.assertNotEqual(self.client.get('/').status_code, 429)
+
+    def test_check_rejects_zero_rates(self):
+        self.assertEqual(check_admission_classes(None), [])
+        self.options.update(rate=0, global_rate=-1)
+        del self.options['concurrency']
+        self.assertEqual(check_classes({self.name: self.options}), [f"'{self.name}' is missing concurrency"])
+        self.options['concurrency'] = 2
+        problems = check_classes({self.name: self.options})
+        self.assertEqual(len(problems), 2)
+        self.assertIn('rate above 0', problems[0])
+        self.assertIn('global_rate above 0', problems[1])
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTestCase(SimpleTestCase):
+    """Test cases for read replica routing"""
+
+    databases = {'default'}
+
+    def setUp(self):
+        cache.delete(replicas.PRIMARY_UNTIL_KEY)
+        self.addCleanup(cache.delete, replicas.PRIMARY_UNTIL_KEY)
+        self.factory = RequestFactory()
+        self.router = replicas.ReplicaRouter()
+
+    def handle(self, request):
+        """Return (alias reads went to, response)"""
+        seen = []
+
+        def get_response(request):
+            seen.append(self.router.db_for_read(Page))
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(get_response)(request)
+        return seen[0], response
+
+    def test_safe_requests_read_from_replica(self):
+        alias, response = self.handle(self.factory.get('/'))
+        self.assertEqual(alias, 'replica')
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+        self.assertEqual(self.router.db_for_write(Page), 'default')
+
+    def test_writes_pin_client_to_primary(self):
+        alias, response = self.handle(self.factory.post('/contact/'))
+        self.assertEqual(alias, 'default')
+        self.assertEqual(response.cookies[replicas.PIN_COOKIE]['max-age'], 10)
+
+        request = self.factory.get('/')
+        request.COOKIES[replicas.PIN_COOKIE] = '1'
+        self.assertEqual(self.handle(request)[0], 'default')
+
+    def test_admin_reads_from_primary(self):
+        self.assertEqual(self.handle(self.factory.get('/admin/pages/'))[0], 'default')
+
+    def test_publish_pins_everyone_to_primary(self):
+        pagecache.invalidate()
+        self.assertEqual(self.handle(self.factory.get('/'))[0], 'default')
+
+    def test_transactions_read_from_primary(self):
+        with replicas.use_database('replica'), transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Page), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        alias, response = self.handle(self.factory.post('/contact/'))
+        self.assertEqual(alias, 'default')
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+
+
+class DocumentDeliveryTestCase(TestCase):
+    """Test cases for document downloads with Range and proxy hand-off"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=media_root, SENDFILE_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.content = bytes(range(256)) * 40
+        self.document = get_document_model().objects.create(
+            title="Handbook", file=ContentFile(self.content, name="handbook.pdf")
+        )
+        self.url = self.document.url
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_full_download(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        self.assertEqual(response["Content-Length"], str(len(self.content)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(response["ETag"])
+
+    def test_range_requests(self):
+        response, body = self.get(Range="bytes=100-199")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.content[100:200])
+        self.assertEqual(response["Content-Range"], f"bytes 100-199/{len(self.content)}")
+        self.assertEqual(response["Content-Length"], "100")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+
+        response, body = self.get(Range="bytes=-10")
+        self.assertEqual(body, self.content[-10:])
+        response, body = self.get(Range="bytes=10000-")
+        self.assertEqual(body, self.content[10000:])
+
+        response, body = self.get(Range=f"bytes={len(self.content)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.content)}")
+
+        # Several ranges are answered with the whole document
+        response, body = self.get(Range="bytes=0-1,5-6")
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_range_and_conditional_requests(self):
+        etag = self.get()[0]["ETag"]
+        response, body = self.get(Range="bytes=0-9", **{"If-Range": etag})
+        self.assertEqual(body, self.content[:10])
+        response, body = self.get(Range="bytes=0-9", **{"If-Range": '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        response, body = self.get(**{"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-0", 10), (0, 0))
+        self.assertEqual(parse_range("bytes=5-50", 10), (5, 9))
+        self.assertEqual(parse_range("bytes=-50", 10), (0, 9))
+        self.assertIsNone(parse_range("bytes=5-2", 10))
+        self.assertIsNone(parse_range("items=0-1", 10))
+        self.assertFalse(parse_range("bytes=-0", 10))
+
+    def test_proxy_hand_off(self):
+        with override_settings(SENDFILE_HEADER="X-Accel-Redirect", SENDFILE_URL="/protected/"):
+            response, body = self.get()
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected/{self.document.file.name}")
+        self.assertEqual(body, b"")
+        self.assertEqual(response["Content-Length"], "0")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+
+        with override_settings(SENDFILE_HEADER="X-Sendfile"):
+            response, body = self.get()
+        self.assertEqual(response["X-Sendfile"], self.document.file.path)
+        self.assertEqual(response["Content-Length"], "0")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+
+
+class ContentAddressedStorageTestCase(TestCase):
+    """Test cases for hashed streaming uploads and deduplicated storage"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, FILE_UPLOAD_TEMP_DIR=self.media_root
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.storage = ContentAddressedStorage()
+
+    def test_duplicates_share_one_blob(self):
+        first = self.storage.save("documents/a.txt", ContentFile(b"same content"))
+        second = self.storage.save("documents/b.txt", ContentFile(b"same content"))
+        third = self.storage.save("documents/a.txt", ContentFile(b"other content"))
+        self.assertTrue(third.startswith("documents/a_"))
+
+        self.assertEqual(os.stat(self.storage.path(first)).st_ino, os.stat(self.storage.path(second)).st_ino)
+        self.assertNotEqual(os.stat(self.storage.path(first)).st_ino, os.stat(self.storage.path(third)).st_ino)
+
+        self.storage.delete(first)
+        with self.storage.open(second) as f:
+            self.assertEqual(f.read(), b"same content")
+
+    def test_prune_blobs(self):
+        name = self.storage.save("documents/a.txt", ContentFile(b"kept"))
+        self.storage.delete(self.storage.save("documents/b.txt", ContentFile(b"dropped")))
+        self.assertEqual(self.storage.prune_blobs(min_age=3600), (0, 0))
+        self.assertEqual(self.storage.prune_blobs(min_age=-1), (1, len(b"dropped")))
+        self.assertTrue(self.storage.exists(name))
+
+    def test_admin_uploads_hashed_and_deduplicated(self):
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        for title in ("First", "Second"):
+            response = self.client.post(reverse("wagtaildocs:add"), {
+                "title": title,
+                "file": SimpleUploadedFile("policy.pdf", b"%PDF-1.4 policy"),
+                "collection": 1,
+            })
+            self.assertEqual(response.status_code, 302)
+
+        first, second = get_document_model().objects.order_by("pk")
+        self.assertNotEqual(first.file.name, second.file.name)
+        self.assertEqual(os.stat(first.file.path).st_ino, os.stat(second.file.path).st_ino)
+        # The temporary uploads were moved or removed
+        self.assertEqual(sorted(os.listdir(self.media_root)), ["blobs", "documents"])
+
+
+class ServiceWorkerTestCase(TestCase):
+    """Test cases for the service worker written by collectstatic"""
+
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.static_root = tempfile.mkdtemp()
+        for name, content in (("css/site.css", "body {}"), ("js/site.js", "1;"), ("img/logo.svg", "<svg/>")):
+            os.makedirs(os.path.join(self.source, os.path.dirname(name)), exist_ok=True)
+            with open(os.path.join(self.source, name), "w") as f:
+                f.write(content)
+        settings_override = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            STATIC_ROOT=self.static_root,
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "core.storage.ServiceWorkerStaticFilesStorage"},
+            },
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def collectstatic(self):
+        call_command("collectstatic", interactive=False, verbosity=0)
+        with open(os.path.join(self.static_root, "sw.js")) as f:
+            return f.read()
+
+    def get_version(self, worker):
+        return worker.split("const VERSION = '")[1].split("'")[0]
+
+    def test_worker_precaches_hashed_files(self):
+        worker = self.collectstatic()
+        self.assertRegex(worker, r'"/static/css/site\.[0-9a-f]{12}\.css"')
+        self.assertRegex(worker, r'"/static/js/site\.[0-9a-f]{12}\.js"')
+        self.assertNotIn("logo", worker)
+        self.assertIn('"/api/stats/"', worker)
+
+        # Unchanged files keep the version, a changed one makes a new worker
+        version = self.get_version(worker)
+        self.assertEqual(self.get_version(self.collectstatic()), version)
+        with open(os.path.join(self.source, "css/site.css"), "w") as f:
+            f.write("body { margin: 0 }")
+        self.assertNotEqual(self.get_version(self.collectstatic()), version)
+
+    def test_worker_served_from_root(self):
+        template = Template("{% load service_worker %}{% service_worker_url %}")
+        self.assertEqual(template.render(Context()), "")
+        worker = self.collectstatic()
+        self.assertEqual(template.render(Context()), "/sw.js")
+
+        response = self.client.get(reverse("service_worker"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/javascript")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        self.assertEqual(response.content.decode(), worker)
+        response = self.client.get(reverse("service_worker"), headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+
+class PreloadTestCase(TestCase):
+    """Test cases for preload Link headers and 103 Early Hints"""
+
+    def setUp(self):
+        pagecache.invalidate()
+        cache.clear()
+
+    def test_page_links_preloaded(self):
+        response = self.client.get('/')
+        links = response['Link'].split(', ')
+        self.assertEqual(links[0], '</static/css/hr_pulse.css>; rel=preload; as=style')
+        self.assertIn('</static/css/advanced_theme.css>; rel=preload; as=style', links)
+        self.assertIn('</static/js/advanced_theme.js>; rel=preload; as=script', links)
+        self.assertContains(response, '<link rel="stylesheet" type="text/css" href="/static/css/bootstrap.min.css">')
+
+        # Page cache hits keep the header stored with the page
+        response = self.client.get('/')
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(response['Link'].split(', '), links)
+
+    def test_early_hints_from_learned_links(self):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        def get_response(request):
+            template = Template('{% load preload %}{% preload "/media/hero.jpg" "image" fetchpriority="high" %}')
+            template.render(Context({'request': request}))
+            return HttpResponse('<html></html>')
+
+        middleware = PreloadMiddleware(get_response)
+        request = RequestFactory().get('/careers/')
+        request.scope = {preload.EARLY_HINT_SCOPE_KEY: send}
+        response = middleware(request)
+        self.assertEqual(response['Link'], '</media/hero.jpg>; rel=preload; as=image; fetchpriority="high"')
+        self.assertEqual(sent, [])
+
+        # The next request for the URL gets the hints before the view runs
+        request = RequestFactory().get('/careers/')
+        request.scope = {preload.EARLY_HINT_SCOPE_KEY: send}
+        middleware(request)
+        self.assertEqual(sent, [{
+            'type': 'http.response.early_hint',
+            'links': [b'</media/hero.jpg>; rel=preload; as=image; fetchpriority="high"'],
+        }])
+
+        # Servers without the extension only get the header
+        self.assertFalse(preload.send_early_hints(RequestFactory().get('/careers/'), ['</a.css>']))
+
+
+class SitemapTestCase(TestCase):
+    """Test cases for the sharded, pre-written sitemaps"""
+
+    def setUp(self):
+        self.sitemap_root = tempfile.mkdtemp()
+        settings_override = override_settings(SITEMAP_ROOT=self.sitemap_root, SITEMAP_SHARD_SIZE=3)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Forget shards marked by earlier tests' rolled back transactions
+        sitemaps._pending.__dict__.clear()
+        self.home = Page.objects.get(depth=2)
+        self.site = Site.objects.get(is_default_site=True)
+        self.pages = [self.home.add_child(title=f'Page {i}', slug=f'page-{i}') for i in range(5)]
+
+    def read(self, name):
+        path = os.path.join(self.sitemap_root, str(self.site.pk), name)
+        if not os.path.exists(path):
+            return ''
+        with open(path) as f:
+            return f.read()
+
+    def test_build_writes_shards_and_index(self):
+        call_command('build_sitemaps', stdout=StringIO())
+        locations = []
+        for shard in range(max(page.pk for page in self.pages) // 3 + 1):
+            name = f'sitemap-{shard}.xml'
+            if self.read(name):
+                self.assertIn(f'<loc>http://localhost/{name}</loc>', self.read('sitemap.xml'))
+                locations += re.findall(r'<loc>([^<]+)</loc>', self.read(name))
+        self.assertEqual(
+            sorted(locations),
+            sorted(['http://localhost/'] + [f'http://localhost/page-{i}/' for i in range(5)]),
+        )
+
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content).decode(), self.read('sitemap.xml'))
+        self.assertEqual(self.client.get('/sitemap-999.xml').status_code, 404)
+
+    def test_publish_rewrites_only_its_shard(self):
+        call_command('build_sitemaps', stdout=StringIO())
+        page = self.pages[-1]
+        with mock.patch('core.sitemaps.write_shard', wraps=sitemaps.write_shard) as write_shard:
+            with self.captureOnCommitCallbacks(execute=True):
+                page.unpublish()
+        self.assertEqual([call.args[0] for call in write_shard.call_args_list], [page.pk // 3])
+        self.assertNotIn('page-4', self.read(f'sitemap-{page.pk // 3}.xml'))
+        self.assertIn('http://localhost/page-3/', self.read(f'sitemap-{self.pages[3].pk // 3}.xml'))
+
+        # A moved subtree rewrites the shards of every page in it
+        with mock.patch('core.sitemaps.write_shard', wraps=sitemaps.write_shard) as write_shard:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.pages[0].move(self.pages[1], pos='last-child')
+        self.assertEqual([call.args[0] for call in write_shard.call_args_list], [self.pages[0].pk // 3])
+        self.assertIn('http://localhost/page-1/page-0/', self.read(f'sitemap-{self.pages[0].pk // 3}.xml'))
+
+    def test_first_request_enqueues_build(self):
+        cache.delete(sitemaps.BUILD_REQUESTED_KEY)
+        with mock.patch('core.tasks.regenerate_sitemaps') as regenerate_sitemaps:
+            response = self.client.get('/sitemap.xml')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], str(sitemaps.BUILD_RETRY_AFTER))
+            self.assertEqual(self.client.get('/sitemap.xml').status_code, 503)
+        regenerate_sitemaps.enqueue.assert_called_once_with(None)
+
+        # The worker's build is served as XML
+        cache.delete(sitemaps.BUILD_REQUESTED_KEY)
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        self.assertIn('<sitemapindex', b''.join(response.streaming_content).decode())
+
+        with override_settings(SENDFILE_HEADER='X-Accel-Redirect', SENDFILE_URL='/protected/'):
+            response = self.client.get('/sitemap.xml')
+        self.assertEqual(response['Content-Type'], 'application/xml')
+
+
+class MemoryProfileTestCase(TestCase):
+    """Test cases for per-endpoint memory profiling and the RSS watchdog"""
+
+    def setUp(self):
+        self.spool_dir = tempfile.mkdtemp()
+        settings_override = override_settings(
+            MEMORY_PROFILING=True,
+            MEMORY_PROFILE_SPOOL_DIR=self.spool_dir,
+            MEMORY_PROFILE_AUTO_FLUSH=False,
+            MEMORY_PROFILE_SNAPSHOT_EVERY=2,
+            ADMISSION_CLASSES={},
+            SINGLE_FLIGHT_LOCK_DIR=tempfile.mkdtemp(),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        if not tracemalloc.is_tracing():
+            self.addCleanup(tracemalloc.stop)
+        memory.sampler.counts.clear()
+        # Pages served from the page cache are profiled as such
+        cache.clear()
+
+    def test_requests_summed_per_endpoint(self):
+        for __ in range(3):
+            self.assertEqual(self.client.get(reverse('search'), {'query': 'leave'}).status_code, 200)
+        home = Page.objects.get(depth=2)
+        landing = home.add_child(instance=Homepage(title='Careers', slug='careers'))
+        self.client.get(landing.url)
+
+        self.assertEqual(memory.flush(), 4)
+        search = EndpointMemory.objects.get(endpoint='search')
+        self.assertEqual(search.requests, 3)
+        # The first request and then every second one are sampled
+        self.assertEqual(search.snapshots, 2)
+        self.assertGreater(search.peak_max, 0)
+        self.assertGreaterEqual(search.peak_total, search.peak_max)
+        self.assertGreater(search.rss_max, 0)
+        self.assertTrue(all(
+            ':' in location and size > 0 for location, (size, __) in search.top_sites.items()
+        ))
+        self.assertTrue(EndpointMemory.objects.filter(endpoint='wagtail_serve:home.Homepage').exists())
+
+        # Later flushes add to the hour's row
+        self.client.get(reverse('search'))
+        call_command('flush_memory_profiles', stdout=StringIO())
+        self.assertEqual(EndpointMemory.objects.get(endpoint='search').requests, 4)
+
+    def test_off_by_default(self):
+        with override_settings(MEMORY_PROFILING=False):
+            client = self.client_class()
+            client.get(reverse('search'))
+        self.assertEqual(memory.flush(), 0)
+        self.assertFalse(os.listdir(self.spool_dir))
+
+    def test_report(self):
+        self.client.get(reverse('search'))
+        memory.flush()
+        user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(user)
+        response = self.client.get(reverse('memory_report'))
+        self.assertContains(response, 'search')
+        response = self.client.get(reverse('memory_report'), {'export': 'csv'})
+        self.assertIn('Top allocation sites', b''.join(response.streaming_content).decode())
+
+    def test_watchdog_retires_worker(self):
+        hooks = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'gunicorn.conf.py'))
+        worker = mock.Mock(alive=True, pid=123)
+
+        hooks['post_request'](worker, None, {}, None)
+        self.assertTrue(worker.alive)
+
+        with override_settings(MEMORY_WATCHDOG_MAX_RSS=1):
+            self.assertGreater(memory.over_limit(), 1)
+            hooks['post_request'](worker, None, {}, None)
+        self.assertFalse(worker.alive)
+        worker.log.warning.assert_called_once()
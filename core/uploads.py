@@ -0,0 +1,30 @@
+import hashlib
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+HASH_ALGORITHM = "sha256"
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream every uploaded file to a temporary file, hashing it chunk by
+    chunk as it arrives. The digest is left on the file as ``content_hash``
+    for ContentAddressedStorage, so a multi-GB upload is never held in
+    memory nor read back to be hashed.
+
+    FILE_UPLOAD_TEMP_DIR should be on the same filesystem as MEDIA_ROOT, so
+    saving the upload is a rename rather than a copy.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.new(HASH_ALGORITHM)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded_file = super().file_complete(file_size)
+        uploaded_file.content_hash = self.hasher.hexdigest()
+        return uploaded_file
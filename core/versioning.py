@@ -0,0 +1,70 @@
+import time
+
+from django.core.cache import cache
+
+from .singleflight import KeyLock
+
+
+class VersionStamp:
+    """
+    A counter in the shared cache that lets every worker process notice
+    that some in-memory structure was changed by another worker.
+
+    Reading the stamp is throttled to once per ``check_interval`` seconds so
+    that the hot path only touches process memory.
+    """
+
+    def __init__(self, name, check_interval=1.0):
+        self.key = f"hr_pulse:version:{name}"
+        self.check_interval = check_interval
+        self._cached = None
+        self._checked_at = 0.0
+
+    def get(self, force=False):
+        now = time.monotonic()
+        if force or self._cached is None or now - self._checked_at >= self.check_interval:
+            self._cached = cache.get(self.key, 0)
+            self._checked_at = now
+        return self._cached
+
+    def bump(self):
+        # incr() is a get() + set() on the file cache, so two workers bumping
+        # at once could both get the same version and one payload would be
+        # lost. The lock makes it atomic across the host's workers; if it
+        # can't be had in time, bumping unlocked still beats not bumping.
+        lock = KeyLock(f"{self.key}:bump")
+        locked = lock.acquire(timeout=5)
+        try:
+            try:
+                version = cache.incr(self.key)
+            except ValueError:
+                # Missing key; start the counter
+                cache.add(self.key, 0, timeout=None)
+                version = cache.incr(self.key)
+            # Some backends implement incr() as get() + set() with the
+            # default timeout, so make sure the stamp never expires
+            cache.touch(self.key, timeout=None)
+        finally:
+            if locked:
+                lock.release()
+        self._cached = version
+        self._checked_at = time.monotonic()
+        return version
+
+    def set_payload(self, version, payload, timeout=300):
+        """
+        Attach a small description of the change made at ``version`` so
+        other workers can apply it incrementally instead of reloading.
+        """
+        cache.set(f"{self.key}:{version}", payload, timeout)
+
+    def get_payloads(self, since, until):
+        """
+        Return the payloads for versions in (since, until], or None if any
+        of them is missing and a full reload is required.
+        """
+        keys = [f"{self.key}:{version}" for version in range(since + 1, until + 1)]
+        found = cache.get_many(keys)
+        if len(found) != len(keys):
+            return None
+        return [found[key] for key in keys]
@@ -0,0 +1,28 @@
+from django.urls import path, reverse
+from wagtail import hooks
+from wagtail.admin.menu import MenuItem
+
+from .reports import MemoryReportView
+
+
+@hooks.register("register_admin_urls")
+def register_memory_urls():
+    return [
+        path("reports/memory/", MemoryReportView.as_view(), name="memory_report"),
+        path(
+            "reports/memory/results/",
+            MemoryReportView.as_view(results_only=True),
+            name="memory_report_results",
+        ),
+    ]
+
+
+@hooks.register("register_reports_menu_item")
+def register_memory_menu_item():
+    return MenuItem(
+        "Memory",
+        reverse("memory_report"),
+        name="memory",
+        icon_name="warning",
+        order=1020,
+    )
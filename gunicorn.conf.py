@@ -0,0 +1,15 @@
+# Loaded by gunicorn from the working directory (see the Dockerfile)
+
+
+def post_request(worker, req, environ, resp):
+    """
+    Retire a worker whose memory grew past MEMORY_WATCHDOG_MAX_RSS. With
+    ``alive`` unset it accepts no more requests, finishes the ones in
+    flight and exits, and the master replaces it.
+    """
+    from core.memory import over_limit
+
+    rss = over_limit()
+    if rss is not None and worker.alive:
+        worker.log.warning("Worker %s using %d MB, recycling", worker.pid, rss // (1024 * 1024))
+        worker.alive = False
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from home.models import Homepage
+from home.snapshots import build_snapshot, delete_snapshot
+
+
+class Command(BaseCommand):
+    help = "Rebuild the published snapshot of every Homepage"
+
+    def handle(self, *args, **options):
+        built = 0
+        for page in Homepage.objects.iterator():
+            if page.live:
+                build_snapshot(page)
+                built += 1
+            else:
+                delete_snapshot(page)
+        self.stdout.write(self.style.SUCCESS(f"Built {built} homepage snapshot(s)"))
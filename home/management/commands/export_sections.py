@@ -0,0 +1,43 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.sections_io import SECTIONS, iter_export_rows, write_rows
+
+
+class Command(BaseCommand):
+    help = "Stream landing-page section rows out as JSONL or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Output file, or - for stdout")
+        parser.add_argument("--format", choices=["jsonl", "csv"])
+        parser.add_argument(
+            "--section",
+            action="append",
+            choices=list(SECTIONS),
+            help="Only export this section (repeatable)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, path, **options):
+        fmt = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+        sections = options["section"] or list(SECTIONS)
+        stream = sys.stdout if path == "-" else open(path, "w", newline="", encoding="utf-8")
+
+        started = time.perf_counter()
+        try:
+            total = write_rows(
+                stream, iter_export_rows(sections, options["chunk_size"]), fmt
+            )
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        elapsed = time.perf_counter() - started
+
+        rate = total / elapsed if elapsed else total
+        # Report on stderr so exporting to stdout stays clean
+        self.stderr.write(
+            f"Exported {total} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)",
+            style_func=self.style.SUCCESS,
+        )
@@ -0,0 +1,57 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import pagecache
+from home.models import Homepage
+from home.sections_io import SectionImportError, import_rows, read_rows
+from home.snapshots import build_snapshot
+
+
+class Command(BaseCommand):
+    help = "Stream landing-page section rows (JSONL or CSV) into the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file, or - for stdin")
+        parser.add_argument("--format", choices=["jsonl", "csv"])
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, path, **options):
+        fmt = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+
+        started = time.perf_counter()
+        touched = set()
+        try:
+            total, touched = import_rows(
+                read_rows(stream, fmt),
+                chunk_size=options["chunk_size"],
+                batch_size=options["batch_size"],
+                touched=touched,
+            )
+        except SectionImportError as e:
+            raise CommandError(str(e))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            # Chunks committed before a failure stay, so their pages are
+            # refreshed either way
+            self.refresh(touched)
+        elapsed = time.perf_counter() - started
+
+        rate = total / elapsed if elapsed else total
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {total} rows for {len(touched)} page(s) "
+                f"in {elapsed:.2f}s ({rate:,.0f} rows/s)"
+            )
+        )
+
+    def refresh(self, touched):
+        # bulk_create skips signals, so refresh the snapshots once per page
+        for page in Homepage.objects.filter(pk__in=touched, live=True):
+            build_snapshot(page)
+        if touched:
+            pagecache.invalidate()
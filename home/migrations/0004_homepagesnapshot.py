@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0003_alter_homepage_options_homepage_body_benefit_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HomepageSnapshot",
+            fields=[
+                ("page", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name="snapshot", serialize=False, to="home.homepage")),
+                ("data", models.JSONField(default=dict)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0004_homepagesnapshot"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="testimonial",
+            index=models.Index(fields=["landing_page", "rating", "id"], name="testimonial_page_rating_id"),
+        ),
+        migrations.AddIndex(
+            model_name="testimonial",
+            index=models.Index(fields=["rating", "id"], name="testimonial_rating_id"),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def enqueue_snapshots(apps, schema_editor):
+    """
+    Queue a snapshot build for every live Homepage published before
+    snapshots existed. The build runs the current code, so it is left to
+    the task worker, after every migration is applied. Backends that run
+    tasks inline (development, tests) skip it; pages without a snapshot
+    build one when first served.
+    """
+    from django_tasks import default_task_backend
+
+    from home.tasks import build_homepage_snapshot
+
+    if not default_task_backend.supports_defer:
+        return
+    Homepage = apps.get_model("home", "Homepage")
+    page_ids = Homepage.objects.filter(live=True, snapshot__isnull=True).values_list("pk", flat=True)
+    task = build_homepage_snapshot.using(run_after=timezone.now())
+    for page_id in page_ids.iterator():
+        task.enqueue(page_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("home", "0005_testimonial_keyset_indexes"),
+        ("taskqueue", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(enqueue_snapshots, migrations.RunPython.noop),
+    ]
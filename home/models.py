@@ -37,6 +37,31 @@ class Homepage(Page):
         FieldPanel("body"),
     ]
 
+    def get_snapshot(self):
+        """
+        Return the published read model, building it if it is missing
+        """
+        from .snapshots import build_snapshot, get_snapshot
+
+        data = get_snapshot(self.pk)
+        if data is None and self.live:
+            data = build_snapshot(self)
+        return data
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        # The template renders from the snapshot alone, never from the body
+        # or the section relations. Previews show the unpublished draft, so
+        # theirs is built on the fly and not stored.
+        from .snapshots import build_snapshot_data, has_content
+
+        if getattr(request, "is_preview", False):
+            context["snapshot"] = build_snapshot_data(self)
+        else:
+            context["snapshot"] = self.get_snapshot()
+        context["show_welcome"] = not has_content(context["snapshot"])
+        return context
+
     class Meta:
         verbose_name = "Homepage"
         verbose_name_plural = "Homepages"
@@ -117,6 +142,13 @@ class Testimonial(models.Model):
     content = models.TextField()
     rating = models.IntegerField(default=5)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination for the testimonials API seeks on these
+            models.Index(fields=['landing_page', 'rating', 'id'], name='testimonial_page_rating_id'),
+            models.Index(fields=['rating', 'id'], name='testimonial_rating_id'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.rating}⭐"
 
@@ -151,3 +183,20 @@ class CTASection(models.Model):
 
     def __str__(self):
         return f"CTA for {getattr(self.landing_page, 'title', 'Untitled Page')}"
+
+
+# -------------------------------
+# Published Snapshot Model
+# -------------------------------
+class HomepageSnapshot(models.Model):
+    """
+    Denormalized, pre-resolved copy of a published Homepage and its sections
+    """
+    page = models.OneToOneField(
+        Homepage, on_delete=models.CASCADE, primary_key=True, related_name='snapshot'
+    )
+    data = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot for {getattr(self.page, 'title', 'Untitled Page')}"
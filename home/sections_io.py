@@ -0,0 +1,166 @@
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Benefit, Feature, Homepage, PricingPlan, Stat, Testimonial
+
+# Section name -> (model, exported fields). Every row also carries the
+# section name and the slug of the Homepage it belongs to.
+SECTIONS = {
+    "stat": (Stat, ["value", "label"]),
+    "feature": (Feature, ["title", "description", "icon"]),
+    "benefit": (Benefit, ["title", "description", "icon"]),
+    "testimonial": (Testimonial, ["name", "role", "content", "rating"]),
+    "pricing_plan": (PricingPlan, ["name", "price", "features", "most_popular"]),
+}
+
+CSV_COLUMNS = ["section", "page"] + sorted(
+    {field for __, fields in SECTIONS.values() for field in fields}
+)
+
+
+class SectionImportError(Exception):
+    pass
+
+
+# -------------------------------
+# Readers / writers
+# -------------------------------
+def read_rows(stream, fmt):
+    """
+    Lazily yield one dict per input row
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise SectionImportError(f"Line {line_number}: invalid JSON ({e})")
+        if not isinstance(row, dict):
+            raise SectionImportError(f"Line {line_number}: expected a JSON object")
+        yield row
+
+
+def iter_export_rows(sections, chunk_size=2000):
+    """
+    Yield section rows with the page slug, streaming from the database
+    """
+    for section in sections:
+        model, fields = SECTIONS[section]
+        queryset = model.objects.order_by("pk").values_list(
+            "landing_page__slug", *fields
+        )
+        for values in queryset.iterator(chunk_size=chunk_size):
+            row = {"section": section, "page": values[0]}
+            row.update(zip(fields, values[1:]))
+            yield row
+
+
+def write_rows(stream, rows, fmt):
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            stream.write(json.dumps(row, ensure_ascii=False))
+            stream.write("\n")
+            count += 1
+    return count
+
+
+# -------------------------------
+# Import
+# -------------------------------
+def build_page_map():
+    """
+    Map Homepage slugs to ids with one query. Slugs are only unique among
+    siblings, so duplicated slugs are tracked and rejected when used.
+    """
+    page_map = {}
+    duplicates = set()
+    for page_id, slug in Homepage.objects.values_list("id", "slug").iterator():
+        if slug in page_map:
+            duplicates.add(slug)
+        page_map[slug] = page_id
+    return page_map, duplicates
+
+
+def _coerce(model, fields, row):
+    values = {}
+    for name in fields:
+        if name not in row:
+            continue
+        field = model._meta.get_field(name)
+        value = row[name]
+        if value == "" and field.null:
+            value = None
+        values[name] = field.to_python(value)
+    return values
+
+
+def build_instance(row, page_map, duplicates):
+    section = row.get("section")
+    if section not in SECTIONS:
+        raise SectionImportError(f"Unknown section {section!r}")
+    slug = row.get("page")
+    if slug in duplicates:
+        raise SectionImportError(f"Page slug {slug!r} is ambiguous")
+    if slug not in page_map:
+        raise SectionImportError(f"Unknown page {slug!r}")
+
+    model, fields = SECTIONS[section]
+    try:
+        values = _coerce(model, fields, row)
+    except ValidationError as e:
+        raise SectionImportError("; ".join(e.messages))
+    return model(landing_page_id=page_map[slug], **values)
+
+
+def import_rows(rows, chunk_size=5000, batch_size=1000, touched=None):
+    """
+    Insert rows with bulk_create, one transaction per chunk. Only one chunk
+    is held in memory at a time. Returns (row count, touched page ids).
+
+    The ids of pages in committed chunks are added to ``touched`` as they
+    commit, so a caller still sees them when a later chunk fails.
+    """
+    page_map, duplicates = build_page_map()
+    rows = iter(rows)
+    total = 0
+    if touched is None:
+        touched = set()
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        by_model = {}
+        page_ids = set()
+        for offset, row in enumerate(chunk, start=total + 1):
+            try:
+                instance = build_instance(row, page_map, duplicates)
+            except SectionImportError as e:
+                raise SectionImportError(f"Row {offset}: {e}")
+            by_model.setdefault(type(instance), []).append(instance)
+            page_ids.add(instance.landing_page_id)
+
+        with transaction.atomic():
+            for model, instances in by_model.items():
+                model.objects.bulk_create(instances, batch_size=batch_size)
+        touched.update(page_ids)
+        total += len(chunk)
+
+    return total, touched
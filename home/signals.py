@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished
+
+from core import pagecache
+
+from .models import (
+    Benefit,
+    CTASection,
+    Feature,
+    HeroSection,
+    Homepage,
+    PricingPlan,
+    Stat,
+    Testimonial,
+)
+from .snapshots import delete_snapshot
+from .tasks import build_homepage_snapshot
+
+SECTION_MODELS = [HeroSection, Stat, Feature, Benefit, Testimonial, PricingPlan, CTASection]
+
+
+def rebuild_on_publish(sender, instance, **kwargs):
+    build_homepage_snapshot.enqueue(instance.pk)
+
+
+def delete_on_unpublish(sender, instance, **kwargs):
+    delete_snapshot(instance)
+
+
+def rebuild_on_section_change(sender, instance, **kwargs):
+    """
+    Section rows live outside page revisions, so refresh the snapshot of a
+    live page whenever one of them changes
+    """
+    origin = kwargs.get("origin")
+    if isinstance(origin, Page) or (
+        isinstance(origin, QuerySet) and issubclass(origin.model, Page)
+    ):
+        # Cascading from a page deletion; the snapshot goes with the page
+        return
+    if Homepage.objects.filter(pk=instance.landing_page_id, live=True).exists():
+        build_homepage_snapshot.enqueue(instance.landing_page_id)
+        transaction.on_commit(pagecache.invalidate)
+
+
+def register_signal_handlers():
+    page_published.connect(rebuild_on_publish, sender=Homepage)
+    page_unpublished.connect(delete_on_unpublish, sender=Homepage)
+    for model in SECTION_MODELS:
+        post_save.connect(rebuild_on_section_change, sender=model)
+        post_delete.connect(rebuild_on_section_change, sender=model)
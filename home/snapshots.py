@@ -0,0 +1,165 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
+from wagtail import blocks
+from wagtail.images.blocks import ImageChooserBlock
+
+from .models import HomepageSnapshot
+
+# Rendition filter specs resolved for every image found in the page body.
+# The snapshot stores the resulting URLs so nothing is generated on read.
+IMAGE_RENDITIONS = {
+    "large": "max-1600x1200",
+    "medium": "max-800x600",
+    "thumbnail": "fill-320x240",
+}
+
+
+# -------------------------------
+# StreamField serialization
+# -------------------------------
+def serialize_image(image):
+    """
+    Resolve an image and its renditions into plain URLs
+    """
+    if image is None:
+        return None
+
+    renditions = image.get_renditions(*IMAGE_RENDITIONS.values())
+    return {
+        "id": image.pk,
+        "title": image.title,
+        "alt": getattr(image, "default_alt_text", "") or image.title,
+        "width": image.width,
+        "height": image.height,
+        "url": image.file.url,
+        "renditions": {
+            name: {
+                "url": renditions[spec].url,
+                "width": renditions[spec].width,
+                "height": renditions[spec].height,
+            }
+            for name, spec in IMAGE_RENDITIONS.items()
+        },
+    }
+
+
+def serialize_block(block, value):
+    """
+    Recursively turn a block value into JSON-ready data
+    """
+    if isinstance(block, ImageChooserBlock):
+        return serialize_image(value)
+    if isinstance(block, blocks.StructBlock):
+        return {
+            name: serialize_block(child_block, value.get(name))
+            for name, child_block in block.child_blocks.items()
+        }
+    if isinstance(block, blocks.ListBlock):
+        return [serialize_block(block.child_block, item) for item in value or []]
+    return block.get_prep_value(value)
+
+
+def serialize_body(page):
+    return [
+        {
+            "type": child.block_type,
+            "id": child.id,
+            "value": serialize_block(child.block, child.value),
+        }
+        for child in page.body or []
+    ]
+
+
+# -------------------------------
+# Section relations
+# -------------------------------
+def _one_to_one(page, related_name, fields):
+    try:
+        section = getattr(page, related_name)
+    except ObjectDoesNotExist:
+        return None
+    data = {field: getattr(section, field) for field in fields}
+    if "background_image" in data:
+        image = data["background_image"]
+        data["background_image"] = image.url if image else None
+    return data
+
+
+def serialize_sections(page):
+    return {
+        "hero": _one_to_one(
+            page,
+            "hero",
+            ["title", "subtitle", "background_image", "cta_text", "cta_link"],
+        ),
+        "stats": list(page.stats.order_by("pk").values("value", "label")),
+        "features": list(
+            page.features.order_by("pk").values("title", "description", "icon")
+        ),
+        "benefits": list(
+            page.benefits.order_by("pk").values("title", "description", "icon")
+        ),
+        "testimonials": list(
+            page.testimonials.order_by("pk").values("name", "role", "content", "rating")
+        ),
+        "pricing": list(
+            page.pricing.order_by("pk").values(
+                "name", "price", "features", "most_popular"
+            )
+        ),
+        "cta": _one_to_one(
+            page, "cta", ["title", "subtitle", "cta_text", "cta_link"]
+        ),
+    }
+
+
+# -------------------------------
+# Snapshot build / read
+# -------------------------------
+def build_snapshot_data(page):
+    """
+    Build the denormalized read model for a Homepage
+    """
+    return {
+        "id": page.pk,
+        "title": page.title,
+        "seo_title": page.seo_title,
+        "search_description": page.search_description,
+        "slug": page.slug,
+        "url": page.get_url(),
+        "last_published_at": (
+            page.last_published_at.isoformat() if page.last_published_at else None
+        ),
+        "built_at": timezone.now().isoformat(),
+        "body": serialize_body(page),
+        "sections": serialize_sections(page),
+    }
+
+
+def build_snapshot(page):
+    """
+    Build and store the snapshot for a live Homepage
+    """
+    data = build_snapshot_data(page)
+    HomepageSnapshot.objects.update_or_create(page_id=page.pk, defaults={"data": data})
+    return data
+
+
+def delete_snapshot(page):
+    HomepageSnapshot.objects.filter(page_id=page.pk).delete()
+
+
+def has_content(data):
+    """Whether a snapshot has a body block or any section to show"""
+    return bool(data and (data["body"] or any(data["sections"].values())))
+
+
+def get_snapshot(page_id):
+    """
+    Read a stored snapshot with a single primary key lookup
+    """
+    return (
+        HomepageSnapshot.objects.filter(page_id=page_id)
+        .values_list("data", flat=True)
+        .first()
+    )
@@ -0,0 +1,23 @@
+from django.db import transaction
+from django_tasks import task
+
+from core import pagecache
+
+from .models import Homepage, HomepageSnapshot
+from .snapshots import build_snapshot
+
+
+@task(priority=10)
+def build_homepage_snapshot(page_id):
+    """
+    Rebuild the snapshot of a Homepage, generating its image renditions,
+    or drop it if the page is no longer live
+    """
+    page = Homepage.objects.filter(pk=page_id, live=True).first()
+    if page is None:
+        HomepageSnapshot.objects.filter(page_id=page_id).delete()
+    else:
+        build_snapshot(page)
+    # Cached snapshot API responses predate the rebuild. Run inline by the
+    # immediate backend, this is still inside the change's transaction.
+    transaction.on_commit(pagecache.invalidate)
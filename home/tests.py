@@ -1,5 +1,15 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.core.management.base import CommandError
 from django.urls import reverse
-from home.models import HomePage
+from home.models import Homepage as HomePage, HomepageSnapshot, PricingPlan, Stat
 
 from wagtail.models import Page
 from wagtail.test.utils import WagtailPageTestCase
@@ -41,3 +51,127 @@ class HomeTests(WagtailPageTestCase):
     def test_homepage_template_used(self):
         response = self.client.get(reverse("home"))
         self.assertTemplateUsed(response, "home/home_page.html")
+
+
+class HomepageSnapshotTests(WagtailPageTestCase):
+    """
+    Tests for the published Homepage snapshot read model.
+    """
+
+    def setUp(self):
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Snapshot", slug="snapshot", live=False)
+        root_page.add_child(instance=self.homepage)
+        Stat.objects.create(landing_page=self.homepage, value="150", label="Clients")
+
+    def test_snapshot_built_on_publish(self):
+        self.homepage.save_revision().publish()
+        snapshot = HomepageSnapshot.objects.get(page=self.homepage)
+        self.assertEqual(snapshot.data["title"], "Snapshot")
+        self.assertEqual(
+            snapshot.data["sections"]["stats"], [{"value": "150", "label": "Clients"}]
+        )
+
+    def test_snapshot_refreshed_on_section_change(self):
+        self.homepage.save_revision().publish()
+        Stat.objects.create(landing_page=self.homepage, value="98", label="Satisfaction")
+        snapshot = HomepageSnapshot.objects.get(page=self.homepage)
+        self.assertEqual(len(snapshot.data["sections"]["stats"]), 2)
+
+    def test_snapshot_removed_on_unpublish(self):
+        self.homepage.save_revision().publish()
+        self.homepage.refresh_from_db()
+        self.homepage.unpublish()
+        self.assertFalse(HomepageSnapshot.objects.filter(page=self.homepage).exists())
+
+    def test_snapshot_api(self):
+        url = reverse("api_homepage_snapshot", args=[self.homepage.pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.homepage.save_revision().publish()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], self.homepage.pk)
+
+
+    def test_page_rendered_from_snapshot(self):
+        self.homepage.save_revision().publish()
+        page = HomePage.objects.get(pk=self.homepage.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = page.serve(RequestFactory().get("/snapshot/")).render()
+        self.assertContains(response, '<span class="stat-number">150</span> Clients')
+        self.assertNotContains(response, "Welcome to your new Wagtail site")
+        self.assertFalse([query for query in queries if "home_stat" in query["sql"]])
+
+    def test_missing_snapshot_built_on_read(self):
+        self.homepage.save_revision().publish()
+        HomepageSnapshot.objects.all().delete()
+        url = reverse("api_homepage_snapshot", args=[self.homepage.pk])
+        self.assertEqual(self.client.get(url).json()["sections"]["stats"][0]["label"], "Clients")
+        self.assertTrue(HomepageSnapshot.objects.filter(page=self.homepage).exists())
+
+
+class SectionImportExportTests(WagtailPageTestCase):
+    """
+    Tests for the import_sections / export_sections commands.
+    """
+
+    def setUp(self):
+        root_page = Page.objects.get(pk=1)
+        self.homepage = HomePage(title="Landing", slug="landing")
+        root_page.add_child(instance=self.homepage)
+        Stat.objects.create(landing_page=self.homepage, value="24", label="Countries")
+        PricingPlan.objects.create(
+            landing_page=self.homepage, name="Pro", price="$10", features="All", most_popular=True
+        )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def round_trip(self, filename):
+        path = os.path.join(self.tmpdir.name, filename)
+        call_command("export_sections", path, stderr=StringIO())
+        Stat.objects.all().delete()
+        PricingPlan.objects.all().delete()
+        call_command("import_sections", path, stdout=StringIO())
+
+    def test_jsonl_round_trip(self):
+        self.round_trip("sections.jsonl")
+        self.assertEqual(Stat.objects.get().label, "Countries")
+        self.assertTrue(PricingPlan.objects.get().most_popular)
+
+    def test_csv_round_trip(self):
+        self.round_trip("sections.csv")
+        self.assertEqual(Stat.objects.get().landing_page_id, self.homepage.pk)
+        self.assertTrue(PricingPlan.objects.get().most_popular)
+
+    def test_import_refreshes_snapshot(self):
+        self.round_trip("sections.jsonl")
+        snapshot = HomepageSnapshot.objects.get(page=self.homepage)
+        self.assertEqual(snapshot.data["sections"]["stats"][0]["label"], "Countries")
+
+    def test_unknown_page_rejected(self):
+        path = os.path.join(self.tmpdir.name, "bad.jsonl")
+        with open(path, "w") as f:
+            f.write('{"section": "stat", "page": "missing", "value": "1", "label": "x"}\n')
+        with self.assertRaisesMessage(CommandError, "Unknown page"):
+            call_command("import_sections", path)
+
+    def test_failed_chunk_refreshes_committed_pages(self):
+        path = os.path.join(self.tmpdir.name, "partial.jsonl")
+        with open(path, "w") as f:
+            f.write('{"section": "stat", "page": "landing", "value": "7", "label": "Offices"}\n')
+            f.write('{"section": "stat", "page": "missing", "value": "1", "label": "x"}\n')
+        with mock.patch("core.pagecache.invalidate") as invalidate:
+            with self.assertRaisesMessage(CommandError, "Row 2: Unknown page"):
+                call_command("import_sections", path, chunk_size=1)
+        invalidate.assert_called_once_with()
+        snapshot = HomepageSnapshot.objects.get(page=self.homepage)
+        self.assertIn("Offices", [stat["label"] for stat in snapshot.data["sections"]["stats"]])
+
+    def test_non_object_row_rejected(self):
+        path = os.path.join(self.tmpdir.name, "list.jsonl")
+        with open(path, "w") as f:
+            f.write('["stat", "landing"]\n')
+        with self.assertRaisesMessage(CommandError, "Line 1: expected a JSON object"):
+            call_command("import_sections", path)
+
@@ -0,0 +1,26 @@
+"""
+ASGI config for hr_pulse project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Long-lived responses such as the /api/stats/stream/ event stream only stay
+open when served from here, e.g. by an ASGI server in front of
+hr_pulse.asgi:application; under WSGI they fall back to client polling.
+Servers supporting the ASGI Early Hints extension also get 103 responses
+for pages (see core/preload.py).
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+"""
+
+import os
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hr_pulse.settings.dev")
+
+# What get_asgi_application() does, with the Early Hints aware handler
+django.setup(set_prefix=False)
+
+from core.asgi import ASGIHandler  # noqa: E402
+
+application = ASGIHandler()
@@ -28,6 +28,10 @@ INSTALLED_APPS = [
     "home",
     "search",
     "theme_plugin",
+    "core",
+    "analytics",
+    "submissions",
+    "taskqueue",
     "wagtail.contrib.forms",
     "wagtail.contrib.redirects",
     "wagtail.embeds",
@@ -42,6 +46,7 @@ INSTALLED_APPS = [
     "modelcluster",
     "taggit",
     "django_filters",
+    "django_tasks",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -51,14 +56,37 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Memory used per endpoint, when MEMORY_PROFILING is on (see core/memory.py)
+    "core.middleware.MemoryProfileMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # Rate and concurrency limits for search and the API (see core/admission.py)
+    "core.middleware.AdmissionControlMiddleware",
+    # Reads go to a replica unless the request must see the primary (core/replicas.py)
+    "core.middleware.ReplicaRoutingMiddleware",
+    # Views marked stateless (core.routing.stateless) leave the stack here
+    "core.middleware.StatelessRouteMiddleware",
+    # Resolves the wagtail Site from memory for the rest of the stack
+    "core.middleware.SiteResolverMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
+    # Serves anonymous page views from the cache (see core/pagecache.py)
+    "core.middleware.PageCacheMiddleware",
+    # Link preload headers and 103 Early Hints for pages (see core/preload.py),
+    # inside the page cache so cached pages keep their Link header
+    "core.middleware.PreloadMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "wagtail.contrib.redirects.middleware.RedirectMiddleware",
+    # Serves wagtail redirects from an in-memory table (see core/redirects.py)
+    "core.middleware.CompiledRedirectMiddleware",
+]
+
+# The whole chain for views marked stateless, replacing the rest of MIDDLEWARE
+STATELESS_MIDDLEWARE = [
+    # ETags on API responses, and 304s for clients revalidating their cached
+    # copy (js/hr_data.js)
+    "django.middleware.http.ConditionalGetMiddleware",
 ]
 
 ROOT_URLCONF = "hr_pulse.urls"
@@ -94,6 +122,29 @@ DATABASES = {
     }
 }
 
+# Read replicas: add them to DATABASES and list their aliases here, e.g.
+#   DATABASES["replica"] = {..., "TEST": {"MIRROR": "default"}}
+#   DATABASE_REPLICAS = ["replica"]
+# Writes, and reads by a client for REPLICA_PIN_SECONDS after it wrote or
+# anyone just after a publish, go to "default".
+DATABASE_ROUTERS = ["core.replicas.ReplicaRouter"]
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = 10
+REPLICA_PRIMARY_PATHS = ["/admin/", "/django-admin/"]
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# A file-based cache is shared by every worker process on the host, which the
+# cross-worker version stamps in core/versioning.py rely on.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(BASE_DIR, "cache"),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -141,6 +192,18 @@ STATICFILES_DIRS = [
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
 STATIC_URL = "/static/"
 
+# Service worker written by collectstatic in production (see
+# core.storage.ServiceWorkerStaticFilesStorage): static files precached on
+# install, matched against their unhashed names
+SERVICE_WORKER_PRECACHE = ["css/*.css", "js/*.js"]
+# API payloads it serves from cache and revalidates in the background
+SERVICE_WORKER_API_ROUTES = [
+    "/api/features/",
+    "/api/benefits/",
+    "/api/stats/",
+    "/theme/api/modal-content/",
+]
+
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 MEDIA_URL = "/media/"
 
@@ -148,7 +211,7 @@ MEDIA_URL = "/media/"
 # See https://docs.djangoproject.com/en/5.2/ref/settings/#std-setting-STORAGES
 STORAGES = {
     "default": {
-        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "BACKEND": "core.storage.ContentAddressedStorage",
     },
     "staticfiles": {
         "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
@@ -159,6 +222,12 @@ STORAGES = {
 # can exceed this limit within Wagtail's page editor.
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 10_000
 
+# Uploads are streamed to disk and hashed as they arrive (core/uploads.py),
+# then stored once per distinct content (core/storage.py). Point
+# FILE_UPLOAD_TEMP_DIR at a directory on the same filesystem as MEDIA_ROOT so
+# storing an upload is a rename rather than a copy.
+FILE_UPLOAD_HANDLERS = ["core.uploads.HashingUploadHandler"]
+
 
 # Wagtail settings
 
@@ -192,3 +261,166 @@ WAGTAILDOCS_EXTENSIONS = [
     "xlsx",
     "zip",
 ]
+
+# Document downloads (core/documents.py). Set SENDFILE_HEADER to
+# "X-Accel-Redirect" (nginx, with an internal location serving SENDFILE_ROOT
+# at SENDFILE_URL) or "X-Sendfile" (Apache mod_xsendfile) to let the front
+# proxy send documents; otherwise workers stream them with Range and
+# conditional request support.
+SENDFILE_BACKEND = "core.documents"
+SENDFILE_HEADER = None
+SENDFILE_ROOT = MEDIA_ROOT
+SENDFILE_URL = "/protected-media/"
+
+# Sitemap index and shards per site (core/sitemaps.py), written by
+# build_sitemaps (or by the task worker when a site without one is requested) and
+# rewritten shard by shard as pages are published.
+# Page pk // SITEMAP_SHARD_SIZE picks a page's shard; 50,000 is the most
+# URLs a sitemap file may hold. Kept under SENDFILE_ROOT so the front proxy
+# can send them.
+SITEMAP_ROOT = os.path.join(MEDIA_ROOT, "sitemaps")
+SITEMAP_SHARD_SIZE = 50_000
+
+# Pattern redirects checked after the exact wagtail redirects, as
+# (regex, replacement[, is_permanent]) tuples matched against the path.
+REDIRECT_PATTERNS = []
+
+# Full-page cache for anonymous visitors (core/pagecache.py)
+PAGE_CACHE_TIMEOUT = 300
+PAGE_CACHE_EXCLUDED_PATHS = ["/admin/", "/django-admin/", "/documents/", "/search/"]
+# Serve an expired page for this long while one request regenerates it, and
+# how long other requests wait for that regeneration when nothing is cached
+PAGE_CACHE_STALE_TIMEOUT = 60
+PAGE_CACHE_LOCK_WAIT = 2.0
+
+# Preload hints registered while rendering a page become its Link header
+# (core/preload.py), up to PRELOAD_MAX_LINKS of them. They are remembered
+# per URL for PRELOAD_MANIFEST_TIMEOUT to send as 103 Early Hints.
+PRELOAD_MAX_LINKS = 12
+PRELOAD_MANIFEST_TIMEOUT = 24 * 60 * 60
+
+# Lock files used to coordinate cache regeneration between worker processes
+# (core/singleflight.py)
+SINGLE_FLIGHT_LOCK_DIR = os.path.join(BASE_DIR, "cache", "locks")
+
+# Search result ids and API payloads, cached until published content changes
+SEARCH_CACHE_TIMEOUT = 300
+# Set to cap how many result ids a query keeps (the search page says so)
+SEARCH_CACHE_MAX_RESULTS = None
+API_CACHE_TIMEOUT = 60
+
+# Text extracted from documents for the site search (search/extract.py), in
+# SEARCH_EXTRACTION_PROCESSES processes (default: one per CPU), each document
+# limited in time and memory. PDFs need the optional pypdf package.
+SEARCH_EXTRACTION_PROCESSES = None
+SEARCH_EXTRACTION_TIMEOUT = 30
+SEARCH_EXTRACTION_MEMORY_LIMIT = 512 * 1024 * 1024
+SEARCH_DOCUMENT_MAX_CHARS = 200_000
+SEARCH_DOCUMENT_RESULTS = 5
+
+# Token buckets and concurrency limits per endpoint class (core/admission.py).
+# ``rate`` and ``burst`` size each client's token bucket (tokens per second,
+# bucket size), ``global_rate``/``global_burst`` the bucket shared by all
+# clients, and ``concurrency`` caps requests in flight across every worker;
+# all must be above 0. Paths of no class are not limited.
+# Behind a proxy REMOTE_ADDR is the proxy's, so every client would share
+# one bucket: set ADMISSION_CLIENT_IP_HEADER (e.g. "HTTP_X_FORWARDED_FOR")
+# and ADMISSION_TRUSTED_PROXIES to the number of proxies that append to it.
+# The client is that many addresses from the right of the header; the ones
+# further left are sent by the client. Without a header REMOTE_ADDR
+# identifies the client.
+ADMISSION_CLASSES = {
+    # Page view beacons are tiny and frequent; listed before "api" so they
+    # don't draw from its buckets
+    "beacon": {
+        "paths": ["/api/analytics/beacon/"],
+        "rate": 2,
+        "burst": 20,
+        "global_rate": 5000,
+        "global_burst": 10000,
+        "concurrency": 32,
+    },
+    "search": {
+        "paths": ["/search/"],
+        "rate": 1,
+        "burst": 10,
+        "global_rate": 20,
+        "global_burst": 60,
+        "concurrency": 2,
+    },
+    "api": {
+        "paths": ["/api/"],
+        "rate": 5,
+        "burst": 30,
+        "global_rate": 100,
+        "global_burst": 300,
+        "concurrency": 4,
+    },
+}
+ADMISSION_CLIENT_IP_HEADER = None
+ADMISSION_TRUSTED_PROXIES = 1
+
+# Stats event stream (api/stats.py): how often the per-process producer
+# recomputes the stats, and the keep-alive interval for idle streams
+STATS_STREAM_INTERVAL = 5
+STATS_STREAM_HEARTBEAT = 15
+
+# Page view analytics (analytics/): beacons are appended to a spool under
+# ANALYTICS_SPOOL_DIR, inserted and rolled up into hourly totals every
+# ANALYTICS_FLUSH_INTERVAL seconds by one worker (or flush_analytics)
+ANALYTICS_SPOOL_DIR = os.path.join(BASE_DIR, "cache", "analytics")
+ANALYTICS_AUTO_FLUSH = True
+ANALYTICS_FLUSH_INTERVAL = 10
+ANALYTICS_RAW_RETENTION_DAYS = 30
+
+# Memory profiling (core/memory.py), off by default since tracemalloc slows
+# every allocation. Each request's peak allocation and RSS growth is spooled
+# under MEMORY_PROFILE_SPOOL_DIR and summed per endpoint and hour (Reports >
+# Memory) every MEMORY_PROFILE_FLUSH_INTERVAL seconds by one worker (or
+# flush_memory_profiles); the first request for each path in a worker, then one in every
+# MEMORY_PROFILE_SNAPSHOT_EVERY, also records its top allocation sites.
+MEMORY_PROFILING = False
+MEMORY_PROFILE_SPOOL_DIR = os.path.join(BASE_DIR, "cache", "memory")
+MEMORY_PROFILE_AUTO_FLUSH = True
+MEMORY_PROFILE_FLUSH_INTERVAL = 30
+MEMORY_PROFILE_SNAPSHOT_EVERY = 100
+MEMORY_PROFILE_TOP_SITES = 10
+MEMORY_PROFILE_FRAMES = 1
+
+# A gunicorn worker whose RSS is above MEMORY_WATCHDOG_MAX_RSS bytes after a
+# request stops accepting new ones, finishes those in flight and exits; the
+# master starts a fresh one (gunicorn.conf.py). None disables the check.
+MEMORY_WATCHDOG_MAX_RSS = None
+
+# Form submissions (submissions/): accepted submissions are appended to a
+# spool under SUBMISSIONS_SPOOL_DIR and inserted, with their notification
+# emails, every SUBMISSIONS_PROCESS_INTERVAL seconds by one worker (or
+# process_form_submissions --loop)
+SUBMISSIONS_SPOOL_DIR = os.path.join(BASE_DIR, "cache", "submissions")
+SUBMISSIONS_AUTO_PROCESS = True
+SUBMISSIONS_PROCESS_INTERVAL = 5
+
+# Background tasks (taskqueue/): django_tasks tasks, including wagtail's
+# search and reference index updates, are queued in the database and run by
+# ``manage.py run_tasks`` in TASKS_WORKER_PROCESSES processes (default: one
+# per CPU). Rows commit with the enqueuing transaction, so there is no need
+# to wait for on_commit. Failures are retried MAX_ATTEMPTS times with
+# exponential backoff from RETRY_BACKOFF seconds.
+TASKS = {
+    "default": {
+        "BACKEND": "taskqueue.backends.QueueBackend",
+        "ENQUEUE_ON_COMMIT": False,
+        "OPTIONS": {
+            "MAX_ATTEMPTS": 3,
+            "RETRY_BACKOFF": 10,
+            "RETRY_BACKOFF_MAX": 3600,
+            "LEASE_SECONDS": 300,
+        },
+    }
+}
+TASKS_WORKER_PROCESSES = None
+TASKS_POLL_INTERVAL = 1
+TASKS_RESULT_RETENTION_DAYS = 7
+# "check --database default" (run when the container starts) warns when
+# tasks have been due this long without any worker claiming one
+TASKS_WORKER_STALE_SECONDS = 600
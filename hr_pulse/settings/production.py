@@ -6,9 +6,9 @@ DEBUG = False
 # outdated JavaScript / CSS assets being served from cache
 # (e.g. after a Wagtail upgrade).
 # See https://docs.djangoproject.com/en/5.2/ref/contrib/staticfiles/#manifeststaticfilesstorage
-STORAGES["staticfiles"][
-    "BACKEND"
-] = "django.contrib.staticfiles.storage.ManifestStaticFilesStorage"
+# ServiceWorkerStaticFilesStorage also writes the service worker (sw.js)
+# precaching those hashed files, see SERVICE_WORKER_PRECACHE.
+STORAGES["staticfiles"]["BACKEND"] = "core.storage.ServiceWorkerStaticFilesStorage"
 
 try:
     from .local import *
@@ -1,232 +1,243 @@
 /*!
- * global.js - Advanced HR Landing Page JS (Safe jQuery)
- * Dependencies: jQuery 3+, IntersectionObserver
- * Features: Sticky Navbar, Smooth Scroll, AJAX API calls, Counters, Modals, Scroll Animations, Theme Toggle
+ * global.js - Advanced HR Landing Page JS
+ * Dependencies: IntersectionObserver, hr_frame.js, hr_data.js (no jQuery)
+ * Features: Sticky Navbar, Smooth Scroll, AJAX API calls, Live Stats (SSE), Page View Beacon, Counters, Modals, Scroll Animations, Theme Toggle
  */
 
-jQuery(function ($) {
+document.addEventListener('DOMContentLoaded', function () {
   /** =========================
    * Variables
    ========================= */
-  const $navbar = $('nav');
-  const $navLinks = $('nav a');
-  const $backToTop = $('#back-to-top');
-  const $body = $('body');
+  const navbar = document.querySelector('nav');
+  const navLinks = document.querySelectorAll('nav a');
+  const backToTop = document.getElementById('back-to-top');
+  const body = document.body;
 
   /** =========================
-   * Debounce Utility
+   * Fades (Web Animations, run off the main thread where possible)
    ========================= */
-  function debounce(func, wait = 20, immediate = false) {
-    let timeout;
-    return function () {
-      const context = this,
-        args = arguments;
-      const later = function () {
-        timeout = null;
-        if (!immediate) func.apply(context, args);
-      };
-      const callNow = immediate && !timeout;
-      clearTimeout(timeout);
-      timeout = setTimeout(later, wait);
-      if (callNow) func.apply(context, args);
+  function fadeIn(el, duration = 400) {
+    if (!el || el.dataset.visible === 'true') return;
+    el.dataset.visible = 'true';
+    el.style.display = '';
+    if (getComputedStyle(el).display === 'none') el.style.display = 'block';
+    el.animate([{ opacity: 0 }, { opacity: 1 }], duration);
+  }
+
+  function fadeOut(el, duration = 400) {
+    if (!el || el.dataset.visible === 'false') return;
+    el.dataset.visible = 'false';
+    el.animate([{ opacity: 1 }, { opacity: 0 }], duration).onfinish = () => {
+      if (el.dataset.visible === 'false') el.style.display = 'none';
     };
   }
 
   /** =========================
    * Sticky Navbar & Active Section Highlight
    ========================= */
-  function handleScroll() {
-    const scrollTop = $(window).scrollTop();
+  // Section bounds are measured on load and resize only, so scrolling
+  // never forces a layout
+  let sections = [];
+  let activeId = null;
 
-    $navbar.toggleClass('navbar-sticky shadow-md bg-white transition-all', scrollTop > 50);
+  function measureSections() {
+    sections = Array.from(document.querySelectorAll('section[id]'), section => {
+      const top = section.getBoundingClientRect().top + window.scrollY - 100;
+      return { id: section.id, top, bottom: top + section.offsetHeight };
+    });
+  }
 
-    $('section[id]').each(function () {
-      const sectionTop = $(this).offset().top - 100;
-      const sectionBottom = sectionTop + $(this).outerHeight();
-      const id = $(this).attr('id');
+  function handleScroll(scrollTop) {
+    const current = sections.find(s => scrollTop >= s.top && scrollTop < s.bottom);
+    const id = current ? current.id : null;
+    const sticky = scrollTop > 50;
+    const showBackToTop = scrollTop > 400;
 
-      $navLinks.removeClass('text-blue-600');
-      if (scrollTop >= sectionTop && scrollTop < sectionBottom) {
-        $navLinks.filter(`[href="#${id}"]`).addClass('text-blue-600');
+    HRFrame.write(() => {
+      if (navbar && navbar.classList.contains('navbar-sticky') !== sticky) {
+        ['navbar-sticky', 'shadow-md', 'bg-white', 'transition-all'].forEach(c => navbar.classList.toggle(c, sticky));
+      }
+      if (id !== activeId) {
+        activeId = id;
+        navLinks.forEach(link => link.classList.toggle('text-blue-600', id !== null && link.getAttribute('href') === `#${id}`));
       }
+      (showBackToTop ? fadeIn : fadeOut)(backToTop);
     });
-
-    $backToTop.fadeToggle(scrollTop > 400);
   }
-  $(window).on('scroll', debounce(handleScroll, 25));
+
+  HRFrame.read(measureSections);
+  HRFrame.onResize(measureSections);
+  window.addEventListener('load', () => HRFrame.read(measureSections));
+  HRFrame.onScroll(handleScroll);
 
   /** =========================
    * Smooth Scroll
    ========================= */
-  $('a[href^="#"]').on('click', function (e) {
-    e.preventDefault();
-    const target = this.hash;
-    if (target && $(target).length) {
-      $('html, body').animate(
-        { scrollTop: $(target).offset().top - 80 },
-        600,
-        'swing'
-      );
-    }
+  document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+    anchor.addEventListener('click', function (e) {
+      e.preventDefault();
+      const target = this.hash && document.querySelector(this.hash);
+      if (target) {
+        window.scrollTo({ top: target.getBoundingClientRect().top + window.scrollY - 80, behavior: 'smooth' });
+      }
+    });
   });
 
-  $backToTop.on('click', () => $('html, body').animate({ scrollTop: 0 }, 600));
+  if (backToTop) backToTop.addEventListener('click', () => window.scrollTo({ top: 0, behavior: 'smooth' }));
 
   /** =========================
    * AJAX Stats Counter
    ========================= */
-  function animateCounter($el, target) {
-    $({ countNum: 0 }).animate(
-      { countNum: target },
-      {
-        duration: 1800,
-        easing: 'swing',
-        step: function () {
-          $el.text(Math.floor(this.countNum));
-        },
-        complete: function () {
-          $el.text(target);
-        },
-      }
-    );
+  function renderStats(data, fromCurrent = false) {
+    document.querySelectorAll('.stat-number').forEach((el, i) => {
+      const from = fromCurrent ? parseInt(el.textContent, 10) || 0 : 0;
+      HRFrame.countTo(el, data[i]?.value || 0, from);
+    });
   }
 
-  function loadStats(retries = 3) {
-    $.ajax({
-      url: '/api/stats/',
-      method: 'GET',
-      dataType: 'json',
-      timeout: 5000,
-      success: function (data) {
-        $('.stat-number').each(function (i) {
-          animateCounter($(this), data[i]?.value || 0);
-        });
-      },
-      error: function () {
-        if (retries > 0) {
-          console.warn('Failed to load stats. Retrying...');
-          setTimeout(() => loadStats(retries - 1), 3000);
-        } else {
-          console.error('Failed to load stats after multiple attempts.');
-        }
-      },
-    });
+  /**
+   * Stats from the shared data layer: the cached copy at once, then the
+   * revalidated one if it changed. Retries back off with jitter.
+   */
+  function loadStats() {
+    HRData.get('/api/stats/', { maxAge: 0, onUpdate: data => renderStats(data, true) })
+      .then(data => renderStats(data))
+      .catch(error => console.error('Failed to load stats:', error.message));
   }
 
-  const statsObserver = new IntersectionObserver(
-    (entries, observer) => {
-      entries.forEach(entry => {
-        if (entry.isIntersecting) {
-          loadStats();
-          observer.disconnect();
-        }
-      });
-    },
-    { threshold: 0.5 }
-  );
+  /**
+   * Live stats over Server-Sent Events; falls back to loadStats() when
+   * EventSource is unavailable or the stream can't be opened at all.
+   */
+  function streamStats() {
+    if (!window.EventSource) return loadStats();
+
+    const source = new EventSource('/api/stats/stream/');
+    let lastEventId = null;
+    source.addEventListener('stats', function (e) {
+      if (e.lastEventId === lastEventId) return;
+      const first = lastEventId === null;
+      lastEventId = e.lastEventId;
+      renderStats(JSON.parse(e.data), !first);
+    });
+    // Sent by WSGI servers after the current stats, which can't hold the
+    // stream open; keep what was rendered rather than reconnecting
+    source.addEventListener('done', function () {
+      source.close();
+    });
+    source.onerror = function () {
+      // Reconnects are automatic once the stream has worked
+      if (lastEventId === null) {
+        source.close();
+        loadStats();
+      }
+    };
+  }
 
-  const $statsSection = $('.stats-section')[0];
-  if ($statsSection) statsObserver.observe($statsSection);
+  HRFrame.whenVisible(document.querySelectorAll('.stats-section'), streamStats, { threshold: 0.5 });
 
   /** =========================
    * Scroll Reveal Animations
    ========================= */
-  const scrollElements = $('.scroll-reveal');
-  const scrollObserver = new IntersectionObserver(
-    (entries, observer) => {
-      entries.forEach(entry => {
-        if (entry.isIntersecting) {
-          $(entry.target).addClass('reveal-visible');
-          observer.unobserve(entry.target);
-        }
-      });
-    },
-    { threshold: 0.2 }
-  );
-  scrollElements.each(function () {
-    scrollObserver.observe(this);
-  });
+  function reveal(elements) {
+    HRFrame.whenVisible(elements, el => HRFrame.write(() => el.classList.add('reveal-visible')), { threshold: 0.2 });
+  }
+  reveal(document.querySelectorAll('.scroll-reveal'));
 
   /** =========================
    * AJAX Modal
    ========================= */
   function openModal(modalId, apiUrl) {
-    const $modal = $(`#${modalId}`);
-    $modal.find('.modal-content').html('<p>Loading...</p>');
-    $modal.fadeIn(300);
-
-    $.ajax({
-      url: apiUrl,
-      method: 'GET',
-      dataType: 'json',
-      success: function (response) {
-        $modal.find('.modal-content').html(response.html || '<p>No content available.</p>');
-      },
-      error: function () {
-        $modal.find('.modal-content').html('<p>Failed to load content.</p>');
-      },
-    });
+    const modal = document.getElementById(modalId);
+    if (!modal) return;
+    const content = modal.querySelector('.modal-content');
+    content.innerHTML = '<p>Loading...</p>';
+    fadeIn(modal, 300);
+
+    HRData.get(apiUrl)
+      .then(response => (content.innerHTML = response.html || '<p>No content available.</p>'))
+      .catch(() => (content.innerHTML = '<p>Failed to load content.</p>'));
   }
 
-  $('.open-modal').click(function () {
-    openModal($(this).data('modal'), $(this).data('api'));
+  document.querySelectorAll('.open-modal').forEach(button => {
+    button.addEventListener('click', function () {
+      openModal(this.dataset.modal, this.dataset.api);
+    });
   });
 
-  $('.close-modal, .modal-overlay').click(function () {
-    $(this).closest('.modal').fadeOut(300);
+  document.querySelectorAll('.close-modal, .modal-overlay').forEach(el => {
+    el.addEventListener('click', function () {
+      fadeOut(this.closest('.modal'), 300);
+    });
   });
 
-  $(document).on('keydown', e => {
-    if (e.key === 'Escape') $('.modal').fadeOut(300);
+  document.addEventListener('keydown', e => {
+    if (e.key === 'Escape') document.querySelectorAll('.modal').forEach(modal => fadeOut(modal, 300));
   });
 
   /** =========================
    * AJAX Form Submission
    ========================= */
-  $('form.ajax-form').submit(function (e) {
-    e.preventDefault();
-    const $form = $(this);
-    const url = $form.attr('action');
-
-    $.ajax({
-      url: url,
-      method: 'POST',
-      data: $form.serialize(),
-      dataType: 'json',
-      beforeSend: () => $form.find('button[type="submit"]').prop('disabled', true),
-      success: response => {
-        $form.find('.form-message').text(response.message || 'Success').fadeIn();
-        if (response.success) $form[0].reset();
-      },
-      error: () => $form.find('.form-message').text('Submission failed. Try again.').fadeIn(),
-      complete: () => $form.find('button[type="submit"]').prop('disabled', false),
+  document.querySelectorAll('form.ajax-form').forEach(form => {
+    form.addEventListener('submit', function (e) {
+      e.preventDefault();
+      const submit = form.querySelector('button[type="submit"]');
+      const message = form.querySelector('.form-message');
+      const showMessage = text => {
+        if (!message) return;
+        message.textContent = text;
+        fadeIn(message);
+      };
+
+      if (submit) submit.disabled = true;
+      fetch(form.action, {
+        method: 'POST',
+        body: new URLSearchParams(new FormData(form)),
+        headers: { Accept: 'application/json', 'X-Requested-With': 'XMLHttpRequest' },
+        credentials: 'same-origin',
+      })
+        .then(response => {
+          if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+          return response.json();
+        })
+        .then(response => {
+          showMessage(response.message || 'Success');
+          if (response.success) form.reset();
+        })
+        .catch(() => showMessage('Submission failed. Try again.'))
+        .finally(() => {
+          if (submit) submit.disabled = false;
+        });
     });
   });
 
   /** =========================
    * Load Dynamic Sections via API
    ========================= */
-  function loadDynamicSection(apiUrl, container) {
-    const $container = $(container);
-    $container.html('<p class="text-center py-4">Loading...</p>');
-
-    $.ajax({
-      url: apiUrl,
-      method: 'GET',
-      dataType: 'json',
-      success: data => {
-        const html = data
-          .map(item => `<div class="card scroll-reveal">
-                          <div class="icon">${item.icon || ''}</div>
-                          <h3>${item.title}</h3>
-                          <p>${item.description}</p>
-                        </div>`)
-          .join('');
-        $container.html(html);
-        $container.find('.scroll-reveal').each(el => scrollObserver.observe(el));
-      },
-      error: () => console.error(`Failed to load ${container}`),
-    });
+  function loadDynamicSection(apiUrl, selector) {
+    const container = document.querySelector(selector);
+    if (!container) return;
+    container.innerHTML = '<p class="text-center py-4">Loading...</p>';
+
+    const render = data => {
+      const html = data
+        .map(item => `<div class="card scroll-reveal">
+                        <div class="icon">${item.icon || ''}</div>
+                        <h3>${item.title}</h3>
+                        <p>${item.description}</p>
+                      </div>`)
+        .join('');
+      HRFrame.write(() => {
+        container.innerHTML = html;
+        reveal(container.querySelectorAll('.scroll-reveal'));
+      });
+      // New content moves the sections below it
+      HRFrame.read(measureSections);
+    };
+
+    HRData.get(apiUrl, { onUpdate: render })
+      .then(render)
+      .catch(() => console.error(`Failed to load ${selector}`));
   }
 
   loadDynamicSection('/api/features/', '.features-container');
@@ -235,20 +246,54 @@ jQuery(function ($) {
   /** =========================
    * Theme Toggle
    ========================= */
-  $('#theme-toggle').click(function () {
-    const isDark = $body.hasClass('dark');
-    $body.toggleClass('dark light');
-    const newTheme = isDark ? 'light' : 'dark';
-
-    $.ajax({
-      url: '/api/theme/',
-      method: 'POST',
-      headers: { 'X-CSRFToken': getCookie('csrftoken') },
-      data: { theme: newTheme },
-      success: () => console.log('Theme updated'),
-      error: () => console.error('Failed to save theme'),
+  const themeToggle = document.getElementById('theme-toggle');
+  if (themeToggle) {
+    themeToggle.addEventListener('click', function () {
+      const isDark = body.classList.contains('dark');
+      body.classList.toggle('dark');
+      body.classList.toggle('light');
+      const newTheme = isDark ? 'light' : 'dark';
+
+      // ThemeAPIView reads a JSON body
+      fetch('/api/theme/', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': getCookie('csrftoken') },
+        body: JSON.stringify({ theme: newTheme }),
+        credentials: 'same-origin',
+      })
+        .then(response => {
+          if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+          console.log('Theme updated');
+        })
+        .catch(() => console.error('Failed to save theme'));
     });
-  });
+  }
+
+  /** =========================
+   * Page View Beacon
+   ========================= */
+  if (navigator.sendBeacon && body.dataset.pageId) {
+    navigator.sendBeacon(
+      '/api/analytics/beacon/',
+      JSON.stringify({
+        page: Number(body.dataset.pageId),
+        path: window.location.pathname,
+        referrer: document.referrer,
+      })
+    );
+  }
+
+  /** =========================
+   * Service Worker (precached static files, cached API payloads)
+   ========================= */
+  if ('serviceWorker' in navigator && body.dataset.serviceWorker) {
+    // After load, so precaching doesn't compete with the page's own requests
+    window.addEventListener('load', () => {
+      navigator.serviceWorker
+        .register(body.dataset.serviceWorker)
+        .catch(error => console.warn('Service worker not registered:', error.message));
+    });
+  }
 
   /** =========================
    * CSRF Utility
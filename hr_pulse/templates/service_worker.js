@@ -0,0 +1,91 @@
+/*!
+ * sw.js - Service worker written by collectstatic (core.storage.ServiceWorkerStaticFilesStorage)
+ * Features: Precached hashed static files, API payloads served from cache
+ * and revalidated in the background. Each deploy is a new version with its
+ * own caches, swapped in only once every file of it is cached and no open
+ * page still uses the previous one.
+ */
+
+'use strict';
+
+const VERSION = '{{ version }}';
+const CACHE_PREFIX = 'hr-pulse:';
+const STATIC_CACHE = `${CACHE_PREFIX}static:${VERSION}`;
+const API_CACHE = `${CACHE_PREFIX}api:${VERSION}`;
+
+const PRECACHE = {{ precache }};
+const API_ROUTES = {{ api_routes }};
+
+const precached = new Set(PRECACHE.map(url => new URL(url, self.location.href).href));
+
+/** =========================
+ * Install & activate
+ ========================= */
+self.addEventListener('install', event => {
+  // addAll() fails as a whole: a half-cached version never installs
+  event.waitUntil(caches.open(STATIC_CACHE).then(cache => cache.addAll(PRECACHE)));
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil(
+    caches
+      .keys()
+      .then(names =>
+        Promise.all(
+          names
+            .filter(name => name.startsWith(CACHE_PREFIX) && name !== STATIC_CACHE && name !== API_CACHE)
+            .map(name => caches.delete(name))
+        )
+      )
+      .then(() => self.clients.claim())
+  );
+});
+
+/** =========================
+ * Requests
+ ========================= */
+/**
+ * Answer from the cache when possible and refresh the cached copy from the
+ * network either way; the network is only waited for on a cache miss.
+ * Conditional requests (HRData revalidating its own copy) go to the network
+ * with their validators, so a 304 or the changed payload reaches the page
+ * instead of the copy it already has.
+ */
+function staleWhileRevalidate(event) {
+  const url = event.request.url;
+  const headers = { Accept: event.request.headers.get('Accept') || 'application/json' };
+  const etag = event.request.headers.get('If-None-Match');
+  if (etag) headers['If-None-Match'] = etag;
+  const network = fetch(url, { headers, credentials: 'same-origin' }).then(response => {
+    if (response.status === 200) {
+      const copy = response.clone();
+      event.waitUntil(caches.open(API_CACHE).then(cache => cache.put(url, copy)));
+    }
+    return response;
+  });
+  const cached = caches.match(url, { cacheName: API_CACHE });
+
+  if (etag) {
+    // Offline: the cached copy is still better than an error
+    return network.catch(error => cached.then(response => response || Promise.reject(error)));
+  }
+  return cached.then(response => {
+    if (!response) return network;
+    event.waitUntil(network.catch(() => {}));
+    return response;
+  });
+}
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  if (request.method !== 'GET') return;
+  const url = new URL(request.url);
+
+  if (precached.has(url.origin + url.pathname)) {
+    event.respondWith(
+      caches.match(url.origin + url.pathname, { cacheName: STATIC_CACHE }).then(cached => cached || fetch(request))
+    );
+  } else if (url.origin === self.location.origin && API_ROUTES.includes(url.pathname)) {
+    event.respondWith(staleWhileRevalidate(event));
+  }
+});
@@ -1,18 +1,28 @@
 from django.conf import settings
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.contrib import admin
 
 from wagtail.admin import urls as wagtailadmin_urls
 from wagtail import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
+from core import documents, serviceworker, sitemaps
+from core.routing import stateless
 from search import views as search_views
 
 urlpatterns = [
     path("django-admin/", admin.site.urls),
     path("admin/", include(wagtailadmin_urls)),
+    # wagtail's document view with Range support (see core/documents.py)
+    re_path(r"^documents/(\d+)/(.*)$", documents.serve, name="wagtaildocs_serve"),
     path("documents/", include(wagtaildocs_urls)),
     path("search/", search_views.search, name="search"),
+    # Served from the root so its scope covers the whole site
+    path("sw.js", stateless(serviceworker.serve), name="service_worker"),
+    # Written ahead of time by core/sitemaps.py and sent as files
+    path("sitemap.xml", stateless(sitemaps.serve_index), name="sitemap"),
+    path("sitemap-<int:shard>.xml", stateless(sitemaps.serve_shard), name="sitemap_shard"),
+    path("api/analytics/", include("analytics.urls")),
     path("api/", include("api.urls")),
     path("theme/", include("theme_plugin.urls")),
 ]
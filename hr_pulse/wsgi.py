@@ -14,3 +14,20 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hr_pulse.settings.dev")
 
 application = get_wsgi_application()
+
+# Load the in-memory tables before the first request. With gunicorn --preload
+# this happens once in the master and the forked workers share the pages.
+from django.db import DatabaseError, connections  # noqa: E402
+
+from core.redirects import redirect_table  # noqa: E402
+from core.sites import site_resolver  # noqa: E402
+
+try:
+    redirect_table.load()
+    site_resolver.load()
+except DatabaseError:
+    # The database may not be migrated yet; the tables load lazily instead
+    pass
+finally:
+    # Never hand a database connection opened here to forked workers
+    connections.close_all()
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "search"
+    verbose_name = "Search"
+
+    def ready(self):
+        from .signals import register_signal_handlers
+
+        register_signal_handlers()
@@ -0,0 +1,282 @@
+import multiprocessing
+import os
+import re
+import signal
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree
+
+from django.conf import settings
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+WHITESPACE_RE = re.compile(r"[ \t\r\f\v]+")
+SLIDE_RE = re.compile(r"^ppt/slides/slide(\d+)\.xml$")
+
+
+class ExtractionError(Exception):
+    pass
+
+
+class ExtractionTimeout(ExtractionError):
+    pass
+
+
+# -------------------------------
+# Formats
+# -------------------------------
+def read_plain(path):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        while chunk := f.read(64 * 1024):
+            yield chunk
+
+
+def read_xml_paragraphs(archive, member, paragraph_tags, text_tags):
+    """
+    Text of every paragraph element of an XML member, parsed incrementally.
+    With ``text_tags`` only those descendants' text is kept, otherwise all
+    of it.
+    """
+    with archive.open(member) as f:
+        for __, element in ElementTree.iterparse(f):
+            if element.tag.rpartition("}")[2] not in paragraph_tags:
+                continue
+            if text_tags:
+                parts = [
+                    node.text or "" for node in element.iter()
+                    if node.tag.rpartition("}")[2] in text_tags
+                ]
+            else:
+                parts = element.itertext()
+            yield "".join(parts)
+            yield "\n"
+            # Nested paragraphs (notes, table cells) are not read twice
+            element.clear()
+
+
+def read_docx(path):
+    with zipfile.ZipFile(path) as archive:
+        names = set(archive.namelist())
+        for member in ("word/document.xml", "word/footnotes.xml", "word/endnotes.xml"):
+            if member in names:
+                yield from read_xml_paragraphs(archive, member, {"p"}, {"t"})
+
+
+def read_pptx(path):
+    with zipfile.ZipFile(path) as archive:
+        slides = sorted(
+            (int(match.group(1)), name)
+            for name in archive.namelist()
+            if (match := SLIDE_RE.match(name))
+        )
+        for __, member in slides:
+            yield from read_xml_paragraphs(archive, member, {"p"}, {"t"})
+
+
+def read_xlsx(path):
+    # Cell text lives in the shared string table; numbers aren't worth indexing
+    with zipfile.ZipFile(path) as archive:
+        if "xl/sharedStrings.xml" in archive.namelist():
+            yield from read_xml_paragraphs(archive, "xl/sharedStrings.xml", {"si"}, {"t"})
+
+
+def read_opendocument(path):
+    with zipfile.ZipFile(path) as archive:
+        yield from read_xml_paragraphs(archive, "content.xml", {"p", "h"}, None)
+
+
+def read_pdf(path):
+    if pypdf is None:
+        raise ExtractionError("pypdf is not installed")
+    for page in pypdf.PdfReader(path).pages:
+        yield page.extract_text() or ""
+        yield "\n"
+
+
+READERS = {
+    "csv": read_plain,
+    "docx": read_docx,
+    "odp": read_opendocument,
+    "ods": read_opendocument,
+    "odt": read_opendocument,
+    "pdf": read_pdf,
+    "pptx": read_pptx,
+    "txt": read_plain,
+    "xlsx": read_xlsx,
+}
+
+
+def extract_text(path, extension, max_chars):
+    """
+    Up to ``max_chars`` of text from a document, whitespace collapsed. Files
+    of other types give "".
+    """
+    reader = READERS.get(extension.lower())
+    if reader is None:
+        return ""
+    parts = []
+    length = 0
+    for part in reader(path):
+        part = WHITESPACE_RE.sub(" ", part)
+        parts.append(part)
+        length += len(part)
+        if length >= max_chars:
+            break
+    lines = (line.strip() for line in "".join(parts)[:max_chars].splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+# -------------------------------
+# Limits
+# -------------------------------
+def raise_timeout(signum, frame):
+    raise ExtractionTimeout
+
+
+def extract_limited(path, extension, timeout, max_chars):
+    """
+    (text, "") or ("", error message). A document taking more than
+    ``timeout`` seconds is abandoned; the alarm needs the main thread, as
+    in a pool process.
+    """
+    timed = threading.current_thread() is threading.main_thread()
+    if timed:
+        previous = signal.signal(signal.SIGALRM, raise_timeout)
+        signal.alarm(timeout)
+    try:
+        return extract_text(path, extension, max_chars), ""
+    except ExtractionTimeout:
+        return "", f"Extraction took longer than {timeout}s"
+    except MemoryError:
+        return "", "Extraction ran out of memory"
+    except Exception as e:
+        return "", f"{type(e).__name__}: {e}"[:255]
+    finally:
+        if timed:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def init_process(memory_limit):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is None or not memory_limit:
+        return
+    # On top of what the forked process already maps
+    try:
+        with open("/proc/self/statm") as f:
+            mapped = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return
+    __, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = mapped + memory_limit
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+# -------------------------------
+# Pool
+# -------------------------------
+class Extractor:
+    """
+    Extract text from documents in a pool of ``processes`` forked
+    processes (0 extracts in this process, without the memory limit). Each
+    document gets SEARCH_EXTRACTION_TIMEOUT seconds and each process
+    SEARCH_EXTRACTION_MEMORY_LIMIT bytes on top of its own footprint.
+    """
+
+    def __init__(self, processes=None):
+        if processes is None:
+            processes = getattr(settings, "SEARCH_EXTRACTION_PROCESSES", None) or os.cpu_count()
+        self.processes = processes
+        self.timeout = getattr(settings, "SEARCH_EXTRACTION_TIMEOUT", 30)
+        self.memory_limit = getattr(settings, "SEARCH_EXTRACTION_MEMORY_LIMIT", 512 * 1024 * 1024)
+        self.max_chars = getattr(settings, "SEARCH_DOCUMENT_MAX_CHARS", 200_000)
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start_pool(self):
+        self.pool = ProcessPoolExecutor(
+            self.processes,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=init_process,
+            initargs=(self.memory_limit,),
+        )
+
+    def restart_pool(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.start_pool()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+    def extract(self, jobs):
+        """
+        Yield (key, text, error) for every (key, path, extension) job, in
+        the order they finish
+        """
+        if not self.processes:
+            for key, path, extension in jobs:
+                yield (key, *extract_limited(path, extension, self.timeout, self.max_chars))
+            return
+
+        if self.pool is None:
+            self.start_pool()
+        jobs = iter(jobs)
+        running = {}
+        exhausted = False
+        while running or not exhausted:
+            while not exhausted and len(running) < self.processes * 2:
+                job = next(jobs, None)
+                if job is None:
+                    exhausted = True
+                    break
+                running[self.submit(job)] = job
+
+            done, __ = wait(running, return_when=FIRST_COMPLETED)
+            broken = []
+            for future in done:
+                job = running.pop(future)
+                try:
+                    text, error = future.result()
+                except BrokenProcessPool:
+                    broken.append(job)
+                    continue
+                yield job[0], text, error
+            if broken:
+                # Every job in the pool failed with it, not only the culprit
+                broken.extend(running.values())
+                running.clear()
+                self.restart_pool()
+                for job in broken:
+                    yield self.retry(job)
+
+    def submit(self, job):
+        __, path, extension = job
+        return self.pool.submit(extract_limited, path, extension, self.timeout, self.max_chars)
+
+    def retry(self, job):
+        # Alone, so a document that kills its process again takes no other with it
+        try:
+            text, error = self.submit(job).result()
+        except BrokenProcessPool:
+            self.restart_pool()
+            text, error = "", "The extraction process died"
+        return job[0], text, error
@@ -0,0 +1,288 @@
+import threading
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from wagtail.fields import StreamField
+from wagtail.models import Page, get_page_models
+
+from core.versioning import VersionStamp
+
+from .models import FacetPosting
+
+# (facet, label) in display order; each facet's values are computed below
+FACETS = (
+    ("type", "Page type"),
+    ("section", "Contains"),
+    ("year", "Published"),
+)
+FACET_NAMES = [name for name, __ in FACETS]
+
+# Bumped whenever postings change, so every worker reloads its FacetIndex
+facet_stamp = VersionStamp("searchfacets")
+
+
+# -------------------------------
+# Bitsets
+# -------------------------------
+# A set of page ids is a Python int with bit ``pk`` set for each page, so
+# intersections are one ``&`` over machine words and counts are bit_count().
+# Stored as little-endian bytes, 12.5 KB per value for 100,000 pages.
+def to_bits(ids):
+    ids = list(ids)
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for pk in ids:
+        buffer[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def from_bytes(data):
+    return int.from_bytes(data, "little")
+
+
+def to_bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def contains(data, pk):
+    """Whether page ``pk`` is in the bitset ``data`` (bytes)"""
+    index = pk >> 3
+    return index < len(data) and data[index] >> (pk & 7) & 1
+
+
+# -------------------------------
+# Page values
+# -------------------------------
+def get_stream_fields():
+    """{page model: [StreamField names on its own table]}"""
+    fields = {}
+    for model in get_page_models():
+        names = [
+            field.name for field in model._meta.get_fields(include_parents=False)
+            if isinstance(field, StreamField)
+        ]
+        if names:
+            fields[model] = names
+    return fields
+
+
+def iter_page_facets(pages):
+    """
+    (page id, facet, value, label) for each facet value of the given live
+    pages (a Page queryset). Reads columns only; no page is instantiated
+    and no block is converted to Python.
+    """
+    content_types = {}
+    rows = pages.values_list("pk", "content_type", "first_published_at")
+    for pk, content_type_id, first_published_at in rows.iterator(chunk_size=2000):
+        if content_type_id not in content_types:
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            content_types[content_type_id] = str(model._meta.verbose_name).capitalize() if model else ""
+        yield pk, "type", str(content_type_id), content_types[content_type_id]
+        if first_published_at:
+            year = str(first_published_at.year)
+            yield pk, "year", year, year
+
+    for model, names in get_stream_fields().items():
+        rows = model.objects.filter(pk__in=pages.values("pk")).values_list("pk", *names)
+        for pk, *values in rows.iterator(chunk_size=2000):
+            seen = set()
+            for name, value in zip(names, values):
+                child_blocks = model._meta.get_field(name).stream_block.child_blocks
+                for block in value.raw_data:
+                    block_type = block.get("type")
+                    if block_type in child_blocks and block_type not in seen:
+                        seen.add(block_type)
+                        yield pk, "section", block_type, child_blocks[block_type].label
+
+
+def collect_postings(pages):
+    """{(facet, value): [label, set of page ids]}"""
+    postings = {}
+    for pk, facet, value, label in iter_page_facets(pages):
+        postings.setdefault((facet, value), [label, set()])[1].add(pk)
+    return postings
+
+
+# -------------------------------
+# Maintenance
+# -------------------------------
+def rebuild_facets():
+    """Recompute every posting from the live pages. Returns the row count."""
+    postings = collect_postings(Page.objects.live())
+    rows = [
+        FacetPosting(
+            facet=facet, value=value, label=label,
+            bits=to_bytes(to_bits(ids)), count=len(ids),
+        )
+        for (facet, value), (label, ids) in postings.items()
+    ]
+    with transaction.atomic():
+        FacetPosting.objects.all().delete()
+        FacetPosting.objects.bulk_create(rows)
+    facet_stamp.bump()
+    return len(rows)
+
+
+def update_page_facets(page_ids):
+    """
+    Bring the postings of the given pages up to date: clear their bits
+    everywhere, then set them for the values they have now. Unpublished or
+    deleted pages just end up cleared. Returns the number of rows changed.
+    """
+    page_ids = set(page_ids)
+    if not page_ids:
+        return 0
+    postings = collect_postings(Page.objects.live().filter(pk__in=page_ids))
+    clear = to_bits(page_ids)
+    changed = []
+    emptied = []
+    with transaction.atomic():
+        # Locking every row serialises concurrent updates, so none of them
+        # writes a bitset another has changed since it was read
+        rows = {
+            (row.facet, row.value): row
+            for row in FacetPosting.objects.select_for_update().order_by("pk")
+        }
+        for key, row in rows.items():
+            old = from_bytes(row.bits)
+            label, ids = postings.pop(key, (row.label, ()))
+            bits = (old & ~clear) | to_bits(ids)
+            if bits == old and label == row.label:
+                continue
+            if not bits:
+                emptied.append(row.pk)
+                continue
+            row.bits, row.count, row.label = to_bytes(bits), bits.bit_count(), label
+            changed.append(row)
+        FacetPosting.objects.bulk_update(changed, ["bits", "count", "label"])
+        FacetPosting.objects.filter(pk__in=emptied).delete()
+        FacetPosting.objects.bulk_create([
+            FacetPosting(
+                facet=facet, value=value, label=label,
+                bits=to_bytes(to_bits(ids)), count=len(ids),
+            )
+            for (facet, value), (label, ids) in postings.items()
+        ])
+    updated = len(changed) + len(emptied) + len(postings)
+    if updated:
+        facet_stamp.bump()
+    return updated
+
+
+# Pages changed in the current transaction, sent to one task when it
+# commits (deleting a subtree sends a post_delete for each page)
+_pending = threading.local()
+
+
+def mark_changed(page_ids):
+    if getattr(_pending, "page_ids", None) is None:
+        _pending.page_ids = set()
+    _pending.page_ids.update(page_ids)
+    transaction.on_commit(flush_changes)
+
+
+def flush_changes():
+    from .tasks import update_page_facets as update_task
+
+    page_ids, _pending.page_ids = getattr(_pending, "page_ids", None), None
+    if page_ids:
+        update_task.enqueue(sorted(page_ids))
+
+
+# -------------------------------
+# Counting
+# -------------------------------
+class FacetIndex:
+    """
+    Every posting as ints, loaded once per process and reloaded when
+    facet_stamp changes
+    """
+
+    def __init__(self):
+        self.version = None
+        self.facets = {}
+        self.lock = threading.Lock()
+        self.rebuild_requested = None
+
+    def get(self):
+        # The stamp is read before the rows, so a change committed while
+        # loading is picked up on the next call
+        version = facet_stamp.get()
+        if version != self.version:
+            with self.lock:
+                if version != self.version:
+                    facets = defaultdict(list)
+                    rows = FacetPosting.objects.order_by("facet", "-count", "label")
+                    for facet, value, label, bits in rows.values_list("facet", "value", "label", "bits"):
+                        facets[facet].append((value, label, from_bytes(bits)))
+                    self.facets = dict(facets)
+                    self.version = version
+        if not self.facets and self.rebuild_requested != version:
+            self.request_rebuild(version)
+        return self.facets
+
+    def request_rebuild(self, version):
+        """
+        Build the postings in the task worker when there are none but live
+        pages exist (a deploy that added facets, or an emptied table). Until
+        then results are neither counted nor narrowed.
+        """
+        from .tasks import rebuild_facets as rebuild_task
+
+        self.rebuild_requested = version
+        if Page.objects.live().exists():
+            rebuild_task.enqueue()
+
+
+facet_index = FacetIndex()
+
+
+def facet_counts(result_ids, selected):
+    """
+    Narrow ``result_ids`` (in rank order) to the ``selected`` values
+    ({facet: [values]}) and count each facet value within the results.
+
+    Values of one facet are alternatives (OR) and facets combine with AND.
+    Each facet is counted with every filter but its own applied, so picking
+    one page type still shows how many results the other types have.
+
+    Returns (narrowed ids, [(facet, label, [(value, label, count, selected)])]).
+    """
+    facets = facet_index.get()
+    results = to_bits(result_ids)
+    filters = {}
+    for facet, values in selected.items():
+        values = set(values)
+        if facet in facets and values:
+            bits = 0
+            for value, __, posting in facets[facet]:
+                if value in values:
+                    bits |= posting
+            filters[facet] = bits
+
+    narrowed = results
+    for bits in filters.values():
+        narrowed &= bits
+
+    counts = []
+    for facet, facet_label in FACETS:
+        base = results
+        for other, bits in filters.items():
+            if other != facet:
+                base &= bits
+        values = []
+        for value, label, posting in facets.get(facet, ()):
+            count = (base & posting).bit_count()
+            chosen = value in selected.get(facet, ())
+            if count or chosen:
+                values.append((value, label, count, chosen))
+        if values:
+            counts.append((facet, facet_label, values))
+
+    if narrowed != results:
+        data = to_bytes(narrowed)
+        result_ids = [pk for pk in result_ids if contains(data, pk)]
+    return result_ids, counts
@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+from core.versioning import VersionStamp
+
+from .extract import Extractor
+from .models import DocumentText
+
+# Bumped whenever indexed document text changes, to expire cached results
+document_text_stamp = VersionStamp("documenttext")
+
+
+def update_document_texts(documents, extractor=None, force=False):
+    """
+    Extract and index the text of every document whose file changed since
+    it was last extracted. A file whose content was already extracted for
+    another document reuses that text. Returns the number of documents
+    updated.
+
+    Rows are saved as extractions finish, so an interrupted run keeps its
+    progress; saving one updates the search index.
+    """
+    documents = list(documents)
+    existing = DocumentText.objects.in_bulk(
+        [document.pk for document in documents], field_name="document_id"
+    )
+    stale = defaultdict(list)
+    updated = 0
+    for document in documents:
+        row = existing.get(document.pk)
+        try:
+            file_hash = document.get_file_hash()
+        except OSError:
+            file_hash = ""
+        if not file_hash:
+            if row is None or row.error != "The file is missing":
+                DocumentText.objects.update_or_create(
+                    document=document,
+                    defaults={"title": document.title, "file_hash": "", "text": "", "error": "The file is missing"},
+                )
+                updated += 1
+        elif row is not None and row.file_hash == file_hash and not force:
+            if row.title != document.title:
+                row.title = document.title
+                row.save(update_fields=["title", "extracted_at"])
+                updated += 1
+        else:
+            stale[file_hash].append(document)
+    updated += sum(len(documents) for documents in stale.values())
+    if not updated:
+        return 0
+
+    def store(file_hash, text, error):
+        for document in stale.pop(file_hash):
+            DocumentText.objects.update_or_create(
+                document=document,
+                defaults={"title": document.title, "file_hash": file_hash, "text": text, "error": error},
+            )
+
+    if not force:
+        cached = DocumentText.objects.filter(file_hash__in=list(stale))
+        for file_hash, text, error in cached.values_list("file_hash", "text", "error"):
+            if file_hash in stale:
+                store(file_hash, text, error)
+
+    jobs = [
+        (file_hash, documents[0].file.path, documents[0].file_extension)
+        for file_hash, documents in stale.items()
+    ]
+    if jobs:
+        owned = extractor is None
+        if owned:
+            extractor = Extractor()
+        try:
+            for file_hash, text, error in extractor.extract(jobs):
+                store(file_hash, text, error)
+        finally:
+            if owned:
+                extractor.close()
+    document_text_stamp.bump()
+    return updated
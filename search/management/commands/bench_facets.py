@@ -0,0 +1,67 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.db.models.functions import ExtractYear
+from wagtail.models import Page
+
+from search.facets import facet_counts, facet_index, rebuild_facets
+
+
+class Command(BaseCommand):
+    help = (
+        "Time facet counts from the postings against the equivalent SQL "
+        "GROUP BY queries, for random result sets of the given sizes. "
+        "The view counts every match of a query, not one page of results, "
+        "so include sizes as large as the broadest queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000, 50000])
+        parser.add_argument("--runs", type=int, default=50)
+        parser.add_argument("--rebuild", action="store_true", help="Time a full rebuild first")
+
+    def sql_counts(self, result_ids):
+        pages = Page.objects.filter(pk__in=result_ids)
+        return (
+            list(pages.values("content_type").annotate(n=Count("pk"))),
+            list(pages.annotate(year=ExtractYear("first_published_at")).values("year").annotate(n=Count("pk"))),
+        )
+
+    def time(self, fn, result_sets):
+        timings = []
+        for result_ids in result_sets:
+            started = time.perf_counter()
+            fn(result_ids)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return timings
+
+    def report(self, label, size, timings):
+        self.stdout.write(
+            f"{label:<10} {size:>6} ids  "
+            f"mean {statistics.fmean(timings):7.2f} ms  "
+            f"p50 {timings[len(timings) // 2]:7.2f} ms  "
+            f"p95 {timings[int(len(timings) * 0.95)]:7.2f} ms"
+        )
+
+    def handle(self, *args, sizes, runs, rebuild, **options):
+        if rebuild:
+            started = time.perf_counter()
+            count = rebuild_facets()
+            self.stdout.write(f"Rebuilt {count} postings in {time.perf_counter() - started:.2f}s")
+        started = time.perf_counter()
+        facets = facet_index.get()
+        self.stdout.write(
+            f"Loaded {sum(map(len, facets.values()))} postings in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+        ids = list(Page.objects.live().values_list("pk", flat=True))
+        self.stdout.write(f"{len(ids)} live pages")
+        for size in sizes:
+            result_sets = [random.sample(ids, min(size, len(ids))) for __ in range(runs)]
+            self.report("postings", size, self.time(lambda r: facet_counts(r, {}), result_sets))
+            self.report("sql", size, self.time(self.sql_counts, result_sets))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from search.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = "Recompute the search facet postings of every live page"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_facets()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Wrote {count} facet postings in {elapsed:.2f}s",
+            style_func=self.style.SUCCESS,
+        )
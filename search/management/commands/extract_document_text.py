@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from wagtail.documents import get_document_model
+
+from search.extract import Extractor
+from search.indexing import update_document_texts
+
+
+class Command(BaseCommand):
+    help = "Extract and index the text of every document whose file changed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Pool size, SEARCH_EXTRACTION_PROCESSES or the CPU count by default. "
+            "0 extracts in this process.",
+        )
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--force", action="store_true", help="Extract unchanged files too")
+
+    def handle(self, *args, processes, batch_size, force, **options):
+        documents = get_document_model().objects.order_by("pk")
+        started = time.perf_counter()
+        total = updated = 0
+        last_pk = 0
+        with Extractor(processes) as extractor:
+            while batch := list(documents.filter(pk__gt=last_pk)[:batch_size]):
+                updated += update_document_texts(batch, extractor, force=force)
+                total += len(batch)
+                last_pk = batch[-1].pk
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Updated {updated} of {total} documents in {elapsed:.2f}s",
+            style_func=self.style.SUCCESS,
+        )
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:51
+
+import django.db.models.deletion
+import wagtail.search.index
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("wagtaildocs", "0014_alter_document_file_size"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentText",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("title", models.CharField(max_length=255)),
+                ("file_hash", models.CharField(blank=True, db_index=True, max_length=40)),
+                ("text", models.TextField(blank=True)),
+                ("error", models.CharField(blank=True, max_length=255)),
+                ("extracted_at", models.DateTimeField(auto_now=True)),
+                ("document", models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name="extracted_text", to="wagtaildocs.document")),
+            ],
+            bases=(wagtail.search.index.Indexed, models.Model),
+        ),
+    ]
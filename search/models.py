@@ -0,0 +1,51 @@
+from django.db import models
+from wagtail.documents import get_document_model_string
+from wagtail.search import index
+
+
+class DocumentText(index.Indexed, models.Model):
+    """
+    Text extracted from a document, indexed for the site search. Kept
+    with the hash of the file it came from, so unchanged files are skipped
+    and a re-uploaded copy reuses the text.
+    """
+    document = models.OneToOneField(
+        get_document_model_string(),
+        on_delete=models.CASCADE,
+        related_name="extracted_text",
+    )
+    title = models.CharField(max_length=255)
+    file_hash = models.CharField(max_length=40, blank=True, db_index=True)
+    text = models.TextField(blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    search_fields = [
+        index.SearchField("title", boost=2),
+        index.SearchField("text"),
+    ]
+
+    def __str__(self):
+        return self.title
+
+
+class FacetPosting(models.Model):
+    """
+    The live pages having one value of a search facet, as a bitset: bit
+    ``n`` (little-endian) is set when page ``n`` has the value. Kept up to
+    date as pages are published, so counting a query's results per value
+    is an AND of two bitsets (see search/facets.py).
+    """
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=100)
+    label = models.CharField(max_length=255)
+    bits = models.BinaryField(default=b"")
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["facet", "value"], name="unique_facet_value"),
+        ]
+
+    def __str__(self):
+        return f"{self.facet}={self.value} ({self.count})"
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save
+from wagtail.documents import get_document_model
+from wagtail.models import Page
+from wagtail.signals import page_published, page_unpublished
+
+from . import facets
+from .indexing import document_text_stamp
+from .models import DocumentText
+from .tasks import extract_document_text
+
+
+def document_saved(sender, instance, update_fields=None, **kwargs):
+    # Saves of the file size or hash alone change neither file nor title
+    if update_fields is not None and not {"file", "title"} & set(update_fields):
+        return
+    extract_document_text.enqueue(instance.pk)
+
+
+def document_text_deleted(sender, **kwargs):
+    document_text_stamp.bump()
+
+
+def page_facets_changed(sender, instance, **kwargs):
+    facets.mark_changed([instance.pk])
+
+
+def register_signal_handlers():
+    post_save.connect(document_saved, sender=get_document_model())
+    post_delete.connect(document_text_deleted, sender=DocumentText)
+    page_published.connect(page_facets_changed)
+    page_unpublished.connect(page_facets_changed)
+    post_delete.connect(page_facets_changed, sender=Page)
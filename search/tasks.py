@@ -0,0 +1,29 @@
+from django_tasks import task
+from wagtail.documents import get_document_model
+
+from . import facets
+from .extract import Extractor
+from .indexing import update_document_texts
+
+
+@task()
+def extract_document_text(document_id):
+    """
+    Extract and index the text of one document, in a process of its own
+    so a hostile file can't exhaust the worker
+    """
+    documents = get_document_model().objects.filter(pk=document_id)
+    with Extractor(processes=1) as extractor:
+        return update_document_texts(documents, extractor)
+
+
+@task()
+def update_page_facets(page_ids):
+    """Update the search facet postings of pages that changed"""
+    return facets.update_page_facets(page_ids)
+
+
+@task()
+def rebuild_facets():
+    """Recompute every search facet posting"""
+    return facets.rebuild_facets()
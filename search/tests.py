@@ -0,0 +1,318 @@
+import io
+import os
+import tempfile
+import zipfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from datetime import datetime, timezone
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from wagtail.documents import get_document_model
+from wagtail.models import Collection, CollectionViewRestriction, Page
+
+from home.models import Homepage
+
+from . import facets
+from .extract import Extractor, extract_text
+from .facets import facet_counts, from_bytes
+from .indexing import update_document_texts
+from .models import DocumentText, FacetPosting
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+S = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+TEXT = "urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+DOCX = make_zip({
+    "word/document.xml": (
+        f'<w:document xmlns:w="{W}"><w:body>'
+        "<w:p><w:r><w:t>Annual leave</w:t></w:r><w:r><w:t xml:space=\"preserve\"> policy</w:t></w:r></w:p>"
+        "<w:p><w:r><w:instrText>PAGE</w:instrText><w:t>Carry over five days</w:t></w:r></w:p>"
+        "</w:body></w:document>"
+    ),
+})
+PPTX = make_zip({
+    "ppt/slides/slide10.xml": f'<p:sld xmlns:a="{A}" xmlns:p="p"><a:p><a:r><a:t>Last</a:t></a:r></a:p></p:sld>',
+    "ppt/slides/slide2.xml": f'<p:sld xmlns:a="{A}" xmlns:p="p"><a:p><a:r><a:t>First</a:t></a:r></a:p></p:sld>',
+})
+XLSX = make_zip({
+    "xl/sharedStrings.xml": f'<sst xmlns="{S}"><si><t>Payroll</t></si><si><r><t>Q3 </t></r><r><t>bonus</t></r></si></sst>',
+})
+ODT = make_zip({
+    "content.xml": (
+        f'<office:document-content xmlns:office="o" xmlns:text="{TEXT}"><office:body>'
+        "<text:h>Onboarding</text:h><text:p>Bring <text:span>two</text:span> forms of ID</text:p>"
+        "</office:body></office:document-content>"
+    ),
+})
+
+
+class DocumentTextTestCase(TestCase):
+    """Test cases for document text extraction and document search"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, SEARCH_EXTRACTION_PROCESSES=1
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def write(self, name, content):
+        path = os.path.join(self.media_root, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def create_document(self, title, name, content):
+        return get_document_model().objects.create(title=title, file=ContentFile(content, name=name))
+
+    def test_extract_formats(self):
+        self.assertEqual(
+            extract_text(self.write("a.docx", DOCX), "docx", 1000),
+            "Annual leave policy\nCarry over five days",
+        )
+        self.assertEqual(extract_text(self.write("a.pptx", PPTX), "pptx", 1000), "First\nLast")
+        self.assertEqual(extract_text(self.write("a.xlsx", XLSX), "xlsx", 1000), "Payroll\nQ3 bonus")
+        self.assertEqual(
+            extract_text(self.write("a.odt", ODT), "odt", 1000), "Onboarding\nBring two forms of ID"
+        )
+        self.assertEqual(extract_text(self.write("a.txt", b"plain   text\n\n"), "TXT", 5), "plain")
+        self.assertEqual(extract_text(self.write("a.zip", DOCX), "zip", 1000), "")
+
+    def test_pool_limits(self):
+        fifo = os.path.join(self.media_root, "blocked.txt")
+        os.mkfifo(fifo)
+        bomb = self.write("bomb.docx", make_zip({
+            "word/document.xml": f'<w:document xmlns:w="{W}"><w:p><w:t>' + "a" * 50_000_000 + "</w:t></w:p></w:document>",
+        }))
+        jobs = [
+            ("blocked", fifo, "txt"),
+            ("bomb", bomb, "docx"),
+            ("docx", self.write("a.docx", DOCX), "docx"),
+            ("broken", self.write("b.docx", b"not a zip"), "docx"),
+        ]
+        with override_settings(SEARCH_EXTRACTION_TIMEOUT=2, SEARCH_EXTRACTION_MEMORY_LIMIT=16 * 1024 * 1024):
+            with Extractor(processes=2) as extractor:
+                results = {key: (text, error) for key, text, error in extractor.extract(jobs)}
+        self.assertEqual(results["blocked"], ("", "Extraction took longer than 2s"))
+        self.assertEqual(results["bomb"], ("", "Extraction ran out of memory"))
+        self.assertEqual(results["docx"][0], "Annual leave policy\nCarry over five days")
+        self.assertTrue(results["broken"][1].startswith("BadZipFile"))
+
+    def test_saved_documents_extracted_incrementally(self):
+        document = self.create_document("Leave", "leave.docx", DOCX)
+        self.assertEqual(document.extracted_text.text, "Annual leave policy\nCarry over five days")
+
+        # Unchanged files are skipped; a copy of one reuses its text
+        copy = self.create_document("Leave copy", "copy.docx", DOCX)
+        with mock.patch.object(Extractor, "extract") as extract:
+            self.assertEqual(update_document_texts([document, copy]), 0)
+            document.title = "Leave policy"
+            document.save()
+            self.create_document("Another copy", "another.docx", DOCX)
+        extract.assert_not_called()
+        self.assertEqual(DocumentText.objects.get(document=document).title, "Leave policy")
+        self.assertEqual(DocumentText.objects.filter(text__startswith="Annual leave").count(), 3)
+
+        document.file = ContentFile(ODT, name="leave.odt")
+        document.file_hash = ""
+        document.save()
+        self.assertEqual(DocumentText.objects.get(document=document).text, "Onboarding\nBring two forms of ID")
+
+    def test_search_includes_documents(self):
+        self.create_document("Leave", "leave.docx", DOCX)
+        response = self.client.get(reverse("search"), {"query": "carry"})
+        self.assertContains(response, "Leave")
+        self.assertContains(response, "DOCX")
+
+        # Documents the visitor couldn't download aren't listed
+        private = Collection.get_first_root_node().add_child(name="Private")
+        CollectionViewRestriction.objects.create(
+            collection=private, restriction_type=CollectionViewRestriction.PASSWORD, password="secret"
+        )
+        get_document_model().objects.update(collection=private)
+        response = self.client.get(reverse("search"), {"query": "carry"})
+        self.assertNotContains(response, "DOCX")
+
+    @override_settings(SEARCH_DOCUMENT_RESULTS=2)
+    def test_restricted_documents_leave_slots_free(self):
+        private = Collection.get_first_root_node().add_child(name="Private")
+        CollectionViewRestriction.objects.create(
+            collection=private, restriction_type=CollectionViewRestriction.PASSWORD, password="secret"
+        )
+        hidden = private.add_child(name="Payroll")
+        for i in range(10):
+            document = self.create_document(f"Leave {i}", f"leave{i}.docx", DOCX)
+            if i < 8:
+                document.collection = private if i % 2 else hidden
+                document.save()
+        response = self.client.get(reverse("search"), {"query": "carry"})
+        titles = [document.title for document in response.context["document_results"]]
+        self.assertEqual(sorted(titles), ["Leave 8", "Leave 9"])
+
+    def test_backfill_command(self):
+        document = self.create_document("Leave", "leave.docx", DOCX)
+        DocumentText.objects.all().delete()
+        self.create_document("Payroll", "payroll.xlsx", XLSX)
+
+        stdout = StringIO()
+        call_command("extract_document_text", "--processes=2", stdout=stdout)
+        self.assertIn("Updated 1 of 2 documents", stdout.getvalue())
+        self.assertEqual(DocumentText.objects.get(document=document).text[:12], "Annual leave")
+
+        call_command("extract_document_text", "--force", stdout=stdout)
+        self.assertIn("Updated 2 of 2 documents", stdout.getvalue())
+
+
+class SearchResultsTestCase(TestCase):
+    """Test cases for cached search result ids"""
+
+    def setUp(self):
+        home = Page.objects.get(depth=2)
+        for i in range(12):
+            home.add_child(title=f"Onboarding guide {i}", slug=f"onboarding-{i}")
+
+    def test_every_match_paginated(self):
+        response = self.client.get(reverse("search"), {"query": "onboarding", "page": 2})
+        self.assertEqual(len(response.context["search_results"]), 2)
+        self.assertNotContains(response, "matches only")
+
+    @override_settings(SEARCH_CACHE_MAX_RESULTS=5)
+    def test_cap_noted(self):
+        response = self.client.get(reverse("search"), {"query": "onboarding"})
+        self.assertEqual(response.context["search_results"].paginator.count, 5)
+        self.assertContains(response, "Showing the first 5 matches only")
+
+
+class FacetTestCase(TestCase):
+    """Test cases for the precomputed search facets"""
+
+    def setUp(self):
+        # Publishing also rewrites sitemaps
+        settings_override = override_settings(SITEMAP_ROOT=tempfile.mkdtemp())
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Forget pages marked by earlier tests' rolled back transactions
+        facets._pending.__dict__.clear()
+        # Result ids cached by other tests under the same stamps, and this
+        # process's postings loaded under a stamp clear() starts over
+        cache.clear()
+        index_patch = mock.patch.object(facets, "facet_index", facets.FacetIndex())
+        index_patch.start()
+        self.addCleanup(index_patch.stop)
+        self.home = Page.objects.get(depth=2)
+        self.pages = []
+        for i, year in enumerate([2023, 2024, 2024]):
+            page = self.home.add_child(title=f"Leave policy {i}", slug=f"leave-{i}")
+            Page.objects.filter(pk=page.pk).update(first_published_at=datetime(year, 6, 1, tzinfo=timezone.utc))
+            self.pages.append(page)
+        self.landing = Homepage(
+            title="Leave landing",
+            slug="leave-landing",
+            first_published_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            body=[{"type": "stats_section", "value": {"stats": []}}],
+        )
+        self.home.add_child(instance=self.landing)
+        call_command("build_search_facets", stdout=StringIO())
+
+    def counts(self, result_ids, selected=None):
+        result_ids, counts = facet_counts(result_ids, selected or {})
+        return result_ids, {
+            facet: {label: (count, chosen) for __, label, count, chosen in values}
+            for facet, __, values in counts
+        }
+
+    def test_counts(self):
+        ids = [page.pk for page in self.pages] + [self.landing.pk]
+        result_ids, counts = self.counts(ids)
+        self.assertEqual(result_ids, ids)
+        self.assertEqual(counts["type"], {"Page": (3, False), "Homepage": (1, False)})
+        self.assertEqual(counts["year"], {"2024": (3, False), "2023": (1, False)})
+        self.assertEqual(counts["section"], {"Stats Section": (1, False)})
+
+        # Only pages in the results are counted
+        __, counts = self.counts(ids[:2])
+        self.assertEqual(counts["year"], {"2023": (1, False), "2024": (1, False)})
+        self.assertNotIn("section", counts)
+
+    def test_selected_values_narrow_results(self):
+        ids = [page.pk for page in self.pages] + [self.landing.pk]
+        page_type = FacetPosting.objects.get(facet="type", label="Page").value
+        result_ids, counts = self.counts(ids, {"year": ["2024"], "type": [page_type]})
+        self.assertEqual(result_ids, [self.pages[1].pk, self.pages[2].pk])
+        # A facet is counted without its own filter, so its other values
+        # still show what picking them (too) would add
+        self.assertEqual(counts["year"], {"2024": (2, True), "2023": (1, False)})
+        self.assertEqual(counts["type"], {"Page": (2, True), "Homepage": (1, False)})
+
+        # Values of one facet are alternatives
+        result_ids, __ = self.counts(ids, {"year": ["2023", "2024"]})
+        self.assertEqual(result_ids, ids)
+
+    def test_postings_follow_publishing(self):
+        posting = FacetPosting.objects.get(facet="year", value="2024")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pages[1].unpublish()
+        posting.refresh_from_db()
+        self.assertEqual(posting.count, 2)
+        self.assertFalse(from_bytes(posting.bits) >> self.pages[1].pk & 1)
+
+        page = self.home.add_child(title="Payroll", slug="payroll", live=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            page.save_revision().publish()
+        year = str(Page.objects.get(pk=page.pk).first_published_at.year)
+        self.assertTrue(from_bytes(FacetPosting.objects.get(facet="year", value=year).bits) >> page.pk & 1)
+
+        # Values no live page has any more are removed
+        with self.captureOnCommitCallbacks(execute=True):
+            self.landing.delete()
+        self.assertFalse(FacetPosting.objects.filter(facet="section").exists())
+
+    def test_counts_cover_every_result(self):
+        for i in range(15):
+            self.home.add_child(title=f"Leave form {i}", slug=f"leave-form-{i}")
+        call_command("build_search_facets", stdout=StringIO())
+        response = self.client.get(reverse("search"), {"query": "leave", "page": 2})
+        self.assertEqual(response.context["search_results"].paginator.count, 19)
+        counts = {
+            value["label"]: value["count"]
+            for facet in response.context["facets"] if facet["name"] == "type"
+            for value in facet["values"]
+        }
+        self.assertEqual(counts, {"Page": 18, "Homepage": 1})
+
+    def test_postings_built_on_first_use(self):
+        FacetPosting.objects.all().delete()
+        facets.facet_stamp.bump()
+        with mock.patch("search.facets.rebuild_facets", wraps=facets.rebuild_facets) as rebuild:
+            self.client.get(reverse("search"), {"query": "leave"})
+            self.client.get(reverse("search"), {"query": "leave"})
+        self.assertEqual(rebuild.call_count, 1)
+        response = self.client.get(reverse("search"), {"query": "leave"})
+        self.assertContains(response, "Stats Section</a> (1)")
+
+    def test_search_view_filters(self):
+        response = self.client.get(reverse("search"), {"query": "leave"})
+        self.assertContains(response, "Stats Section</a> (1)")
+        self.assertContains(response, "?query=leave&amp;year=2023")
+
+        response = self.client.get(reverse("search"), {"query": "leave", "year": "2023"})
+        self.assertContains(response, "Leave policy 0")
+        self.assertNotContains(response, "Leave policy 1")
+        # The selected value's link removes it again
+        self.assertContains(response, '<a href="?query=leave" rel="nofollow">&#10003; 2023</a> (1)')
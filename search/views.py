@@ -1,7 +1,19 @@
+import hashlib
+
+from django.conf import settings
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.template.response import TemplateResponse
 
-from wagtail.models import Page
+from wagtail.documents import get_document_model
+from wagtail.models import Collection, CollectionViewRestriction, Page
+from wagtail.search.backends import get_search_backend
+
+from core.pagecache import page_cache_stamp
+from core.singleflight import get_or_compute
+
+from .facets import FACET_NAMES, facet_counts
+from .indexing import document_text_stamp
+from .models import DocumentText
 
 # To enable logging of search queries for use with the "Promoted search results" module
 # <https://docs.wagtail.org/en/stable/reference/contrib/searchpromotions.html>
@@ -11,13 +23,115 @@ from wagtail.models import Page
 # from wagtail.contrib.search_promotions.models import Query
 
 
+def get_result_ids(search_query):
+    """
+    Ids of the live pages matching a query, in rank order. Cached until
+    published content changes, and computed by one request at a time so a
+    popular query expiring doesn't send every worker to the search backend.
+
+    Every match is kept, so pagination reaches the last result; only the
+    pk is loaded for each. SEARCH_CACHE_MAX_RESULTS can cap the list.
+    """
+    digest = hashlib.sha256(search_query.encode()).hexdigest()
+    limit = getattr(settings, "SEARCH_CACHE_MAX_RESULTS", None)
+    key = f"search:{page_cache_stamp.get()}:{limit}:{digest}"
+
+    def compute():
+        results = Page.objects.live().only("pk").search(search_query)
+        if limit:
+            results = results[:limit]
+        return [page.pk for page in results]
+
+    return get_or_compute(key, compute, getattr(settings, "SEARCH_CACHE_TIMEOUT", 300))
+
+
+def get_document_ids(search_query):
+    """
+    Ids of the documents whose title or text match a query, best first,
+    cached until extracted text changes. Every match is kept, so restricted
+    documents can be skipped per visitor without leaving the slots short.
+    """
+    digest = hashlib.sha256(search_query.encode()).hexdigest()
+    key = f"search:documents:{document_text_stamp.get()}:{digest}"
+
+    def compute():
+        results = get_search_backend().search(search_query, DocumentText.objects.only("document"))
+        return [document_text.document_id for document_text in results]
+
+    return get_or_compute(key, compute, getattr(settings, "SEARCH_CACHE_TIMEOUT", 300))
+
+
+def get_hidden_collections(request):
+    """Ids of the collections whose documents the visitor couldn't download"""
+    hidden = set()
+    for restriction in CollectionViewRestriction.objects.select_related("collection"):
+        if not restriction.accept_request(request):
+            collections = Collection.objects.descendant_of(restriction.collection, inclusive=True)
+            hidden.update(collections.values_list("pk", flat=True))
+    return hidden
+
+
+def get_documents(request, search_query):
+    """
+    The best SEARCH_DOCUMENT_RESULTS documents the visitor may download.
+    Matches are loaded a few slots' worth at a time, so restricted ones
+    are dropped before the limit is applied.
+    """
+    limit = getattr(settings, "SEARCH_DOCUMENT_RESULTS", 5)
+    ids = get_document_ids(search_query)
+    hidden = get_hidden_collections(request)
+    documents = []
+    for start in range(0, len(ids), limit * 4):
+        batch = ids[start:start + limit * 4]
+        found = get_document_model().objects.in_bulk(batch)
+        documents += [
+            found[pk] for pk in batch
+            if pk in found and found[pk].collection_id not in hidden
+        ]
+        if len(documents) >= limit:
+            break
+    return documents[:limit]
+
+
+def get_facets(request, counts):
+    """Facet counts for the template, each value with the URL toggling it"""
+    facets = []
+    for facet, facet_label, values in counts:
+        links = []
+        for value, label, count, selected in values:
+            query = request.GET.copy()
+            query.pop("page", None)
+            chosen = query.getlist(facet)
+            query.setlist(facet, [v for v in chosen if v != value] if selected else chosen + [value])
+            links.append({
+                "label": label,
+                "count": count,
+                "selected": selected,
+                "url": f"?{query.urlencode()}",
+            })
+        facets.append({"name": facet, "label": facet_label, "values": links})
+    return facets
+
+
 def search(request):
     search_query = request.GET.get("query", None)
     page = request.GET.get("page", 1)
 
     # Search
+    document_results = []
+    facets = []
+    # The cap, when the results reached it
+    truncated = None
     if search_query:
-        search_results = Page.objects.live().search(search_query)
+        search_results = get_result_ids(search_query)
+        limit = getattr(settings, "SEARCH_CACHE_MAX_RESULTS", None)
+        if limit and len(search_results) >= limit:
+            truncated = limit
+        # Counted from the facet bitsets over every cached result id, not
+        # just the page shown, without another query per facet
+        selected = {facet: request.GET.getlist(facet) for facet in FACET_NAMES}
+        search_results, counts = facet_counts(search_results, selected)
+        facets = get_facets(request, counts)
 
         # To log this query for use with the "Promoted search results" module:
 
@@ -36,11 +150,22 @@ def search(request):
     except EmptyPage:
         search_results = paginator.page(paginator.num_pages)
 
+    if search_query:
+        pages = Page.objects.live().in_bulk(search_results.object_list)
+        search_results.object_list = [
+            pages[pk] for pk in search_results.object_list if pk in pages
+        ]
+        if search_results.number == 1:
+            document_results = get_documents(request, search_query)
+
     return TemplateResponse(
         request,
         "search/search.html",
         {
             "search_query": search_query,
             "search_results": search_results,
+            "document_results": document_results,
+            "facets": facets,
+            "truncated": truncated,
         },
     )
@@ -0,0 +1,202 @@
+/*!
+ * hr_data.js - Shared client data layer for hr_pulse.js and the theme plugin
+ * Dependencies: fetch, Promise (no jQuery)
+ * Features: In-flight request de-duplication, versioned localStorage cache
+ * served stale-while-revalidate with ETags, exponential backoff with full
+ * jitter, and a per-endpoint circuit breaker.
+ *
+ *   HRData.get('/api/stats/', { onUpdate: render }).then(render);
+ */
+
+(function (window) {
+  'use strict';
+
+  /** =========================
+   * Settings
+   ========================= */
+  // Bump when the shape of cached payloads changes; older entries are dropped
+  const CACHE_VERSION = 1;
+  const CACHE_PREFIX = 'hr-data:';
+  const CACHE_KEY_PREFIX = `${CACHE_PREFIX}v${CACHE_VERSION}:`;
+
+  const DEFAULTS = {
+    as: 'json', // or 'text'
+    maxAge: 60 * 1000, // cached entries younger than this are not revalidated
+    timeout: 8000,
+    retries: 3,
+    onUpdate: null, // called with fresh data when a revalidation changed it
+  };
+
+  const BACKOFF_BASE = 500;
+  const BACKOFF_MAX = 30 * 1000;
+  const BREAKER_THRESHOLD = 5; // consecutive failed attempts that open the circuit
+  const BREAKER_COOLDOWN = 30 * 1000;
+
+  const inflight = new Map();
+  const breakers = new Map();
+
+  class HTTPError extends Error {
+    constructor(response) {
+      super(`HTTP error! status: ${response.status}`);
+      this.status = response.status;
+      this.retryAfter = parseInt(response.headers.get('Retry-After'), 10) * 1000 || 0;
+    }
+  }
+
+  class CircuitOpenError extends Error {}
+
+  /** =========================
+   * Versioned cache (localStorage)
+   ========================= */
+  function readCache(key) {
+    try {
+      const raw = window.localStorage.getItem(CACHE_KEY_PREFIX + key);
+      return raw ? JSON.parse(raw) : null;
+    } catch (e) {
+      return null;
+    }
+  }
+
+  function writeCache(key, entry) {
+    try {
+      window.localStorage.setItem(CACHE_KEY_PREFIX + key, JSON.stringify(entry));
+    } catch (e) {
+      // Quota exceeded or storage disabled: start over rather than give up
+      clearCache();
+    }
+  }
+
+  /**
+   * Remove every cached entry, or only those of older cache versions
+   */
+  function clearCache(all = true) {
+    try {
+      for (let i = window.localStorage.length - 1; i >= 0; i--) {
+        const name = window.localStorage.key(i);
+        if (name.startsWith(CACHE_PREFIX) && (all || !name.startsWith(CACHE_KEY_PREFIX))) {
+          window.localStorage.removeItem(name);
+        }
+      }
+    } catch (e) {
+      // Storage disabled; nothing is cached
+    }
+  }
+
+  /** =========================
+   * Backoff & circuit breaker
+   ========================= */
+  /**
+   * "Full jitter": anywhere between 0 and the exponential delay, so clients
+   * that failed together don't retry together
+   */
+  function backoffDelay(attempt) {
+    return Math.random() * Math.min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt);
+  }
+
+  function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+  }
+
+  function getBreaker(url) {
+    const endpoint = new URL(url, window.location.href).pathname;
+    if (!breakers.has(endpoint)) breakers.set(endpoint, { failures: 0, openUntil: 0 });
+    return breakers.get(endpoint);
+  }
+
+  function isRetryable(error) {
+    // Network errors, timeouts, throttling and server errors; not 4xx
+    return !(error instanceof HTTPError) || error.status === 429 || error.status >= 500;
+  }
+
+  /** =========================
+   * Requests
+   ========================= */
+  function fetchOnce(url, cached, options) {
+    const controller = window.AbortController ? new AbortController() : null;
+    const timer = controller && setTimeout(() => controller.abort(), options.timeout);
+    const headers = { Accept: options.as === 'json' ? 'application/json' : 'text/html' };
+    if (cached && cached.etag) headers['If-None-Match'] = cached.etag;
+
+    return fetch(url, { headers, signal: controller && controller.signal, credentials: 'same-origin' })
+      .then(response => {
+        if (response.status === 304 && cached) return { ...cached, storedAt: Date.now() };
+        if (!response.ok) throw new HTTPError(response);
+        return response.text().then(body => ({
+          body,
+          etag: response.headers.get('ETag'),
+          storedAt: Date.now(),
+        }));
+      })
+      .finally(() => clearTimeout(timer));
+  }
+
+  async function fetchWithRetry(url, cached, options) {
+    const breaker = getBreaker(url);
+    for (let attempt = 0; ; attempt++) {
+      // Half-open once the cooldown is over: this attempt probes the endpoint
+      if (breaker.openUntil > Date.now()) throw new CircuitOpenError(`Circuit open for ${url}`);
+      try {
+        const entry = await fetchOnce(url, cached, options);
+        breaker.failures = 0;
+        breaker.openUntil = 0;
+        return entry;
+      } catch (error) {
+        if (!isRetryable(error)) throw error;
+        breaker.failures++;
+        if (breaker.failures >= BREAKER_THRESHOLD) {
+          breaker.openUntil = Date.now() + BREAKER_COOLDOWN + backoffDelay(0) * 10;
+        }
+        if (attempt >= options.retries) throw error;
+        await sleep(Math.max(backoffDelay(attempt), error.retryAfter || 0));
+      }
+    }
+  }
+
+  function parse(entry, as) {
+    return as === 'json' ? JSON.parse(entry.body) : entry.body;
+  }
+
+  /**
+   * Fetch ``url`` once for every caller asking while a request is running,
+   * and cache what came back
+   */
+  function revalidate(url, options) {
+    const key = `${options.as}:${url}`;
+    if (!inflight.has(key)) {
+      const cached = readCache(key);
+      const promise = fetchWithRetry(url, cached, options)
+        .then(entry => {
+          writeCache(key, entry);
+          return { entry, changed: !cached || cached.body !== entry.body };
+        })
+        .finally(() => inflight.delete(key));
+      inflight.set(key, promise);
+    }
+    return inflight.get(key);
+  }
+
+  /**
+   * Resolve with the data at ``url``. A cached copy is returned at once;
+   * when it is older than ``maxAge`` it is revalidated in the background
+   * and ``onUpdate`` receives the new data if it changed.
+   */
+  function get(url, options = {}) {
+    options = { ...DEFAULTS, ...options };
+    const cached = readCache(`${options.as}:${url}`);
+
+    if (!cached) return revalidate(url, options).then(({ entry }) => parse(entry, options.as));
+
+    if (Date.now() - cached.storedAt > options.maxAge) {
+      revalidate(url, options)
+        .then(({ entry, changed }) => {
+          if (changed && options.onUpdate) options.onUpdate(parse(entry, options.as));
+        })
+        .catch(error => console.warn(`Serving stale ${url}:`, error.message));
+    }
+    return Promise.resolve(cached).then(entry => parse(entry, options.as));
+  }
+
+  clearCache(false);
+
+  window.HRData = { get, clearCache, HTTPError, CircuitOpenError };
+})(window);
@@ -0,0 +1,178 @@
+/*!
+ * hr_frame.js - Shared animation-frame scheduler for hr_pulse.js and the theme plugin
+ * Dependencies: requestAnimationFrame (no jQuery)
+ * Features: DOM reads and writes batched per frame (all reads, then all
+ * writes, so layout is computed at most once), scroll and resize handlers
+ * run once per frame from passive listeners, frame-driven tweens.
+ *
+ *   HRFrame.onScroll(y => HRFrame.write(() => nav.classList.toggle('sticky', y > 50)));
+ */
+
+(function (window) {
+  'use strict';
+
+  const reads = [];
+  const writes = [];
+  const scrollHandlers = [];
+  const resizeHandlers = [];
+  const tweens = new Set();
+  let scheduled = false;
+
+  // Set HRFrame.profile = true to record the scheduler's time per frame
+  const stats = { frames: 0, total: 0, max: 0 };
+
+  /** =========================
+   * Read / write batching
+   ========================= */
+  function flush(now) {
+    scheduled = false;
+    const started = performance.now();
+
+    tweens.forEach(tween => tween(now));
+    // Reads queued by a write land in the next frame, writes queued by a
+    // read still run in this one
+    let task;
+    const frameReads = reads.splice(0);
+    while ((task = frameReads.shift())) task();
+    while ((task = writes.shift())) task();
+
+    if (HRFrame.profile) {
+      const elapsed = performance.now() - started;
+      stats.frames++;
+      stats.total += elapsed;
+      stats.max = Math.max(stats.max, elapsed);
+    }
+    if (reads.length || writes.length || tweens.size) schedule();
+  }
+
+  function schedule() {
+    if (!scheduled) {
+      scheduled = true;
+      window.requestAnimationFrame(flush);
+    }
+  }
+
+  function read(fn) {
+    reads.push(fn);
+    schedule();
+  }
+
+  function write(fn) {
+    writes.push(fn);
+    schedule();
+  }
+
+  /** =========================
+   * Scroll & resize
+   ========================= */
+  function frameListener(eventName, handlers, measure) {
+    let pending = false;
+    window.addEventListener(
+      eventName,
+      () => {
+        if (pending) return;
+        pending = true;
+        read(() => {
+          pending = false;
+          const value = measure();
+          handlers.forEach(handler => handler(value));
+        });
+      },
+      { passive: true }
+    );
+  }
+
+  frameListener('scroll', scrollHandlers, () => window.scrollY);
+  frameListener('resize', resizeHandlers, () => window.innerWidth);
+
+  /**
+   * Call ``handler(scrollY)`` at most once per frame while scrolling, in the
+   * read phase; DOM changes belong in HRFrame.write()
+   */
+  function onScroll(handler) {
+    scrollHandlers.push(handler);
+    read(() => handler(window.scrollY));
+  }
+
+  function onResize(handler) {
+    resizeHandlers.push(handler);
+  }
+
+  /** =========================
+   * Tweens
+   ========================= */
+  function swing(progress) {
+    return 0.5 - Math.cos(progress * Math.PI) / 2;
+  }
+
+  /**
+   * Call ``step(eased progress)`` once per frame for ``duration`` ms, in the
+   * write phase, then ``done()``
+   */
+  function animate(duration, step, done) {
+    let start = null;
+    const tween = now => {
+      if (start === null) start = now;
+      const progress = Math.min((now - start) / duration, 1);
+      writes.push(() => step(swing(progress)));
+      if (progress === 1) {
+        tweens.delete(tween);
+        if (done) writes.push(done);
+      }
+    };
+    tweens.add(tween);
+    schedule();
+    return () => tweens.delete(tween);
+  }
+
+  /**
+   * Count ``element`` from ``from`` to ``to``, writing the text only when the
+   * shown number changes
+   */
+  function countTo(element, to, from = 0, duration = 1800) {
+    let shown = null;
+    if (element._hrCount) element._hrCount();
+    element._hrCount = animate(
+      duration,
+      progress => {
+        const value = Math.floor(from + (to - from) * progress);
+        if (value !== shown) element.textContent = shown = value;
+      },
+      () => {
+        element.textContent = to;
+        element._hrCount = null;
+      }
+    );
+  }
+
+  /** =========================
+   * Visibility
+   ========================= */
+  /**
+   * Call ``callback(element)`` the first time each element is visible
+   */
+  function whenVisible(elements, callback, options = {}) {
+    const observer = new IntersectionObserver((entries, observer) => {
+      entries.forEach(entry => {
+        if (entry.isIntersecting) {
+          observer.unobserve(entry.target);
+          callback(entry.target);
+        }
+      });
+    }, options);
+    Array.from(elements).forEach(element => observer.observe(element));
+    return observer;
+  }
+
+  window.HRFrame = {
+    read,
+    write,
+    onScroll,
+    onResize,
+    animate,
+    countTo,
+    whenVisible,
+    profile: false,
+    stats,
+  };
+})(window);
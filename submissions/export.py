@@ -0,0 +1,53 @@
+import csv
+
+
+class Echo:
+    """
+    File-like object whose write() returns the line, for csv.writer
+    """
+
+    def write(self, value):
+        return value
+
+
+# A cell starting with one of these is run as a formula by spreadsheets
+FORMULA_PREFIXES = ("=", "+", "-", "@")
+
+
+def format_value(value):
+    """
+    A submitted value as a CSV cell. Visitors write these, so text that a
+    spreadsheet would evaluate is quoted with a leading apostrophe.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        value = ", ".join(str(item) for item in value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_submission_rows(page, chunk_size=2000):
+    """
+    Yield the heading row and one row per submission to a form page,
+    streaming from the database
+    """
+    data_fields = page.get_data_fields()
+    yield [str(label) for __, label in data_fields]
+
+    names = [name for name, __ in data_fields[1:]]
+    queryset = (
+        page.get_submission_class()
+        .objects.filter(page=page)
+        .order_by("pk")
+        .values_list("submit_time", "form_data")
+    )
+    for submit_time, form_data in queryset.iterator(chunk_size=chunk_size):
+        yield [submit_time.isoformat()] + [format_value(form_data.get(name)) for name in names]
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    for row in rows:
+        yield writer.writerow(row)
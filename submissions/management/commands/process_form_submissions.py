@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from submissions.pipeline import process
+
+
+class Command(BaseCommand):
+    help = "Insert spooled form submissions in batches and send their notifications"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep processing every SUBMISSIONS_PROCESS_INTERVAL seconds",
+        )
+
+    def handle(self, *args, batch_size, loop, **options):
+        interval = getattr(settings, "SUBMISSIONS_PROCESS_INTERVAL", 5)
+        while True:
+            result = process(batch_size=batch_size, wait=interval)
+            if result is None:
+                self.stderr.write("Another worker is processing submissions")
+            elif result != (0, 0) or not loop:
+                inserted, sent = result
+                self.stdout.write(f"Inserted {inserted} submissions, sent {sent} notifications")
+            if not loop:
+                return
+            time.sleep(interval)
@@ -0,0 +1,90 @@
+import time
+
+from django.db import models
+from modelcluster.fields import ParentalKey
+from wagtail.admin.panels import FieldPanel, FieldRowPanel, InlinePanel, MultiFieldPanel
+from wagtail.contrib.forms.models import AbstractEmailForm, AbstractFormField
+from wagtail.contrib.forms.panels import FormSubmissionsPanel
+from wagtail.fields import RichTextField
+
+
+class QueuedFormMixin:
+    """
+    For wagtail form pages: validate in the request, then append the
+    accepted submission to a durable spool instead of inserting it and
+    sending the notification email inline. The spool is inserted and
+    notified in batches by submissions.pipeline.
+    """
+
+    def process_form_submission(self, form):
+        from .pipeline import processor, spool
+
+        spool.append({"page": self.pk, "data": form.cleaned_data, "submitted_at": time.time()})
+        processor.ensure_running()
+        # The submission doesn't exist yet; landing pages get None
+        return None
+
+    def render_notification(self, data):
+        """
+        Build the notification body from stored submission data, formatted
+        like EmailFormMixin.render_email
+        """
+        # One unbound form per page instance; get_form() queries the fields
+        form = getattr(self, "_notification_form", None)
+        if form is None:
+            form = self._notification_form = self.get_form(page=self, user=None)
+        form.cleaned_data = data
+        return self.render_email(form)
+
+
+# -------------------------------
+# Form Page Model
+# -------------------------------
+class FormField(AbstractFormField):
+    page = ParentalKey("FormPage", on_delete=models.CASCADE, related_name="form_fields")
+
+
+class FormPage(QueuedFormMixin, AbstractEmailForm):
+    template = "submissions/form_page.html"
+    landing_page_template = "submissions/form_page_landing.html"
+
+    intro = RichTextField(blank=True)
+    thank_you_text = RichTextField(blank=True)
+
+    content_panels = AbstractEmailForm.content_panels + [
+        FormSubmissionsPanel(),
+        FieldPanel("intro"),
+        InlinePanel("form_fields", label="Form fields"),
+        FieldPanel("thank_you_text"),
+        MultiFieldPanel(
+            [
+                FieldRowPanel(
+                    [
+                        FieldPanel("from_address"),
+                        FieldPanel("to_address"),
+                    ]
+                ),
+                FieldPanel("subject"),
+            ],
+            "Email",
+        ),
+    ]
+
+    class Meta:
+        verbose_name = "Form page"
+
+
+class SubmissionBatch(models.Model):
+    """
+    A claimed submission spool that has been inserted, so a retry after a
+    crash never inserts it twice
+    """
+    name = models.CharField(max_length=100, unique=True)
+    notified = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "submission batches"
+
+    def __str__(self):
+        return self.name
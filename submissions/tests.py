@@ -0,0 +1,132 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from wagtail.contrib.forms.models import FormSubmission
+from wagtail.models import Page
+
+from .models import FormField, FormPage
+from .pipeline import process, spool
+
+
+class FormSubmissionPipelineTestCase(TestCase):
+    """Test cases for queued form submissions and the streaming export"""
+
+    def setUp(self):
+        settings_override = override_settings(
+            SUBMISSIONS_SPOOL_DIR=tempfile.mkdtemp(),
+            SUBMISSIONS_AUTO_PROCESS=False,
+            SINGLE_FLIGHT_LOCK_DIR=tempfile.mkdtemp(),
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        home_page = Page.objects.get(depth=2)
+        self.page = home_page.add_child(
+            instance=FormPage(
+                title="Contact",
+                slug="contact",
+                to_address="hr@example.com",
+                from_address="site@example.com",
+                subject="New enquiry",
+            )
+        )
+        FormField.objects.create(page=self.page, label="Name", field_type="singleline")
+        FormField.objects.create(
+            page=self.page, label="Topics", field_type="checkboxes", choices="Payroll,Hiring"
+        )
+
+    def submit(self, data):
+        return self.client.post(self.page.url, data)
+
+    def test_submission_queued_then_processed(self):
+        response = self.submit({"name": "Ada", "topics": ["Payroll", "Hiring"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "submissions/form_page_landing.html")
+        self.assertFalse(FormSubmission.objects.exists())
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(process(), (1, 1))
+        submission = FormSubmission.objects.get(page=self.page)
+        self.assertEqual(submission.form_data["name"], "Ada")
+        self.assertEqual(mail.outbox[0].subject, "New enquiry")
+        self.assertIn("Name: Ada", mail.outbox[0].body)
+        self.assertIn("Topics: Payroll, Hiring", mail.outbox[0].body)
+        self.assertEqual(os.listdir(spool.get_dir()), [])
+
+    def test_submit_time_kept(self):
+        spool.append({"page": self.page.pk, "data": {"name": "Ada"}, "submitted_at": 1700000000.5})
+        process()
+        submission = FormSubmission.objects.get()
+        self.assertEqual(submission.submit_time, datetime(2023, 11, 14, 22, 13, 20, tzinfo=timezone.utc))
+
+    def test_invalid_submission_not_queued(self):
+        response = self.submit({"topics": ["Payroll"]})
+        self.assertTemplateUsed(response, "submissions/form_page.html")
+        self.assertEqual(spool.claim(), [])
+
+    def test_retried_spool_not_inserted_twice(self):
+        self.submit({"name": "Ada", "topics": ["Hiring"]})
+        # The mail server is down: the submission is saved, the spool kept
+        with mock.patch("submissions.pipeline.send_notifications", side_effect=OSError):
+            with self.assertRaises(OSError):
+                process()
+        self.assertEqual(FormSubmission.objects.count(), 1)
+        self.assertEqual(len(spool.claim()), 1)
+
+        self.assertEqual(process(), (0, 1))
+        self.assertEqual(FormSubmission.objects.count(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(spool.claim(), [])
+
+    def test_failing_batch_quarantined(self):
+        spool.append({"page": self.page.pk, "data": {"name": "Ada"}, "submitted_at": "never"})
+        with self.assertLogs("core.spool", "ERROR"):
+            self.assertEqual(process(), (0, 1))
+        self.assertFalse(FormSubmission.objects.exists())
+        self.assertEqual(os.listdir(spool.get_dir()), ["submissions.failed"])
+
+        # Later submissions are no longer held up by it
+        spool.append({"page": self.page.pk, "data": {"name": "Grace"}, "submitted_at": 1700000000})
+        self.assertEqual(process(), (1, 1))
+        with open(os.path.join(spool.get_dir(), "submissions.failed")) as f:
+            self.assertIn('"never"', f.read())
+
+    def test_streaming_export(self):
+        FormSubmission.objects.bulk_create(
+            FormSubmission(page=self.page, form_data={"name": f"Person {i}", "topics": ["Hiring"]})
+            for i in range(25)
+        )
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        response = self.client.get(reverse("submissions_export", args=[self.page.pk]))
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ["Submission date", "Name", "Topics"])
+        self.assertEqual(len(rows), 26)
+        self.assertEqual(rows[1][1:], ["Person 0", "Hiring"])
+
+    def test_export_escapes_formulas(self):
+        FormSubmission.objects.create(
+            page=self.page, form_data={"name": "=HYPERLINK(\"http://x\")", "topics": ["@SUM(A1)"]}
+        )
+        FormSubmission.objects.create(page=self.page, form_data={"name": "Ada-Lovelace", "topics": []})
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        response = self.client.get(reverse("submissions_export", args=[self.page.pk]))
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[1][1:], ["'=HYPERLINK(\"http://x\")", "'@SUM(A1)"])
+        self.assertEqual(rows[2][1:], ["Ada-Lovelace", ""])
+
+    def test_export_requires_edit_permission(self):
+        user = get_user_model().objects.create_user("visitor", password="password")
+        self.client.force_login(user)
+        response = self.client.get(reverse("submissions_export", args=[self.page.pk]))
+        self.assertNotEqual(response.status_code, 200)
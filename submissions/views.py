@@ -0,0 +1,27 @@
+from django.core.exceptions import PermissionDenied
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from wagtail.contrib.forms.models import FormMixin
+from wagtail.models import Page
+
+from .export import iter_submission_rows, stream_csv
+
+
+def export_submissions(request, page_id):
+    """
+    Stream every submission to a form page as CSV, row by row, so large
+    exports never sit in memory
+    """
+    page = get_object_or_404(Page, pk=page_id).specific
+    if not isinstance(page, FormMixin):
+        raise PermissionDenied
+    if not page.permissions_for_user(request.user).can_edit():
+        raise PermissionDenied
+
+    response = StreamingHttpResponse(
+        stream_csv(iter_submission_rows(page)), content_type="text/csv; charset=utf-8"
+    )
+    filename = f"{page.slug}-submissions-{timezone.now():%Y-%m-%d}.csv"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,28 @@
+from django.urls import path, reverse
+from wagtail import hooks
+from wagtail.admin.widgets import Button
+from wagtail.contrib.forms.models import FormMixin
+
+from .views import export_submissions
+
+
+@hooks.register("register_admin_urls")
+def register_submissions_urls():
+    return [
+        path(
+            "submissions/<int:page_id>/export/",
+            export_submissions,
+            name="submissions_export",
+        ),
+    ]
+
+
+@hooks.register("register_page_header_buttons")
+def export_submissions_button(page, user, view_name, next_url=None):
+    if issubclass(page.specific_class or object, FormMixin):
+        yield Button(
+            "Export submissions (CSV)",
+            reverse("submissions_export", args=[page.pk]),
+            icon_name="download",
+            priority=90,
+        )
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class TaskQueueConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "taskqueue"
+    verbose_name = "Task queue"
+
+    def ready(self):
+        from . import checks  # noqa: F401
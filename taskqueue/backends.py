@@ -0,0 +1,71 @@
+from django.apps import apps
+from django.core.checks import messages
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django_tasks.backends.base import BaseTaskBackend
+from django_tasks.exceptions import ResultDoesNotExist
+from django_tasks.signals import task_enqueued
+
+
+class QueueBackend(BaseTaskBackend):
+    """
+    django_tasks backend storing tasks as QueuedTask rows, run by
+    ``manage.py run_tasks``. Failed tasks are retried with exponential
+    backoff up to MAX_ATTEMPTS times.
+
+    OPTIONS: MAX_ATTEMPTS (3), RETRY_BACKOFF seconds (10), RETRY_BACKOFF_MAX
+    seconds (3600) and LEASE_SECONDS (300), after which a running task whose
+    worker stopped renewing it is retried.
+    """
+    supports_defer = True
+    supports_get_result = True
+    supports_async_task = True
+
+    def __init__(self, alias, params):
+        super().__init__(alias, params)
+        options = params.get("OPTIONS", {})
+        self.max_attempts = options.get("MAX_ATTEMPTS", 3)
+        self.retry_backoff = options.get("RETRY_BACKOFF", 10)
+        self.retry_backoff_max = options.get("RETRY_BACKOFF_MAX", 3600)
+        self.lease_seconds = options.get("LEASE_SECONDS", 300)
+
+    def enqueue(self, task, args, kwargs):
+        from .models import QueuedTask
+
+        self.validate_task(task)
+        queued_task = QueuedTask(
+            task_path=task.module_path,
+            backend_name=self.alias,
+            queue_name=task.queue_name,
+            priority=task.priority,
+            args=args,
+            kwargs=kwargs,
+        )
+        if task.run_after is not None:
+            queued_task.run_after = task.run_after
+
+        def save():
+            queued_task.save(force_insert=True)
+            task_enqueued.send(type(self), task_result=queued_task.task_result)
+
+        if self._get_enqueue_on_commit_for_task(task):
+            transaction.on_commit(save)
+        else:
+            save()
+        return queued_task.task_result
+
+    def get_result(self, result_id):
+        from .models import QueuedTask
+
+        try:
+            return QueuedTask.objects.get(pk=result_id).task_result
+        except (QueuedTask.DoesNotExist, ValidationError) as e:
+            raise ResultDoesNotExist(result_id) from e
+
+    def check(self, **kwargs):
+        yield from super().check(**kwargs)
+        if not apps.is_installed("taskqueue"):
+            yield messages.Error(
+                "QueueBackend configured as a task backend, but taskqueue is not installed",
+                hint="Add 'taskqueue' to INSTALLED_APPS",
+            )
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.db import DatabaseError
+from django.utils import timezone
+from django_tasks import tasks
+
+from .backends import QueueBackend
+
+
+@register(Tags.database)
+def check_worker_running(app_configs, databases=None, **kwargs):
+    """
+    Warn when tasks have been due for a while and no worker has claimed
+    one in that time, which usually means ``run_tasks`` isn't running.
+    Needs the database, so only runs with ``check --database default``.
+    """
+    from .models import QueuedTask
+
+    if not databases:
+        return []
+    stale = timedelta(seconds=getattr(settings, "TASKS_WORKER_STALE_SECONDS", 600))
+    since = timezone.now() - stale
+    warnings = []
+    for backend in tasks.all():
+        if not isinstance(backend, QueueBackend):
+            continue
+        queued = QueuedTask.objects.filter(backend_name=backend.alias)
+        try:
+            overdue = queued.ready().filter(run_after__lt=since).count()
+            claimed = queued.filter(started_at__gte=since).exists()
+        except DatabaseError:
+            # Not migrated yet
+            return []
+        if overdue and not claimed:
+            warnings.append(Warning(
+                f"{overdue} task(s) on the {backend.alias!r} backend have been due for "
+                f"over {stale} and no worker has claimed a task since",
+                hint="Run 'manage.py run_tasks' (the worker process in the Procfile)",
+                id="taskqueue.W001",
+            ))
+    return warnings
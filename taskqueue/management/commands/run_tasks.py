@@ -0,0 +1,35 @@
+import signal
+
+from django.core.management.base import BaseCommand
+from django_tasks import DEFAULT_TASK_BACKEND_ALIAS
+
+from taskqueue.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks in a pool of worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Pool size, TASKS_WORKER_PROCESSES or the CPU count by default. "
+            "0 runs tasks in this process.",
+        )
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queue_names",
+            help="Only run tasks from this queue (repeatable)",
+        )
+        parser.add_argument("--backend", default=DEFAULT_TASK_BACKEND_ALIAS)
+        parser.add_argument("--once", action="store_true", help="Exit once no task is due")
+
+    def handle(self, *args, processes, queue_names, backend, once, **options):
+        worker = Worker(processes=processes, backend_name=backend, queue_names=queue_names)
+        # Stop claiming on Ctrl+C / SIGTERM and let running tasks finish
+        signal.signal(signal.SIGINT, worker.stop)
+        signal.signal(signal.SIGTERM, worker.stop)
+        count = worker.run(once=once)
+        self.stdout.write(f"Ran {count} task(s)")
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:31
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QueuedTask",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("task_path", models.CharField(max_length=255)),
+                ("backend_name", models.CharField(max_length=32)),
+                ("queue_name", models.CharField(default="default", max_length=32)),
+                ("priority", models.IntegerField(default=0)),
+                ("args", models.JSONField(default=list)),
+                ("kwargs", models.JSONField(default=dict)),
+                ("status", models.CharField(choices=[("READY", "Ready"), ("RUNNING", "Running"), ("FAILED", "Failed"), ("SUCCEEDED", "Succeeded")], default="READY", max_length=10)),
+                ("enqueued_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("run_after", models.DateTimeField(default=django.utils.timezone.now)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("lease_until", models.DateTimeField(blank=True, null=True)),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                ("worker_ids", models.JSONField(default=list)),
+                ("return_value", models.JSONField(blank=True, null=True)),
+                ("exception_class_path", models.CharField(blank=True, max_length=255)),
+                ("traceback", models.TextField(blank=True)),
+            ],
+            options={
+                "indexes": [models.Index(models.OrderBy(models.F("priority"), descending=True), models.OrderBy(models.F("run_after")), condition=models.Q(("status", "READY")), name="taskqueue_ready"), models.Index(fields=["status", "finished_at"], name="taskqueue_status_finished")],
+            },
+        ),
+    ]
@@ -0,0 +1,110 @@
+import uuid
+
+from django.core.exceptions import SuspiciousOperation
+from django.db import models
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django_tasks.task import (
+    DEFAULT_PRIORITY,
+    DEFAULT_QUEUE_NAME,
+    ResultStatus,
+    Task,
+    TaskError,
+    TaskResult,
+)
+
+
+class QueuedTaskQuerySet(models.QuerySet):
+    def ready(self):
+        """
+        Tasks due to run, in the order workers pick them up
+        """
+        return self.filter(status=ResultStatus.READY, run_after__lte=timezone.now()).order_by(
+            F("priority").desc(), F("run_after").asc()
+        )
+
+
+class QueuedTask(models.Model):
+    """
+    A task enqueued on taskqueue.backends.QueueBackend, kept after it
+    finishes for TASKS_RESULT_RETENTION_DAYS
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task_path = models.CharField(max_length=255)
+    backend_name = models.CharField(max_length=32)
+    queue_name = models.CharField(max_length=32, default=DEFAULT_QUEUE_NAME)
+    priority = models.IntegerField(default=DEFAULT_PRIORITY)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+
+    status = models.CharField(
+        max_length=10, choices=ResultStatus.choices, default=ResultStatus.READY
+    )
+    enqueued_at = models.DateTimeField(default=timezone.now)
+    run_after = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    # Set while running; a task whose lease runs out lost its worker
+    lease_until = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    worker_ids = models.JSONField(default=list)
+
+    return_value = models.JSONField(null=True, blank=True)
+    exception_class_path = models.CharField(max_length=255, blank=True)
+    traceback = models.TextField(blank=True)
+
+    objects = QueuedTaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                F("priority").desc(),
+                F("run_after").asc(),
+                name="taskqueue_ready",
+                condition=Q(status=ResultStatus.READY),
+            ),
+            models.Index(fields=["status", "finished_at"], name="taskqueue_status_finished"),
+        ]
+
+    def __str__(self):
+        return f"{self.task_path} ({self.status})"
+
+    @property
+    def task(self):
+        task = import_string(self.task_path)
+        if not isinstance(task, Task):
+            raise SuspiciousOperation(f"{self.task_path} is not a task")
+        return task.using(
+            priority=self.priority,
+            queue_name=self.queue_name,
+            run_after=self.run_after,
+            backend=self.backend_name,
+        )
+
+    @property
+    def task_result(self):
+        task_result = TaskResult(
+            task=self.task,
+            id=str(self.id),
+            status=ResultStatus(self.status),
+            enqueued_at=self.enqueued_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            last_attempted_at=self.started_at,
+            args=self.args,
+            kwargs=self.kwargs,
+            backend=self.backend_name,
+            errors=[],
+            worker_ids=self.worker_ids,
+        )
+        if self.exception_class_path:
+            task_result.errors.append(
+                TaskError(
+                    exception_class_path=self.exception_class_path,
+                    traceback=self.traceback,
+                )
+            )
+        object.__setattr__(task_result, "_return_value", self.return_value)
+        return task_result
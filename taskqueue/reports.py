@@ -0,0 +1,115 @@
+import datetime
+from datetime import timedelta
+
+import django_filters
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Min, Q
+from django.utils import timezone
+from django_tasks import ResultStatus
+from wagtail.admin.filters import WagtailFilterSet
+from wagtail.admin.ui.tables import Column
+from wagtail.admin.views.reports import ReportView
+
+from .models import QueuedTask
+
+PERIODS = {"1": "Last hour", "24": "Last 24 hours", "168": "Last 7 days"}
+
+
+class TaskQueueReportFilterSet(WagtailFilterSet):
+    # Picks the period finished tasks and latencies cover, see get_queryset
+    hours = django_filters.ChoiceFilter(
+        label="Period", choices=list(PERIODS.items()), method="filter_period"
+    )
+
+    class Meta:
+        model = QueuedTask
+        fields = []
+
+    def filter_period(self, queryset, name, value):
+        return queryset
+
+
+def format_duration(value):
+    if value is None:
+        return "-"
+    seconds = value.total_seconds()
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def duration_column(name, label):
+    return Column(
+        name, label=label, sort_key=name, accessor=lambda row: format_duration(row[name])
+    )
+
+
+class TaskQueueReportView(ReportView):
+    """
+    Queue depth and latency per task
+    """
+    page_title = "Task queue"
+    header_icon = "cogs"
+    index_url_name = "taskqueue_report"
+    index_results_url_name = "taskqueue_report_results"
+    default_ordering = "-ready"
+    filterset_class = TaskQueueReportFilterSet
+    list_export = [
+        "task_path", "ready", "scheduled", "running", "succeeded", "failed",
+        "oldest_ready", "avg_wait", "avg_run",
+    ]
+    export_headings = {
+        "task_path": "Task",
+        "ready": "Due",
+        "scheduled": "Scheduled",
+        "running": "Running",
+        "succeeded": "Succeeded",
+        "failed": "Failed",
+        "oldest_ready": "Oldest due",
+        "avg_wait": "Average wait",
+        "avg_run": "Average run time",
+    }
+    columns = [
+        Column("task_path", label="Task"),
+        Column("ready", label="Due", sort_key="ready"),
+        Column("scheduled", label="Scheduled", sort_key="scheduled"),
+        Column("running", label="Running", sort_key="running"),
+        Column("succeeded", label="Succeeded", sort_key="succeeded"),
+        Column("failed", label="Failed", sort_key="failed"),
+        duration_column("oldest_ready", "Oldest due"),
+        duration_column("avg_wait", "Average wait"),
+        duration_column("avg_run", "Average run time"),
+    ]
+
+    @property
+    def hours(self):
+        hours = self.request.GET.get("hours", "1")
+        return int(hours) if hours in PERIODS else 1
+
+    def get_filename(self):
+        return "task-queue-report-{}".format(datetime.date.today().strftime("%Y-%m-%d"))
+
+    def get_queryset(self):
+        now = timezone.now()
+        since = now - timedelta(hours=self.hours)
+        ready = Q(status=ResultStatus.READY, run_after__lte=now)
+        finished = Q(finished_at__gte=since)
+        # Wait is from when a task became due to when its last attempt started
+        attempted = Q(started_at__gte=since) & ~Q(status=ResultStatus.READY)
+        return QueuedTask.objects.values("task_path").annotate(
+            ready=Count("pk", filter=ready),
+            scheduled=Count("pk", filter=Q(status=ResultStatus.READY, run_after__gt=now)),
+            running=Count("pk", filter=Q(status=ResultStatus.RUNNING)),
+            succeeded=Count("pk", filter=Q(status=ResultStatus.SUCCEEDED) & finished),
+            failed=Count("pk", filter=Q(status=ResultStatus.FAILED) & finished),
+            oldest_ready=now - Min("run_after", filter=ready),
+            avg_wait=Avg(
+                ExpressionWrapper(F("started_at") - F("run_after"), output_field=DurationField()),
+                filter=attempted,
+            ),
+            avg_run=Avg(
+                ExpressionWrapper(F("finished_at") - F("started_at"), output_field=DurationField()),
+                filter=finished,
+            ),
+        ).order_by("task_path")
@@ -0,0 +1,145 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django_tasks import ResultStatus, default_task_backend, task
+from wagtail.models import Page
+
+from home.models import Homepage, HomepageSnapshot
+
+from .checks import check_worker_running
+from .models import QueuedTask
+from .worker import Worker, claim, get_retry_delay, prune, recover_expired
+
+QUEUE_BACKEND = {
+    "default": {
+        "BACKEND": "taskqueue.backends.QueueBackend",
+        "ENQUEUE_ON_COMMIT": False,
+        "OPTIONS": {"MAX_ATTEMPTS": 2, "RETRY_BACKOFF": 60},
+    }
+}
+
+calls = []
+
+
+@task()
+def record(name):
+    calls.append(name)
+    return name.upper()
+
+
+@task()
+def fail():
+    raise ValueError("Nope")
+
+
+@override_settings(TASKS=QUEUE_BACKEND)
+class TaskQueueTestCase(TestCase):
+    """Test cases for the database task queue and its worker"""
+
+    def setUp(self):
+        calls.clear()
+
+    def run_worker(self):
+        return Worker(processes=0).run(once=True)
+
+    def test_enqueue_does_not_run(self):
+        result = record.enqueue("low")
+        self.assertEqual(calls, [])
+        self.assertEqual(result.status, ResultStatus.READY)
+        self.assertEqual(default_task_backend.get_result(result.id).args, ["low"])
+
+    def test_runs_by_priority(self):
+        low = record.enqueue("low")
+        record.using(priority=50).enqueue("high")
+        record.using(run_after=timezone.now() + timedelta(hours=1)).enqueue("later")
+
+        self.assertEqual(self.run_worker(), 2)
+        self.assertEqual(calls, ["high", "low"])
+        low.refresh()
+        self.assertEqual(low.status, ResultStatus.SUCCEEDED)
+        self.assertEqual(low.return_value, "LOW")
+        self.assertEqual(low.attempts, 1)
+
+    def test_retries_with_backoff_then_fails(self):
+        result = fail.enqueue()
+        self.run_worker()
+        queued_task = QueuedTask.objects.get(pk=result.id)
+        self.assertEqual(queued_task.status, ResultStatus.READY)
+        self.assertEqual(queued_task.attempts, 1)
+        self.assertGreater(queued_task.run_after, timezone.now() + timedelta(seconds=55))
+        # Not due yet
+        self.assertEqual(self.run_worker(), 0)
+
+        queued_task.run_after = timezone.now()
+        queued_task.save()
+        with self.assertLogs("django_tasks", "ERROR"):
+            self.run_worker()
+        result.refresh()
+        self.assertEqual(result.status, ResultStatus.FAILED)
+        self.assertEqual(result.attempts, 2)
+        self.assertEqual(result.errors[0].exception_class, ValueError)
+
+    def test_retry_delay_grows(self):
+        backend = default_task_backend
+        delays = [get_retry_delay(backend, attempts) for attempts in (1, 2, 3)]
+        self.assertGreaterEqual(delays[0], 60)
+        self.assertGreaterEqual(delays[2], 240)
+        self.assertLessEqual(get_retry_delay(backend, 20), 3600 * 1.1)
+
+    def test_expired_lease_recovered(self):
+        result = record.enqueue("lost")
+        [queued_task] = claim("gone", default_task_backend, None, 10)
+        self.assertEqual(claim("other", default_task_backend, None, 10), [])
+
+        QueuedTask.objects.filter(pk=queued_task.pk).update(
+            lease_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(recover_expired(default_task_backend), 1)
+        queued_task.refresh_from_db()
+        self.assertEqual(queued_task.status, ResultStatus.READY)
+        self.assertEqual(queued_task.exception_class_path, "taskqueue.worker.WorkerLost")
+        self.assertEqual(result.id, str(queued_task.pk))
+
+    def test_prune(self):
+        record.enqueue("old")
+        self.run_worker()
+        QueuedTask.objects.update(finished_at=timezone.now() - timedelta(days=30))
+        record.enqueue("new")
+        self.assertEqual(prune(default_task_backend), 1)
+        self.assertEqual(QueuedTask.objects.get().args, ["new"])
+
+    def test_check_warns_without_worker(self):
+        record.enqueue("recent")
+        self.assertEqual(check_worker_running(None, databases=["default"]), [])
+        QueuedTask.objects.update(run_after=timezone.now() - timedelta(hours=1))
+        self.assertEqual(check_worker_running(None), [])
+        warnings = check_worker_running(None, databases=["default"])
+        self.assertEqual([warning.id for warning in warnings], ["taskqueue.W001"])
+
+        # A worker claimed something recently, so it is just busy
+        self.run_worker()
+        record.using(run_after=timezone.now() - timedelta(hours=1)).enqueue("backlog")
+        self.assertEqual(check_worker_running(None, databases=["default"]), [])
+
+    def test_homepage_snapshot_built_by_worker(self):
+        root_page = Page.objects.get(pk=1)
+        homepage = root_page.add_child(instance=Homepage(title="Queued", slug="queued", live=False))
+        homepage.save_revision().publish()
+        self.assertFalse(HomepageSnapshot.objects.filter(page=homepage).exists())
+
+        self.run_worker()
+        self.assertEqual(HomepageSnapshot.objects.get(page=homepage).data["title"], "Queued")
+
+    def test_admin_report(self):
+        record.enqueue("waiting")
+        fail.using(run_after=timezone.now() + timedelta(hours=1)).enqueue()
+        self.run_worker()
+        user = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(user)
+        response = self.client.get(reverse("taskqueue_report"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "taskqueue.tests.fail")
+        self.assertContains(response, "taskqueue.tests.record")
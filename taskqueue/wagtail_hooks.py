@@ -0,0 +1,28 @@
+from django.urls import path, reverse
+from wagtail import hooks
+from wagtail.admin.menu import MenuItem
+
+from .reports import TaskQueueReportView
+
+
+@hooks.register("register_admin_urls")
+def register_taskqueue_urls():
+    return [
+        path("reports/task-queue/", TaskQueueReportView.as_view(), name="taskqueue_report"),
+        path(
+            "reports/task-queue/results/",
+            TaskQueueReportView.as_view(results_only=True),
+            name="taskqueue_report_results",
+        ),
+    ]
+
+
+@hooks.register("register_reports_menu_item")
+def register_task_queue_menu_item():
+    return MenuItem(
+        "Task queue",
+        reverse("taskqueue_report"),
+        name="task-queue",
+        icon_name="cogs",
+        order=1010,
+    )
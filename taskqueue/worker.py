@@ -0,0 +1,287 @@
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections, transaction
+from django.utils import timezone
+from django_tasks import DEFAULT_TASK_BACKEND_ALIAS, ResultStatus, TaskContext, tasks
+from django_tasks.signals import task_finished, task_started
+from django_tasks.utils import get_exception_traceback, get_module_path, json_normalize
+
+from .models import QueuedTask
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerLost(Exception):
+    """
+    Recorded for an attempt whose worker died or stopped renewing its lease
+    """
+
+
+def lost(message):
+    return get_module_path(WorkerLost), f"{get_module_path(WorkerLost)}: {message}"
+
+
+# -------------------------------
+# Queue operations
+# -------------------------------
+def claim(worker_id, backend, queue_names, limit):
+    """
+    Mark up to ``limit`` due tasks as running on this worker and return
+    them, highest priority first
+    """
+    now = timezone.now()
+    ready = QueuedTask.objects.ready().filter(backend_name=backend.alias)
+    if queue_names:
+        ready = ready.filter(queue_name__in=queue_names)
+
+    claimed = []
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            ready = ready.select_for_update(skip_locked=True)
+        for queued_task in ready[:limit]:
+            changes = {
+                "status": ResultStatus.RUNNING,
+                "started_at": now,
+                "lease_until": now + timedelta(seconds=backend.lease_seconds),
+                "attempts": queued_task.attempts + 1,
+                "worker_ids": [*queued_task.worker_ids, worker_id],
+            }
+            # Conditional on the row being untouched, so two workers on a
+            # database without SKIP LOCKED never both claim it
+            updated = QueuedTask.objects.filter(
+                pk=queued_task.pk, status=ResultStatus.READY, attempts=queued_task.attempts
+            ).update(**changes)
+            if updated:
+                for name, value in changes.items():
+                    setattr(queued_task, name, value)
+                claimed.append(queued_task)
+    return claimed
+
+
+def execute(queued_task):
+    """
+    Run a claimed task. Returns (return value, None) or (None, (exception
+    class path, traceback)); nothing is saved here.
+    """
+    try:
+        task_result = queued_task.task_result
+        task = task_result.task
+        if task.takes_context:
+            value = task.call(TaskContext(task_result=task_result), *queued_task.args, **queued_task.kwargs)
+        else:
+            value = task.call(*queued_task.args, **queued_task.kwargs)
+        return json_normalize(value), None
+    except Exception as e:
+        return None, (get_module_path(type(e)), get_exception_traceback(e))
+
+
+def execute_in_process(queued_task):
+    close_old_connections()
+    try:
+        return execute(queued_task)
+    finally:
+        close_old_connections()
+
+
+def get_retry_delay(backend, attempts):
+    delay = min(backend.retry_backoff * 2 ** (attempts - 1), backend.retry_backoff_max)
+    # Jitter so tasks that failed together don't all retry together
+    return delay + random.uniform(0, delay / 10)
+
+
+def finish(queued_task, backend, value=None, error=None):
+    """
+    Record the outcome of a claimed attempt: succeeded, failed for good, or
+    scheduled for a retry with exponential backoff
+    """
+    now = timezone.now()
+    changes = {"lease_until": None}
+    if error is None:
+        changes.update(status=ResultStatus.SUCCEEDED, finished_at=now, return_value=value)
+    else:
+        changes.update(exception_class_path=error[0], traceback=error[1])
+        if queued_task.attempts >= backend.max_attempts:
+            changes.update(status=ResultStatus.FAILED, finished_at=now)
+        else:
+            delay = get_retry_delay(backend, queued_task.attempts)
+            changes.update(status=ResultStatus.READY, run_after=now + timedelta(seconds=delay))
+
+    # A worker that lost its lease no longer owns the task
+    updated = QueuedTask.objects.filter(
+        pk=queued_task.pk, status=ResultStatus.RUNNING, attempts=queued_task.attempts
+    ).update(**changes)
+    if updated:
+        for name, changed in changes.items():
+            setattr(queued_task, name, changed)
+        if queued_task.status != ResultStatus.READY:
+            task_finished.send(type(backend), task_result=queued_task.task_result)
+    return bool(updated)
+
+
+def renew_leases(task_ids, backend):
+    QueuedTask.objects.filter(pk__in=task_ids, status=ResultStatus.RUNNING).update(
+        lease_until=timezone.now() + timedelta(seconds=backend.lease_seconds)
+    )
+
+
+def recover_expired(backend):
+    """
+    Retry (or fail) running tasks whose worker stopped renewing the lease
+    """
+    expired = QueuedTask.objects.filter(
+        backend_name=backend.alias, status=ResultStatus.RUNNING, lease_until__lt=timezone.now()
+    )
+    recovered = 0
+    for queued_task in expired:
+        recovered += finish(queued_task, backend, error=lost("The lease expired"))
+    return recovered
+
+
+def prune(backend, days=None):
+    """
+    Delete finished tasks older than TASKS_RESULT_RETENTION_DAYS
+    """
+    if days is None:
+        days = getattr(settings, "TASKS_RESULT_RETENTION_DAYS", 7)
+    deleted, __ = QueuedTask.objects.filter(
+        backend_name=backend.alias,
+        status__in=[ResultStatus.SUCCEEDED, ResultStatus.FAILED],
+        finished_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
+    return deleted
+
+
+# -------------------------------
+# Worker
+# -------------------------------
+def init_process():
+    # The parent handles Ctrl+C and lets running tasks finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+class Worker:
+    """
+    Claim due tasks and run them in a pool of ``processes`` forked
+    processes (0 runs them in this process). Leases of running tasks are
+    renewed, expired ones recovered and old results pruned as it goes.
+    """
+    # Tasks claimed per process, so the pool never waits on the database
+    prefetch = 4
+
+    def __init__(self, processes=None, backend_name=DEFAULT_TASK_BACKEND_ALIAS, queue_names=None):
+        if processes is None:
+            processes = getattr(settings, "TASKS_WORKER_PROCESSES", None) or os.cpu_count()
+        self.processes = processes
+        self.backend = tasks[backend_name]
+        self.queue_names = queue_names
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = getattr(settings, "TASKS_POLL_INTERVAL", 1)
+        self.running = {}
+        self.outcomes = []
+        self.stopping = False
+        self.pool = None
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+
+    def start_pool(self):
+        # Fork before touching the database, so no process shares a socket
+        connections.close_all()
+        self.pool = ProcessPoolExecutor(
+            self.processes,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=init_process,
+        )
+        # With fork the first submit starts every process, while no
+        # connection is open
+        self.pool.submit(close_old_connections).result()
+
+    def submit(self, queued_task):
+        task_started.send(type(self.backend), task_result=queued_task.task_result)
+        if self.pool is None:
+            self.outcomes.append((queued_task, *execute(queued_task)))
+            return
+        self.running[self.pool.submit(execute_in_process, queued_task)] = queued_task
+
+    def collect(self, timeout):
+        """
+        Wait up to ``timeout`` seconds for running tasks and record their outcome
+        """
+        done, __ = wait(self.running, timeout=timeout, return_when=FIRST_COMPLETED)
+        broken = False
+        for future in done:
+            queued_task = self.running.pop(future)
+            try:
+                value, error = future.result()
+            except BrokenProcessPool:
+                broken = True
+                value, error = None, lost("The pool process running the task died")
+            self.outcomes.append((queued_task, value, error))
+        if broken:
+            logger.error("Task pool process died, restarting the pool")
+            for queued_task in self.running.values():
+                self.outcomes.append((queued_task, None, lost("The pool was restarted")))
+            self.running.clear()
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.start_pool()
+
+    def record(self):
+        # One transaction for every outcome collected so far
+        with transaction.atomic():
+            for queued_task, value, error in self.outcomes:
+                finish(queued_task, self.backend, value, error)
+        self.outcomes.clear()
+
+    def run(self, once=False):
+        """
+        Process tasks until stopped, or with ``once`` until none are due.
+        Returns the number of tasks run.
+        """
+        if self.processes:
+            self.start_pool()
+        lease_interval = self.backend.lease_seconds / 3
+        last_renewed = last_pruned = float("-inf")
+        count = 0
+        try:
+            while not self.stopping or self.running:
+                now = time.monotonic()
+                if now - last_renewed > lease_interval:
+                    renew_leases([task.pk for task in self.running.values()], self.backend)
+                    recover_expired(self.backend)
+                    last_renewed = now
+                if now - last_pruned > 3600:
+                    prune(self.backend)
+                    last_pruned = now
+
+                free = (self.processes or 1) * self.prefetch - len(self.running)
+                claimed = [] if self.stopping or not free else claim(
+                    self.worker_id, self.backend, self.queue_names, free
+                )
+                for queued_task in claimed:
+                    self.submit(queued_task)
+                count += len(claimed)
+
+                if self.running:
+                    self.collect(self.poll_interval)
+                if self.outcomes:
+                    self.record()
+                elif not claimed and not self.running:
+                    if once:
+                        break
+                    close_old_connections()
+                    time.sleep(self.poll_interval)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(wait=True)
+        return count
@@ -1,6 +1,7 @@
 /**
  * Advanced Theme Plugin JavaScript
  * Provides theme management, dynamic content loading, and UI enhancements
+ * Dynamic content is loaded through the shared data layer (js/hr_data.js)
  */
 
 class AdvancedThemeManager {
@@ -182,44 +183,24 @@ class AdvancedThemeManager {
     const navbar = document.querySelector('.navbar');
     const backToTop = document.querySelector('.back-to-top');
     
-    // Debounce function to limit scroll event frequency
-    const debounce = (func, wait) => {
-      let timeout;
-      return function executedFunction(...args) {
-        const later = () => {
-          clearTimeout(timeout);
-          func(...args);
-        };
-        clearTimeout(timeout);
-        timeout = setTimeout(later, wait);
-      };
-    };
-    
-    // Handle scroll events
-    const handleScroll = () => {
-      const scrollPosition = window.scrollY;
-      
-      // Navbar effects
-      if (navbar) {
-        if (scrollPosition > 50) {
-          navbar.classList.add('scrolled');
-        } else {
-          navbar.classList.remove('scrolled');
-        }
-      }
-      
-      // Back to top button
-      if (backToTop) {
-        if (scrollPosition > 300) {
-          backToTop.classList.add('show');
-        } else {
-          backToTop.classList.remove('show');
-        }
-      }
-    };
-    
-    // Add scroll event listener with debounce
-    window.addEventListener('scroll', debounce(handleScroll, 10));
+    // Shared frame scheduler (hr_frame.js): one passive listener, read once
+    // per frame, classes written only when they change
+    let scrolled = null;
+    let showBackToTop = null;
+    HRFrame.onScroll(scrollPosition => {
+      const nextScrolled = scrollPosition > 50;
+      const nextShowBackToTop = scrollPosition > 300;
+      if (nextScrolled === scrolled && nextShowBackToTop === showBackToTop) return;
+      scrolled = nextScrolled;
+      showBackToTop = nextShowBackToTop;
+
+      HRFrame.write(() => {
+        // Navbar effects
+        if (navbar) navbar.classList.toggle('scrolled', scrolled);
+        // Back to top button
+        if (backToTop) backToTop.classList.toggle('show', showBackToTop);
+      });
+    });
     
     // Back to top button click handler
     if (backToTop) {
@@ -284,28 +265,8 @@ class AdvancedThemeManager {
   loadSectionContent(section, apiEndpoint) {
     section.classList.add('loading');
     
-    // Retry logic for API calls
-    const fetchWithRetry = (url, options = {}, retries = 3) => {
-      return fetch(url, options)
-        .then(response => {
-          if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-          }
-          return response.json();
-        })
-        .catch(error => {
-          if (retries > 0) {
-            console.warn(`Retrying API call (${retries} retries left):`, error);
-            return new Promise(resolve => setTimeout(resolve, 1000))
-              .then(() => fetchWithRetry(url, options, retries - 1));
-          } else {
-            throw error;
-          }
-        });
-    };
-    
-    // Fetch data with retry logic
-    fetchWithRetry(apiEndpoint)
+    // Shared data layer (hr_data.js): cached, de-duplicated, retried with backoff
+    HRData.get(apiEndpoint, { onUpdate: data => this.renderSectionContent(section, data) })
       .then(data => {
         this.renderSectionContent(section, data);
         section.classList.remove('loading');
@@ -574,27 +535,8 @@ class AdvancedThemeManager {
     // Show loading state
     modalBody.innerHTML = '<div class="text-center py-8"><div class="spinner"></div><p>Loading...</p></div>';
     
-    // Fetch content with retry logic
-    const fetchWithRetry = (url, options = {}, retries = 3) => {
-      return fetch(url, options)
-        .then(response => {
-          if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-          }
-          return response.text(); // Get as text to handle HTML content
-        })
-        .catch(error => {
-          if (retries > 0) {
-            console.warn(`Retrying API call (${retries} retries left):`, error);
-            return new Promise(resolve => setTimeout(resolve, 1000))
-              .then(() => fetchWithRetry(url, options, retries - 1));
-          } else {
-            throw error;
-          }
-        });
-    };
-    
-    fetchWithRetry(apiEndpoint)
+    // Shared data layer (hr_data.js): cached, de-duplicated, retried with backoff
+    HRData.get(apiEndpoint, { as: 'text', onUpdate: htmlContent => { modalBody.innerHTML = htmlContent; } })
       .then(htmlContent => {
         modalBody.innerHTML = htmlContent;
       })
@@ -1,28 +1,31 @@
 from django import template
-from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
+from core import preload
+
 register = template.Library()
 
 
-@register.simple_tag
-def theme_css():
+@register.simple_tag(takes_context=True)
+def theme_css(context):
     """
-    Template tag to include the theme CSS file
+    Template tag to include the theme CSS file (and preload it)
     """
-    return mark_safe(
-        f'<link rel="stylesheet" type="text/css" href="{settings.STATIC_URL}css/advanced_theme.css">'
-    )
+    url = static("css/advanced_theme.css")
+    preload.add(context.get("request"), url, "style")
+    return format_html('<link rel="stylesheet" type="text/css" href="{}">', url)
 
 
-@register.simple_tag
-def theme_js():
+@register.simple_tag(takes_context=True)
+def theme_js(context):
     """
-    Template tag to include the theme JavaScript file
+    Template tag to include the theme JavaScript file (and preload it)
     """
-    return mark_safe(
-        f'<script src="{settings.STATIC_URL}js/advanced_theme.js"></script>'
-    )
+    url = static("js/advanced_theme.js")
+    preload.add(context.get("request"), url, "script")
+    return format_html('<script src="{}"></script>', url)
 
 
 @register.simple_tag
@@ -1,4 +1,6 @@
 from django.urls import path
+
+from core.routing import stateless
 from .views import (
     ThemeDemoView, 
     theme_demo,
@@ -13,8 +15,8 @@ app_name = 'theme_plugin'
 urlpatterns = [
     path('demo/', ThemeDemoView.as_view(), name='theme_demo'),
     path('demo-function/', theme_demo, name='theme_demo_function'),
-    path('api/features/', features_api, name='features_api'),
-    path('api/benefits/', benefits_api, name='benefits_api'),
-    path('api/stats/', stats_api, name='stats_api'),
-    path('api/modal-content/', modal_content_api, name='modal_content_api'),
+    path('api/features/', stateless(features_api), name='features_api'),
+    path('api/benefits/', stateless(benefits_api), name='benefits_api'),
+    path('api/stats/', stateless(stats_api), name='stats_api'),
+    path('api/modal-content/', stateless(modal_content_api), name='modal_content_api'),
 ]
\ No newline at end of file